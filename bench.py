@@ -0,0 +1,396 @@
+"""End-to-end slash command benchmark.
+
+Calls the registered bot.tree command callbacks with fake interactions
+while fake_trakt.py serves Trakt from a subprocess, and reports per
+command: wall time, Trakt calls, event-loop blocking and peak memory, at
+each community size. Examples:
+
+    python bench.py --sizes 10 100 1000 --output bench_output.txt
+    python bench.py --sizes 100 --json new.json --baseline old.json
+
+With --baseline, exits non-zero if wall time or Trakt calls regressed by
+more than --tolerance.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Optional, Dict, List, Any, Callable
+
+# The bench never talks to Discord or the real Trakt
+os.environ.setdefault('DISCORD_TOKEN', 'bench')
+os.environ.setdefault('TRAKT_CLIENT_ID', 'bench')
+os.environ.setdefault('TRAKT_CLIENT_SECRET', 'bench')
+os.environ.setdefault('METRICS_PORT', '0')
+
+import discord
+from discord.ext import commands as discord_commands
+import config
+from database import Database, open_database
+from trakt_api import AsyncTraktAPI
+from http_pool import HTTPPool
+from rate_limiter import RateLimitScheduler
+from sync_engine import SyncEngine
+from token_manager import TokenManager
+from images import StaticImageResolver
+from deadline import DeadlineCommandTree
+from metrics import MetricsRegistry
+
+BASE_DISCORD_ID = 100000
+
+# Fake Discord objects
+
+class FakeMember:
+    """Enough of discord.Member for the command callbacks."""
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.avatar = None
+        self.display_avatar = None
+        self.bot = False
+        self.guild_permissions = discord.Permissions.none()
+
+    async def send(self, *args, **kwargs):
+        return FakeMessage()
+
+class FakeMessage:
+    _next_id = 1
+
+    def __init__(self):
+        self.id = FakeMessage._next_id
+        FakeMessage._next_id += 1
+
+    async def edit(self, **kwargs):
+        return self
+
+    async def delete(self):
+        pass
+
+class FakeResponse:
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+        self.interaction.replies += 1
+
+    async def edit_message(self, **kwargs):
+        self._done = True
+        self.interaction.replies += 1
+
+    async def send_modal(self, modal):
+        self._done = True
+
+class FakeFollowup:
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs) -> FakeMessage:
+        self.interaction.replies += 1
+        return FakeMessage()
+
+    async def edit_message(self, message_id: int, **kwargs) -> FakeMessage:
+        self.interaction.replies += 1
+        return FakeMessage()
+
+class FakeInteraction:
+    """Records replies instead of sending them to Discord."""
+
+    def __init__(self, user: FakeMember, command_name: str):
+        self.user = user
+        self.guild = None
+        self.channel = None
+        self.message = None
+        self.type = discord.InteractionType.application_command
+        self.data = {'name': command_name}
+        self.command = None
+        self.replies = 0
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def edit_original_response(self, **kwargs) -> FakeMessage:
+        self.replies += 1
+        return FakeMessage()
+
+    async def original_response(self) -> FakeMessage:
+        return FakeMessage()
+
+# Scenarios: command name -> keyword arguments for its callback
+
+def member(n: int) -> FakeMember:
+    return FakeMember(BASE_DISCORD_ID + n, f"user{n}")
+
+SCENARIOS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    'community': lambda: {},
+    'trends': lambda: {'days': 7},
+    'leaderboard': lambda: {'timeframe': 'week', 'category': 'total'},
+    'compare': lambda: {'user1': member(2)},
+    'continue': lambda: {},
+    'top': lambda: {'content_type': 'all', 'category': 'rated', 'genre': 'drama'},
+    'random': lambda: {'content_type': 'all', 'genre': 'any'},
+    'calendar': lambda: {'days': 7},
+    'arena-complete': lambda: {}
+}
+
+# Fake Trakt subprocess
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+async def start_fake_trakt(args, users: int):
+    """Run fake_trakt.py in a subprocess so its work doesn't count against the bot."""
+    port = free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_trakt.py'),
+        '--port', str(port), '--users', str(users), '--history', str(args.history),
+        '--latency', str(args.latency), '--jitter', str(args.jitter),
+        '--error-rate', str(args.error_rate), '--seed', str(args.seed),
+        stdout=asyncio.subprocess.PIPE
+    )
+    line = await asyncio.wait_for(process.stdout.readline(), timeout=120)
+    if not line:
+        raise RuntimeError("fake_trakt.py exited before it started listening")
+    return process, f"http://127.0.0.1:{port}"
+
+# Measurement
+
+class LoopMonitor:
+    """Measure how long the event loop was blocked, from how late a short sleep wakes up."""
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.001):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked = 0.0
+        self.max_block = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - expected
+            if lag > self.threshold:
+                self.blocked += lag
+                self.max_block = max(self.max_block, lag)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+def populate_db(db: Database, users: int):
+    """Connect users 1..N as public fake Trakt users, with user1 in the arena."""
+    for n in range(1, users + 1):
+        db.add_user(str(BASE_DISCORD_ID + n), f"user{n}", f"token-user{n}", f"refresh-user{n}",
+                    is_public=True, expires_in=7776000, created_at=int(time.time()))
+    db.add_arena_participant(str(BASE_DISCORD_ID + 1), 'user1')
+    db.set_arena_active(True)
+    db.set_arena_challenge({
+        'name': 'Genre Master',
+        'description': 'Watch any **Drama** movie you haven\'t seen',
+        'points': 10,
+        'type': 'genre',
+        'target': 'drama',
+        'end_time': int(time.time()) + 23 * 60 * 60
+    })
+
+def build_bot(api: AsyncTraktAPI, db: Database, sync: Optional[SyncEngine]) -> discord_commands.Bot:
+    """Register every command module on a bot that never connects."""
+    import images
+    import views
+    import commands
+    import social
+    import management
+
+    bot = discord_commands.Bot(command_prefix='!', intents=discord.Intents.default(), tree_cls=DeadlineCommandTree)
+    images.init_images(StaticImageResolver())
+    views.init_views(api, db)
+    commands.init_commands(bot, api, db)
+    social.init_social(bot, api, db, sync, TokenManager(api, db))
+    management.init_management(bot, api, db)
+    return bot
+
+def total_calls(metrics: MetricsRegistry) -> int:
+    return sum(endpoint.calls for endpoint in metrics.endpoints.values())
+
+async def invoke(bot: discord_commands.Bot, name: str) -> Dict[str, Any]:
+    """Run one command callback the way the tree would, including its deadline."""
+    command = bot.tree.get_command(name)
+    interaction = FakeInteraction(member(1), name)
+    error = None
+
+    async def run():
+        await bot.tree.interaction_check(interaction)
+        await command.callback(interaction, **SCENARIOS[name]())
+
+    try:
+        # A task of its own so the deadline contextvar doesn't leak between runs
+        await asyncio.ensure_future(run())
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {'replies': interaction.replies, 'error': error}
+
+async def measure(bot, api: AsyncTraktAPI, name: str, repeat: int, warm: bool) -> Dict[str, Any]:
+    """Time a command over several runs, then run it once more under tracemalloc."""
+    walls, blocked, max_blocks, calls = [], [], [], []
+    outcome = {}
+    for _ in range(repeat):
+        if not warm:
+            api.cache.clear()
+        calls_before = total_calls(api.metrics)
+        with LoopMonitor() as monitor:
+            start = time.perf_counter()
+            outcome = await invoke(bot, name)
+            walls.append(time.perf_counter() - start)
+        blocked.append(monitor.blocked)
+        max_blocks.append(monitor.max_block)
+        calls.append(total_calls(api.metrics) - calls_before)
+
+    if not warm:
+        api.cache.clear()
+    tracemalloc.start()
+    try:
+        await invoke(bot, name)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_s': statistics.median(walls),
+        'trakt_calls': int(statistics.median(calls)),
+        'blocked_ms': statistics.median(blocked) * 1000,
+        'max_block_ms': max(max_blocks) * 1000,
+        'peak_mb': peak / (1024 * 1024),
+        'replies': outcome.get('replies', 0),
+        'error': outcome.get('error')
+    }
+
+async def bench_size(args, users: int, log) -> Dict[str, Dict[str, Any]]:
+    process, base_url = await start_fake_trakt(args, users)
+    workdir = tempfile.TemporaryDirectory()
+    config.TRAKT_BASE_URL = base_url
+    config.TRAKT_AUTH_URL = f"{base_url}/oauth"
+
+    scheduler = None
+    if not args.rate_limits:
+        # Measure the bot, not Trakt's real budget
+        scheduler = RateLimitScheduler(get_limit=1000000, get_period=1, post_limit=1000000, post_period=1)
+    http_pool = HTTPPool()
+    api = AsyncTraktAPI(http_pool, scheduler=scheduler, metrics=MetricsRegistry())
+    db_file = os.path.join(workdir.name, 'users.db' if args.storage == 'sqlite' else 'users.json')
+    db = open_database(args.storage, db_file)
+    populate_db(db, users)
+
+    results = {}
+    try:
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+            sync = None
+            if args.sync:
+                sync = SyncEngine(api, db)
+                await sync.sync_all()
+            bot = build_bot(api, db, sync)
+            for name in args.commands:
+                results[name] = await measure(bot, api, name, args.repeat, args.warm)
+                print(f"  /{name} done", file=sys.stderr)
+    finally:
+        await api.close()
+        db.close()
+        process.terminate()
+        await process.wait()
+        workdir.cleanup()
+
+    log(f"\n== {users} public users ==")
+    log(f"{'command':<16}{'wall s':>9}{'calls':>8}{'blocked ms':>12}{'max blk ms':>12}{'peak MB':>10}{'replies':>9}  error")
+    for name, row in results.items():
+        log(f"{'/' + name:<16}{row['wall_s']:>9.3f}{row['trakt_calls']:>8}{row['blocked_ms']:>12.1f}"
+            f"{row['max_block_ms']:>12.1f}{row['peak_mb']:>10.2f}{row['replies']:>9}  {row['error'] or ''}")
+    return results
+
+def compare(results: Dict[str, Dict[str, Dict[str, Any]]], baseline: Dict[str, Dict[str, Dict[str, Any]]],
+            tolerance: float, log) -> List[str]:
+    """List the commands whose wall time or Trakt calls got worse than baseline allows."""
+    regressions = []
+    for size, commands in results.items():
+        for name, row in commands.items():
+            old = baseline.get(size, {}).get(name)
+            if not old:
+                continue
+            for metric in ('wall_s', 'trakt_calls'):
+                if old[metric] and row[metric] > old[metric] * (1 + tolerance):
+                    regressions.append(f"{size} users /{name}: {metric} {old[metric]:.3f} -> {row[metric]:.3f}")
+    log("\nRegressions against baseline:" if regressions else "\nNo regressions against baseline.")
+    for line in regressions:
+        log(f"  {line}")
+    return regressions
+
+async def main(args) -> int:
+    lines = []
+
+    def log(line: str):
+        print(line)
+        lines.append(line)
+
+    log(f"Benchmark: latency={args.latency}s jitter={args.jitter}s error_rate={args.error_rate} "
+        f"history={args.history} repeat={args.repeat} cache={'warm' if args.warm else 'cold'} "
+        f"sync={'on' if args.sync else 'off'} storage={args.storage}")
+    results = {}
+    for users in args.sizes:
+        print(f"Running {users} users...", file=sys.stderr)
+        results[str(users)] = await bench_size(args, users, log)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, log)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark slash commands against a fake Trakt")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help="public user counts")
+    parser.add_argument('--commands', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per command (median is reported)")
+    parser.add_argument('--history', type=int, default=200, help="history entries per fake user")
+    parser.add_argument('--latency', type=float, default=0.02, help="fake Trakt response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of fake Trakt responses that are 5xx")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warm', action='store_true', help="keep the response cache between runs")
+    parser.add_argument('--sync', action='store_true', help="run a full sync first so commands can use synced history")
+    parser.add_argument('--storage', choices=['json', 'journal', 'sqlite'], default=config.DATABASE_BACKEND,
+                        help="user data backend to run against")
+    parser.add_argument('--rate-limits', action='store_true', help="apply the configured Trakt rate limits")
+    parser.add_argument('--verbose', action='store_true', help="show the bot's own output")
+    parser.add_argument('--output', help="also write the report to this file")
+    parser.add_argument('--json', help="write raw results as JSON, for use as a later --baseline")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL.
+
+    Expired entries are kept until they are evicted so callers can
+    revalidate them (see ``get_stale`` and ``refresh``) instead of
+    refetching. Any object with the same methods can be passed to
+    AsyncTraktAPI in its place.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'revalidations': 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a fresh value, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats['misses'] += 1
+            return None
+
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats['hits'] += 1
+        return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Get a value whether or not it has expired, or None if it isn't cached."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def refresh(self, key: Hashable, ttl: float) -> bool:
+        """Mark a cached value fresh again for ttl seconds without replacing it."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        self._entries[key] = (entry[0], time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        self._stats['revalidations'] += 1
+        return True
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """Store a value for ttl seconds, evicting the least recently used entry if full."""
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size."""
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self._stats['hits'],
+            'misses': self._stats['misses'],
+            'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+            'evictions': self._stats['evictions'],
+            'expirations': self._stats['expirations'],
+            'revalidations': self._stats['revalidations']
+        }
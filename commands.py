@@ -1,9 +1,9 @@
 import discord
 from discord import app_commands
 from typing import Optional, List
-import requests
 from views import SearchView, ContentActionView, ReminderModal
 import config
+from images import poster_url, item_poster_url
 
 # Initialize these as None and set them later
 bot = None
@@ -28,7 +28,7 @@ async def show_autocomplete(interaction: discord.Interaction, current: str) -> L
     if len(current) < 2:
         return []
     try:
-        results = trakt_api.search_content(current, 'show')
+        results = await trakt_api.search_content(current, 'show')
         choices = []
         for result in results[:10]:
             show = result['show']
@@ -44,7 +44,7 @@ async def content_autocomplete(interaction: discord.Interaction, current: str) -
     if len(current) < 2:
         return []
     try:
-        results = trakt_api.search_content(current)
+        results = await trakt_api.search_content(current)
         choices = []
         for result in results[:10]:
             content = result.get('show') or result.get('movie')
@@ -78,12 +78,12 @@ def register_account_commands():
         await interaction.response.defer()
         
         try:
-            token_data = trakt_api.exchange_code_for_token(code)
+            token_data = await trakt_api.exchange_code_for_token(code)
             if not token_data:
                 await interaction.followup.send("❌ Invalid authorization code. Please try again.")
                 return
             
-            user_profile = trakt_api.get_user_profile(token_data['access_token'])
+            user_profile = await trakt_api.get_user_profile(token_data['access_token'])
             if not user_profile:
                 await interaction.followup.send("❌ Failed to get user profile. Please try again.")
                 return
@@ -92,7 +92,9 @@ def register_account_commands():
                 str(interaction.user.id),
                 user_profile['username'],
                 token_data['access_token'],
-                token_data['refresh_token']
+                token_data['refresh_token'],
+                expires_in=token_data.get('expires_in'),
+                created_at=token_data.get('created_at')
             )
             
             if success:
@@ -137,6 +139,20 @@ def register_account_commands():
         else:
             await interaction.response.send_message("❌ Failed to update your privacy settings.")
 
+    @bot.tree.command(name="db-reload", description="🔄 Reload user data from disk after editing it by hand (Admin only)")
+    async def db_reload(interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ Admin only command!", ephemeral=True)
+            return
+        
+        if db.reload():
+            counts = db.get_user_count()
+            await interaction.response.send_message(
+                f"✅ Reloaded user data: **{counts['total']}** users, **{counts['public']}** public.", ephemeral=True
+            )
+        else:
+            await interaction.response.send_message("❌ Failed to reload user data.", ephemeral=True)
+
 def register_content_commands():
     """Register content management commands"""
     
@@ -146,7 +162,7 @@ def register_content_commands():
     async def search_content(interaction: discord.Interaction, query: str):
         await interaction.response.defer()
         
-        results = trakt_api.search_content(query)
+        results = await trakt_api.search_content(query)
         if not results:
             await interaction.followup.send(f"❌ No results found for '{query}'")
             return
@@ -196,9 +212,15 @@ def register_content_commands():
         
         try:
             if from_watchlist and user:
-                # Get random from user's watchlist
-                watchlist = trakt_api.get_user_watchlist(user['access_token'])
-                if not watchlist:
+                # Pick from the whole watchlist, page by page, keeping one item at a time
+                import random
+                random_item = None
+                seen = 0
+                async for item in trakt_api.iter_user_watchlist(user['access_token']):
+                    seen += 1
+                    if random.randrange(seen) == 0:
+                        random_item = item
+                if random_item is None:
                     embed = discord.Embed(
                         title="📋 Empty Watchlist",
                         description="Your watchlist is empty! Add some shows or movies first.",
@@ -212,8 +234,6 @@ def register_content_commands():
                     await interaction.followup.send(embed=embed)
                     return
                 
-                import random
-                random_item = random.choice(watchlist)
                 content = random_item.get('show') or random_item.get('movie')
                 content_type_result = 'show' if 'show' in random_item else 'movie'
                 
@@ -256,15 +276,15 @@ def register_content_commands():
                 # Get popular/trending content for random selection
                 if content_type == "all":
                     # Get both movies and shows
-                    movies = trakt_api.get_popular_movies()[:20] if hasattr(trakt_api, 'get_popular_movies') else []
-                    shows = trakt_api.get_popular_shows()[:20] if hasattr(trakt_api, 'get_popular_shows') else []
+                    movies = (await trakt_api.get_popular_movies())[:20] if hasattr(trakt_api, 'get_popular_movies') else []
+                    shows = (await trakt_api.get_popular_shows())[:20] if hasattr(trakt_api, 'get_popular_shows') else []
                     
                     # If API methods don't exist, use search with popular terms
                     if not movies and not shows:
                         popular_terms = ["breaking bad", "inception", "the office", "stranger things", "pulp fiction", "game of thrones", "the dark knight", "friends"]
                         import random
                         search_term = random.choice(popular_terms)
-                        results = trakt_api.search_content(search_term)
+                        results = await trakt_api.search_content(search_term)
                         if results:
                             content_items = [results[0]]  # Take first result
                         else:
@@ -274,23 +294,23 @@ def register_content_commands():
                         content_items = movies + shows
                         
                 elif content_type == "movie":
-                    content_items = trakt_api.get_popular_movies()[:30] if hasattr(trakt_api, 'get_popular_movies') else []
+                    content_items = (await trakt_api.get_popular_movies())[:30] if hasattr(trakt_api, 'get_popular_movies') else []
                     if not content_items:
                         # Fallback to search
                         movie_terms = ["inception", "pulp fiction", "the dark knight", "forrest gump", "the matrix"]
                         import random
                         search_term = random.choice(movie_terms)
-                        results = trakt_api.search_content(search_term, 'movie')
+                        results = await trakt_api.search_content(search_term, 'movie')
                         content_items = results[:10] if results else []
                         
                 else:  # show
-                    content_items = trakt_api.get_popular_shows()[:30] if hasattr(trakt_api, 'get_popular_shows') else []
+                    content_items = (await trakt_api.get_popular_shows())[:30] if hasattr(trakt_api, 'get_popular_shows') else []
                     if not content_items:
                         # Fallback to search
                         show_terms = ["breaking bad", "the office", "stranger things", "game of thrones", "friends"]
                         import random
                         search_term = random.choice(show_terms)
-                        results = trakt_api.search_content(search_term, 'show')
+                        results = await trakt_api.search_content(search_term, 'show')
                         content_items = results[:10] if results else []
                 
                 if not content_items:
@@ -379,9 +399,9 @@ def register_content_commands():
                 embed.add_field(name="🎯 Filters Applied", value=filter_text, inline=True)
             
             # Add poster
-            tmdb_id = content.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_image(url=f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg")
+            poster = item_poster_url(random_item, 'w500')
+            if poster:
+                embed.set_image(url=poster)
             
             # Add action buttons
             view = ContentActionView(random_item, interaction.user.id)
@@ -421,7 +441,7 @@ def register_content_commands():
     async def get_info(interaction: discord.Interaction, query: str):
         await interaction.response.defer()
         
-        results = trakt_api.search_content(query)
+        results = await trakt_api.search_content(query)
         if not results:
             await interaction.followup.send(f"❌ No results found for '{query}'")
             return
@@ -432,9 +452,9 @@ def register_content_commands():
         content_id = content['ids']['trakt']
         
         if content_type == 'show':
-            detailed_info = trakt_api.get_show_info(str(content_id))
+            detailed_info = await trakt_api.get_show_info(str(content_id))
         else:
-            detailed_info = trakt_api.get_movie_info(str(content_id))
+            detailed_info = await trakt_api.get_movie_info(str(content_id))
         
         if not detailed_info:
             await interaction.followup.send("❌ Failed to get detailed information.")
@@ -456,9 +476,9 @@ def register_content_commands():
         embed.add_field(name="Runtime", value=f"⏱️ {runtime} min" if runtime else "N/A", inline=True)
         
         # Add poster
-        tmdb_id = detailed_info.get('ids', {}).get('tmdb')
-        if tmdb_id:
-            embed.set_image(url=f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg")
+        poster = poster_url(detailed_info, content_type, 'w500')
+        if poster:
+            embed.set_image(url=poster)
         
         view = ContentActionView(result, interaction.user.id)
         await interaction.followup.send(embed=embed, view=view)
@@ -546,7 +566,7 @@ def register_content_commands():
                 
                 for term in movie_terms[:8]:  # Limit to prevent API overload
                     try:
-                        results = trakt_api.search_content(term, 'movie')
+                        results = await trakt_api.search_content(term, 'movie')
                         if results:
                             movie_result = results[0]
                             if 'movie' in movie_result:
@@ -567,7 +587,7 @@ def register_content_commands():
                 
                 for term in show_terms[:8]:  # Limit to prevent API overload
                     try:
-                        results = trakt_api.search_content(term, 'show')
+                        results = await trakt_api.search_content(term, 'show')
                         if results:
                             show_result = results[0]
                             if 'show' in show_result:
@@ -586,26 +606,15 @@ def register_content_commands():
             
             # Filter by genre if specified
             if genre != "any":
+                # Search and popular results already carry genres; only gaps are looked up
+                await trakt_api.hydrator.hydrate(curated_content, ('genres',))
+                genre_check = genre.lower().replace('-', ' ')
                 filtered_content = []
                 for item in curated_content:
                     content = item.get('show') or item.get('movie')
-                    content_id = str(content['ids']['trakt'])
-                    item_type = 'show' if 'show' in item else 'movie'
-                    
-                    # Get detailed info to check genres
-                    try:
-                        if item_type == 'show':
-                            detailed = trakt_api.get_show_info(content_id)
-                        else:
-                            detailed = trakt_api.get_movie_info(content_id)
-                        
-                        if detailed and detailed.get('genres'):
-                            content_genres = [g.lower().replace('-', ' ') for g in detailed['genres']]
-                            genre_check = genre.lower().replace('-', ' ')
-                            if genre_check in content_genres:
-                                filtered_content.append(item)
-                    except:
-                        continue
+                    content_genres = [g.lower().replace('-', ' ') for g in content.get('genres') or []]
+                    if genre_check in content_genres:
+                        filtered_content.append(item)
                 
                 curated_content = filtered_content
             
@@ -708,9 +717,9 @@ def register_content_commands():
                     # Add thumbnail from top item
                     if page_content:
                         top_content = page_content[0].get('show') or page_content[0].get('movie')
-                        tmdb_id = top_content.get('ids', {}).get('tmdb')
-                        if tmdb_id:
-                            embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                        poster = item_poster_url(page_content[0])
+                        if poster:
+                            embed.set_thumbnail(url=poster)
                     
                     embed.set_footer(text=f"💡 Use buttons to navigate • {len(self.content_list)} total items")
                     return embed
@@ -778,9 +787,9 @@ def register_content_commands():
                             inline=False
                         )
                     
-                    tmdb_id = content.get('ids', {}).get('tmdb')
-                    if tmdb_id:
-                        embed.set_image(url=f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg")
+                    poster = item_poster_url(random_item, 'w500')
+                    if poster:
+                        embed.set_image(url=poster)
                     
                     action_view = ContentActionView(random_item, interaction.user.id)
                     await interaction.response.send_message(embed=embed, view=action_view, ephemeral=True)
@@ -819,7 +828,7 @@ def register_content_commands():
         
         try:
             # Search for the content
-            results = trakt_api.search_content(query)
+            results = await trakt_api.search_content(query)
             if not results:
                 await interaction.followup.send(f"❌ No results found for '{query}'")
                 return
@@ -829,34 +838,33 @@ def register_content_commands():
             content_type = 'show' if 'show' in result else 'movie'
             content_id = str(content['ids']['trakt'])
             
-            # Check if it's in their history first
-            history = trakt_api.get_user_history_authenticated(user['access_token'], 100)
-            
-            # Look for this content in their history
-            found_in_history = False
+            # Check if it's in their history first; Trakt filters the history down to this title
             history_items = []
-            
-            for item in history:
-                item_content = item.get('show') or item.get('movie')
-                if item_content and item_content['title'].lower() == content['title'].lower():
-                    found_in_history = True
-                    history_items.append(item)
+            async for item in trakt_api.iter_user_history(
+                access_token=user['access_token'],
+                content_type=f"{content_type}s",
+                item_id=content_id
+            ):
+                history_items.append(item)
+                if content_type == 'movie':
+                    break
+            found_in_history = bool(history_items)
             
             if not found_in_history:
                 embed = discord.Embed(
                     title="❓ Not Found in History",
-                    description=f"**{content['title']}** doesn't appear in your recent watch history.",
+                    description=f"**{content['title']}** doesn't appear in your watch history.",
                     color=0xff6600
                 )
                 embed.add_field(
                     name="💡 Possible Reasons",
-                    value="• Not marked as watched yet\n• Too old to appear in recent history\n• Different title spelling\n• Use `/search` to find the exact title",
+                    value="• Not marked as watched yet\n• Different title spelling\n• Use `/search` to find the exact title",
                     inline=False
                 )
                 
-                tmdb_id = content.get('ids', {}).get('tmdb')
-                if tmdb_id:
-                    embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                poster = poster_url(content, content_type)
+                if poster:
+                    embed.set_thumbnail(url=poster)
                 
                 await interaction.followup.send(embed=embed)
                 return
@@ -881,7 +889,7 @@ def register_content_commands():
                     name="📺 TV Show",
                     value=f"**{content['title']}** ({content.get('year', 'N/A')})\n"
                           f"⚠️ This will remove **ALL episodes** from your watched history.\n"
-                          f"Found **{len(history_items)}** entries in recent history.",
+                          f"Found **{len(history_items)}** entries in your history.",
                     inline=False
                 )
             
@@ -891,9 +899,9 @@ def register_content_commands():
                 inline=False
             )
             
-            tmdb_id = content.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = poster_url(content, content_type)
+            if poster:
+                embed.set_thumbnail(url=poster)
             
             # Create confirmation view
             class UnwatchConfirmView(discord.ui.View):
@@ -913,7 +921,7 @@ def register_content_commands():
                     await interaction.response.defer()
                     
                     # Attempt to remove from history
-                    success = trakt_api.unmark_as_watched(self.access_token, self.content_type, content_id)
+                    success = await trakt_api.unmark_as_watched(self.access_token, self.content_type, content_id)
                     
                     if success:
                         embed = discord.Embed(
@@ -941,9 +949,9 @@ def register_content_commands():
                             inline=False
                         )
                         
-                        tmdb_id = self.content_data.get('ids', {}).get('tmdb')
-                        if tmdb_id:
-                            embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                        poster = poster_url(self.content_data, self.content_type)
+                        if poster:
+                            embed.set_thumbnail(url=poster)
                         
                         # Disable all buttons
                         for item in self.children:
@@ -1006,7 +1014,7 @@ def register_content_commands():
             await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
             return
         
-        results = trakt_api.search_content(query)
+        results = await trakt_api.search_content(query)
         if not results:
             await interaction.followup.send(f"❌ No results found for '{query}'")
             return
@@ -1025,15 +1033,15 @@ def register_content_commands():
                 color=0x0099ff
             )
             
-            tmdb_id = content.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = poster_url(content, content_type)
+            if poster:
+                embed.set_thumbnail(url=poster)
             
             view = ShowProgressView(result, interaction.user.id, user['access_token'])
             await interaction.followup.send(embed=embed, view=view)
         else:
             # For movies, simple mark
-            success = trakt_api.mark_as_watched(user['access_token'], content_type, content_id)
+            success = await trakt_api.mark_as_watched(user['access_token'], content_type, content_id)
             
             if success:
                 embed = discord.Embed(
@@ -1041,9 +1049,9 @@ def register_content_commands():
                     description=f"**{content['title']}** has been marked as watched!",
                     color=0x00ff00
                 )
-                tmdb_id = content.get('ids', {}).get('tmdb')
-                if tmdb_id:
-                    embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                poster = poster_url(content, content_type)
+                if poster:
+                    embed.set_thumbnail(url=poster)
                 await interaction.followup.send(embed=embed)
             else:
                 await interaction.followup.send("❌ Failed to mark as watched. Please try again.")
@@ -1059,7 +1067,7 @@ def register_content_commands():
             await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
             return
         
-        results = trakt_api.search_content(query)
+        results = await trakt_api.search_content(query)
         if not results:
             await interaction.followup.send(f"❌ No results found for '{query}'")
             return
@@ -1069,7 +1077,7 @@ def register_content_commands():
         content_type = 'show' if 'show' in result else 'movie'
         content_id = str(content['ids']['trakt'])
         
-        success = trakt_api.add_to_watchlist(user['access_token'], content_type, content_id)
+        success = await trakt_api.add_to_watchlist(user['access_token'], content_type, content_id)
         
         if success:
             embed = discord.Embed(
@@ -1092,7 +1100,7 @@ def register_content_commands():
             await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
             return
         
-        results = trakt_api.search_content(show_name, 'show')
+        results = await trakt_api.search_content(show_name, 'show')
         if not results:
             await interaction.followup.send(f"❌ No shows found for '{show_name}'")
             return
@@ -1196,7 +1204,7 @@ def register_content_commands():
             # Get calendar data with authentication
             username = user['trakt_username']
             access_token = user['access_token']
-            calendar_data = trakt_api.get_calendar(username, days, access_token)
+            calendar_data = await trakt_api.get_calendar(username, days, access_token)
             
             if not calendar_data:
                 embed = discord.Embed(
@@ -1413,9 +1421,9 @@ def register_content_commands():
             if calendar_data:
                 try:
                     recent_show = calendar_data[0].get('show', {})
-                    tmdb_id = recent_show.get('ids', {}).get('tmdb')
-                    if tmdb_id:
-                        embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                    poster = poster_url(recent_show, 'show')
+                    if poster:
+                        embed.set_thumbnail(url=poster)
                 except:
                     pass
             
@@ -1584,7 +1592,7 @@ def register_context_menus():
         # Take first 50 chars as search query
         query = content[:50].strip()
         
-        results = trakt_api.search_content(query)
+        results = await trakt_api.search_content(query)
         if results:
             result = results[0]
             content_obj = result.get('show') or result.get('movie')
@@ -1602,9 +1610,9 @@ def register_context_menus():
             embed.add_field(name="Year", value=f"📅 {year}", inline=True)
             embed.add_field(name="Rating", value=f"⭐ {rating}/10", inline=True)
             
-            tmdb_id = content_obj.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = item_poster_url(result)
+            if poster:
+                embed.set_thumbnail(url=poster)
             
             view = ContentActionView(result, interaction.user.id)
             await interaction.followup.send(embed=embed, view=view)
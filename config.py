@@ -16,9 +16,89 @@ TRAKT_REDIRECT_URI = os.getenv('TRAKT_REDIRECT_URI', 'urn:ietf:wg:oauth:2.0:oob'
 BOT_NAME = os.getenv('BOT_NAME', 'Noko')
 REMINDER_CHANNEL_ID = os.getenv('REMINDER_CHANNEL_ID')
 
-# Trakt.tv API URLs
-TRAKT_BASE_URL = 'https://api.trakt.tv'
-TRAKT_AUTH_URL = 'https://trakt.tv/oauth'
+# Seconds a slash command may spend on Trakt calls before answering with what it has
+INTERACTION_DEADLINE = float(os.getenv('INTERACTION_DEADLINE', '20'))
+# Autocomplete has to answer within Discord's 3 second window, so it gets a shorter budget
+AUTOCOMPLETE_DEADLINE = min(float(os.getenv('AUTOCOMPLETE_DEADLINE', '2.5')), 2.9)
+
+# User data storage: 'json' (a single users.json file), 'journal' (users.json snapshot
+# plus an append-only users.json.journal) or 'sqlite' (WAL-mode database)
+DATABASE_BACKEND = os.getenv('DATABASE_BACKEND', 'json').lower()
+DATABASE_FILE = os.getenv('DATABASE_FILE', 'users.db' if DATABASE_BACKEND == 'sqlite' else 'users.json')
+# JSON and journal backends: write changes at most once per this many seconds (0 writes on every change)
+DATABASE_FLUSH_INTERVAL = float(os.getenv('DATABASE_FLUSH_INTERVAL', '0.5'))
+# Journal backend: write a fresh snapshot once the journal grows past this many bytes
+DATABASE_SNAPSHOT_BYTES = int(os.getenv('DATABASE_SNAPSHOT_BYTES', str(4 * 1024 * 1024)))
+
+# Trakt.tv API URLs (override to point the bot at fake_trakt.py)
+TRAKT_BASE_URL = os.getenv('TRAKT_BASE_URL', 'https://api.trakt.tv').rstrip('/')
+TRAKT_AUTH_URL = os.getenv('TRAKT_AUTH_URL', 'https://trakt.tv/oauth').rstrip('/')
+
+# OAuth token refresh: refresh tokens expiring within this many seconds, checked every sweep
+TOKEN_REFRESH_MARGIN = float(os.getenv('TOKEN_REFRESH_MARGIN', str(24 * 60 * 60)))
+TOKEN_SWEEP_MINUTES = float(os.getenv('TOKEN_SWEEP_MINUTES', '60'))
+
+# HTTP connection pool settings
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '20'))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '30'))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+
+# Trakt.tv rate limits (requests per period in seconds)
+TRAKT_GET_LIMIT = int(os.getenv('TRAKT_GET_LIMIT', '1000'))
+TRAKT_GET_PERIOD = float(os.getenv('TRAKT_GET_PERIOD', '300'))
+TRAKT_POST_LIMIT = int(os.getenv('TRAKT_POST_LIMIT', '1'))
+TRAKT_POST_PERIOD = float(os.getenv('TRAKT_POST_PERIOD', '1'))
+TRAKT_RATE_LIMIT_RETRIES = int(os.getenv('TRAKT_RATE_LIMIT_RETRIES', '3'))
+
+# Trakt.tv retries and per-endpoint circuit breakers (attempts include the first try)
+TRAKT_REQUEST_TIMEOUT = float(os.getenv('TRAKT_REQUEST_TIMEOUT', '10'))
+TRAKT_READ_RETRIES = int(os.getenv('TRAKT_READ_RETRIES', '3'))
+TRAKT_SYNC_RETRIES = int(os.getenv('TRAKT_SYNC_RETRIES', '3'))
+TRAKT_RETRY_BASE_DELAY = float(os.getenv('TRAKT_RETRY_BASE_DELAY', '0.5'))
+TRAKT_RETRY_MAX_DELAY = float(os.getenv('TRAKT_RETRY_MAX_DELAY', '8'))
+TRAKT_BREAKER_THRESHOLD = int(os.getenv('TRAKT_BREAKER_THRESHOLD', '5'))
+TRAKT_BREAKER_RESET = float(os.getenv('TRAKT_BREAKER_RESET', '30'))
+
+# Trakt.tv response cache (TTLs in seconds)
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '2048'))
+CACHE_TTL_METADATA = float(os.getenv('CACHE_TTL_METADATA', str(6 * 60 * 60)))
+CACHE_TTL_SEARCH = float(os.getenv('CACHE_TTL_SEARCH', str(10 * 60)))
+CACHE_TTL_LISTS = float(os.getenv('CACHE_TTL_LISTS', str(60 * 60)))
+
+# Per-user write queue: wait this long for more watch/watchlist writes before sending them together
+WRITE_QUEUE_DELAY = float(os.getenv('WRITE_QUEUE_DELAY', '0.5'))
+WRITE_QUEUE_MAX_WAIT = float(os.getenv('WRITE_QUEUE_MAX_WAIT', '2'))
+WRITE_QUEUE_MAX_ITEMS = int(os.getenv('WRITE_QUEUE_MAX_ITEMS', '100'))
+
+# History import/export jobs
+TRANSFER_DIR = os.getenv('TRANSFER_DIR', 'transfers')
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', str(50 * 1024 * 1024)))
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '100'))
+IMPORT_LOOKUP_CONCURRENCY = int(os.getenv('IMPORT_LOOKUP_CONCURRENCY', '4'))
+TRANSFER_PROGRESS_INTERVAL = float(os.getenv('TRANSFER_PROGRESS_INTERVAL', '3'))
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '100'))
+EXPORT_MAX_BYTES = int(os.getenv('EXPORT_MAX_BYTES', str(25 * 1024 * 1024)))
+
+# Incremental sync against /sync/last_activities
+SYNC_INTERVAL_MINUTES = float(os.getenv('SYNC_INTERVAL_MINUTES', '15'))
+SYNC_HISTORY_LIMIT = int(os.getenv('SYNC_HISTORY_LIMIT', '500'))
+
+# Metadata hydration (parallel show/movie lookups for fields a list call lacked)
+METADATA_CONCURRENCY = int(os.getenv('METADATA_CONCURRENCY', '8'))
+
+# Poster resolution through TMDB (optional; posters are skipped without a key)
+TMDB_API_KEY = os.getenv('TMDB_API_KEY')
+IMAGE_CACHE_FILE = os.getenv('IMAGE_CACHE_FILE', 'images.json')
+IMAGE_BATCH_SIZE = int(os.getenv('IMAGE_BATCH_SIZE', '20'))
+IMAGE_BATCH_DELAY = float(os.getenv('IMAGE_BATCH_DELAY', '0.5'))
+IMAGE_REQUEST_TIMEOUT = float(os.getenv('IMAGE_REQUEST_TIMEOUT', '5'))
+# Seconds before an ID TMDB didn't know, or failed to answer for, is looked up again
+IMAGE_RETRY_AFTER = float(os.getenv('IMAGE_RETRY_AFTER', '600'))
+
+# Prometheus metrics exporter (set METRICS_PORT=0 to disable)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
 
 # Required for validation
 REQUIRED_VARS = [
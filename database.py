@@ -1,12 +1,36 @@
+import asyncio
+import contextvars
+import functools
 import json
 import os
-from typing import Dict, Any, Optional, List
+import threading
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from datetime import datetime
+import config
+from records import User, Reminder, ArenaParticipant, ArenaTeam, encode_record
 
 class Database:
-    def __init__(self, db_file: str = 'users.json'):
+    """User data kept in memory and persisted to a JSON file.
+
+    With a flush interval set (the default), mutations only mark the data
+    dirty; a background task writes it at most once per interval, so a
+    burst of changes costs one write. The file is written in a worker
+    thread via a temp file and rename, so a crash never leaves it half
+    written. Outside a running event loop, or with an interval of 0,
+    every mutation is written immediately.
+    """
+
+    def __init__(self, db_file: str = 'users.json', flush_interval: Optional[float] = None):
         self.db_file = db_file
+        self.flush_interval = flush_interval if flush_interval is not None else config.DATABASE_FLUSH_INTERVAL
         self.data = self._load_data()
+        self._load_records()
+        self._build_indexes()
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock = threading.Lock()
+        self._serialized = 0
+        self._written = 0
     
     def _load_data(self) -> Dict[str, Any]:
         """Load data from JSON file."""
@@ -20,6 +44,8 @@ class Database:
             'users': {},
             'reminders': {},
             'settings': {},
+            'sync': {},
+            'jobs': {},
             'arena': {
                 'participants': {},
                 'teams': [],
@@ -30,42 +56,195 @@ class Database:
             }
         }
     
-    def _save_data(self):
-        """Save data to JSON file."""
+    def _load_records(self):
+        """Replace the loaded JSON objects with slotted records."""
+        self.data['users'] = {discord_id: User.from_json(user, discord_id)
+                              for discord_id, user in self.data.get('users', {}).items()}
+        self.data['reminders'] = {discord_id: {show_id: Reminder.from_json(reminder)
+                                               for show_id, reminder in reminders.items()}
+                                  for discord_id, reminders in self.data.get('reminders', {}).items()}
+        arena = self.data.get('arena')
+        if arena is not None:
+            arena['participants'] = {discord_id: ArenaParticipant.from_json(participant, discord_id)
+                                     for discord_id, participant in arena.get('participants', {}).items()}
+            arena['teams'] = [ArenaTeam.from_json(team) for team in arena.get('teams', [])]
+    
+    def _build_indexes(self):
+        """Rebuild the in-memory lookups derived from self.data."""
+        # Insertion-ordered set of public users' Discord IDs
+        self._public_ids = {discord_id: None for discord_id, user in self.data['users'].items()
+                            if user.get('is_public', False)}
+        self._trakt_usernames: Dict[str, str] = {}
+        for discord_id, user in self.data['users'].items():
+            self._trakt_usernames.setdefault(user.get('trakt_username'), discord_id)
+        self._build_team_index()
+        self._participant_list = None
+    
+    def _build_team_index(self):
+        """Map each arena team name to its members' Discord IDs, in join order."""
+        self._team_members: Dict[str, Dict[str, None]] = {}
+        for discord_id, participant in self.data.get('arena', {}).get('participants', {}).items():
+            if participant.get('team'):
+                self._team_members.setdefault(participant['team'], {})[discord_id] = None
+    
+    def _set_participant_team(self, discord_id: str, team_name: Optional[str]):
+        """Assign a participant to a team, keeping the team index in step."""
+        participant = self.data['arena']['participants'][discord_id]
+        old_team = participant.get('team')
+        if old_team and old_team in self._team_members:
+            self._team_members[old_team].pop(discord_id, None)
+        participant.team = team_name
+        if team_name:
+            self._team_members.setdefault(team_name, {})[discord_id] = None
+    
+    def reload(self) -> bool:
+        """Re-read the file, e.g. after it was edited by hand. Unsaved changes are dropped."""
+        try:
+            if self._flush_task is not None and not self._flush_task.done():
+                self._flush_task.cancel()
+            self._dirty = False
+            self.data = self._load_data()
+            self._load_records()
+            self._build_indexes()
+            return True
+        except Exception as e:
+            print(f"Error reloading data: {e}")
+            return False
+    
+    def _save_data(self, *paths):
+        """Persist a mutation: now, or with the next write-behind flush.
+
+        paths name the parts of self.data the mutation changed, e.g.
+        ('users', discord_id); the JSON file is always rewritten whole,
+        but journaling storage only records those parts.
+        """
+        self._schedule_flush()
+    
+    def _schedule_flush(self):
+        if self.flush_interval <= 0:
+            self.flush()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            # Flush outside the caller's context so no interaction deadline applies
+            self._flush_task = loop.create_task(self._flush_later(), context=contextvars.Context())
+    
+    async def _flush_later(self):
+        """Write pending changes once per flush interval for as long as they keep coming."""
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            if not self._dirty:
+                break
+            # Capture on the loop, where the data is mutated; only the I/O is off-loaded
+            write = self._take_write()
+            try:
+                await asyncio.to_thread(write)
+            except Exception as e:
+                self._dirty = True
+                print(f"Error saving data: {e}")
+    
+    def _take_write(self) -> Callable[[], None]:
+        """Capture the pending changes and return the blocking call that writes them."""
+        return functools.partial(self._write_file, *self._serialize())
+    
+    def _serialize(self):
+        self._dirty = False
+        self._serialized += 1
+        # Compact output keeps json on its C encoder, which indent=2 would disable
+        return self._serialized, json.dumps(self.data, default=encode_record)
+    
+    def _write_file(self, seq: int, text: str):
+        """Atomically replace the file, unless a newer snapshot was already written."""
+        with self._write_lock:
+            if seq <= self._written:
+                return
+            tmp_file = f"{self.db_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.db_file)
+            self._written = seq
+    
+    def flush(self):
+        """Write any pending changes to the file now."""
         try:
-            with open(self.db_file, 'w') as f:
-                json.dump(self.data, f, indent=2, default=str)
+            self._take_write()()
         except Exception as e:
+            self._dirty = True
             print(f"Error saving data: {e}")
     
+    def close(self):
+        """Stop the write-behind task and write any pending changes.
+
+        Cancelling the task doesn't stop a write it already handed to a
+        thread, and that write may still fail, so unless everything taken
+        has been written, a final snapshot is written after it (the write
+        lock makes this wait for the in-flight write).
+        """
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._dirty or self._written < self._serialized:
+            self.flush()
+    
     def add_user(self, discord_id: str, trakt_username: str, access_token: str, 
-                 refresh_token: str, is_public: bool = False) -> bool:
-        """Add or update user data."""
+                 refresh_token: str, is_public: bool = False, expires_in: Optional[int] = None,
+                 created_at: Optional[int] = None) -> bool:
+        """Add or update user data.
+
+        expires_in and created_at come from Trakt's token response and
+        record when the access token expires.
+        """
         try:
-            self.data['users'][discord_id] = {
-                'trakt_username': trakt_username,
-                'access_token': access_token,
-                'refresh_token': refresh_token,
-                'is_public': is_public,
-                'connected_at': datetime.now().isoformat()
-            }
-            self._save_data()
+            previous = self.data['users'].get(discord_id)
+            if previous and self._trakt_usernames.get(previous.get('trakt_username')) == discord_id:
+                del self._trakt_usernames[previous.get('trakt_username')]
+            self.data['users'][discord_id] = User(
+                discord_id=discord_id,
+                trakt_username=trakt_username,
+                access_token=access_token,
+                refresh_token=refresh_token,
+                expires_in=expires_in,
+                created_at=created_at,
+                is_public=is_public,
+                connected_at=datetime.now().isoformat()
+            )
+            if is_public:
+                self._public_ids.setdefault(discord_id, None)
+            else:
+                self._public_ids.pop(discord_id, None)
+            self._trakt_usernames.setdefault(trakt_username, discord_id)
+            self._save_data(('users', discord_id))
             return True
         except Exception as e:
             print(f"Error adding user: {e}")
             return False
     
-    def get_user(self, discord_id: str) -> Optional[Dict[str, Any]]:
+    def get_user(self, discord_id: str) -> Optional[User]:
         """Get user data by Discord ID."""
         return self.data['users'].get(discord_id)
     
-    def update_user_tokens(self, discord_id: str, access_token: str, refresh_token: str) -> bool:
-        """Update user's access and refresh tokens."""
+    def get_all_users(self) -> Dict[str, User]:
+        """Get every connected user's data, keyed by Discord ID."""
+        return self.data['users']
+    
+    def update_user_tokens(self, discord_id: str, access_token: str, refresh_token: str,
+                           expires_in: Optional[int] = None, created_at: Optional[int] = None) -> bool:
+        """Update user's access and refresh tokens and when they expire."""
         try:
-            if discord_id in self.data['users']:
-                self.data['users'][discord_id]['access_token'] = access_token
-                self.data['users'][discord_id]['refresh_token'] = refresh_token
-                self._save_data()
+            user = self.data['users'].get(discord_id)
+            if user:
+                user.access_token = access_token
+                user.refresh_token = refresh_token
+                user.expires_in = expires_in
+                user.created_at = created_at
+                self._save_data(('users', discord_id))
                 return True
         except Exception as e:
             print(f"Error updating tokens: {e}")
@@ -74,35 +253,28 @@ class Database:
     def set_user_privacy(self, discord_id: str, is_public: bool) -> bool:
         """Set user's privacy setting."""
         try:
-            if discord_id in self.data['users']:
-                self.data['users'][discord_id]['is_public'] = is_public
-                self._save_data()
+            user = self.data['users'].get(discord_id)
+            if user:
+                user.is_public = is_public
+                if is_public:
+                    self._public_ids.setdefault(discord_id, None)
+                else:
+                    self._public_ids.pop(discord_id, None)
+                self._save_data(('users', discord_id))
                 return True
         except Exception as e:
             print(f"Error setting privacy: {e}")
         return False
     
-    def get_public_users(self) -> List[Dict[str, Any]]:
+    def get_public_users(self) -> List[User]:
         """Get all users with public profiles."""
-        data = self._load_data()
-        public_users = []
-        
-        for user_id, user_data in data['users'].items():
-            if user_data.get('is_public', False):
-                public_users.append({
-                    'discord_id': user_id,
-                    'trakt_username': user_data['trakt_username'],
-                    'access_token': user_data.get('access_token', ''),
-                    'connected_at': user_data.get('connected_at', '')
-                })
-        
-        return public_users
+        users = self.data['users']
+        return [users[user_id] for user_id in self._public_ids]
     
     def get_user_count(self) -> Dict[str, int]:
         """Get user statistics."""
-        data = self._load_data()
-        total_users = len(data['users'])
-        public_users = len([u for u in data['users'].values() if u.get('is_public', False)])
+        total_users = len(self.data['users'])
+        public_users = len(self._public_ids)
         
         return {
             'total': total_users,
@@ -116,13 +288,13 @@ class Database:
             if discord_id not in self.data['reminders']:
                 self.data['reminders'][discord_id] = {}
             
-            self.data['reminders'][discord_id][show_id] = {
-                'show_name': show_name,
-                'hours_before': hours_before,
-                'message': custom_message,
-                'added_at': datetime.now().isoformat()
-            }
-            self._save_data()
+            self.data['reminders'][discord_id][show_id] = Reminder(
+                show_name=show_name,
+                hours_before=hours_before,
+                message=custom_message,
+                added_at=datetime.now().isoformat()
+            )
+            self._save_data(('reminders', discord_id))
             return True
         except Exception as e:
             print(f"Error adding reminder: {e}")
@@ -136,26 +308,77 @@ class Database:
                 del self.data['reminders'][discord_id][show_id]
                 if not self.data['reminders'][discord_id]:
                     del self.data['reminders'][discord_id]
-                self._save_data()
+                self._save_data(('reminders', discord_id))
                 return True
         except Exception as e:
             print(f"Error removing reminder: {e}")
         return False
     
-    def get_user_reminders(self, discord_id: str) -> Dict[str, Dict[str, Any]]:
+    def get_user_reminders(self, discord_id: str) -> Dict[str, Reminder]:
         """Get all reminders for a user."""
         return self.data['reminders'].get(discord_id, {})
     
-    def get_all_reminders(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    def get_all_reminders(self) -> Dict[str, Dict[str, Reminder]]:
         """Get all reminders for all users."""
         return self.data['reminders']
     
     def find_user_by_trakt_username(self, trakt_username: str) -> Optional[str]:
         """Find Discord ID by Trakt username."""
-        for discord_id, user_data in self.data['users'].items():
-            if user_data.get('trakt_username') == trakt_username:
-                return discord_id
-        return None
+        return self._trakt_usernames.get(trakt_username)
+    
+    def get_sync_state(self, discord_id: str) -> Optional[Dict[str, Any]]:
+        """Get the incremental sync cursor and synced data for a user."""
+        return self.data.get('sync', {}).get(discord_id)
+    
+    def set_sync_state(self, discord_id: str, state: Dict[str, Any]) -> bool:
+        """Store the incremental sync cursor and synced data for a user."""
+        try:
+            self.data.setdefault('sync', {})[discord_id] = state
+            self._save_data(('sync', discord_id))
+            return True
+        except Exception as e:
+            print(f"Error saving sync state: {e}")
+            return False
+    
+    def clear_sync_state(self, discord_id: str) -> bool:
+        """Forget a user's sync state so the next sync starts from scratch."""
+        try:
+            if discord_id in self.data.get('sync', {}):
+                del self.data['sync'][discord_id]
+                self._save_data(('sync', discord_id))
+                return True
+        except Exception as e:
+            print(f"Error clearing sync state: {e}")
+        return False
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the saved state of a background job (import/export)."""
+        return self.data.get('jobs', {}).get(job_id)
+    
+    def get_jobs(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all saved background jobs, optionally only those of one kind."""
+        return [job for job in self.data.get('jobs', {}).values() if kind is None or job.get('kind') == kind]
+    
+    def set_job(self, job_id: str, state: Dict[str, Any]) -> bool:
+        """Save a background job's progress so it can resume after a restart."""
+        try:
+            self.data.setdefault('jobs', {})[job_id] = state
+            self._save_data(('jobs', job_id))
+            return True
+        except Exception as e:
+            print(f"Error saving job state: {e}")
+            return False
+    
+    def clear_job(self, job_id: str) -> bool:
+        """Forget a finished background job."""
+        try:
+            if job_id in self.data.get('jobs', {}):
+                del self.data['jobs'][job_id]
+                self._save_data(('jobs', job_id))
+                return True
+        except Exception as e:
+            print(f"Error clearing job state: {e}")
+        return False
     
     def get_user_by_mention(self, mention: str) -> Optional[Dict[str, Any]]:
         """Get user data by Discord mention (@user)."""
@@ -190,32 +413,38 @@ class Database:
                 }
             
             if discord_id not in self.data['arena']['participants']:
-                self.data['arena']['participants'][discord_id] = {
-                    'username': trakt_username,
-                    'points': 0,
-                    'challenges_won': 0,
-                    'team': None,
-                    'joined_at': datetime.now().isoformat()
-                }
-                self._save_data()
+                self.data['arena']['participants'][discord_id] = ArenaParticipant(
+                    discord_id=discord_id,
+                    username=trakt_username,
+                    joined_at=datetime.now().isoformat()
+                )
+                self._participant_list = None
+                self._save_data(('arena', 'participants', discord_id))
                 return True
         except Exception as e:
             print(f"Error adding arena participant: {e}")
         return False
     
-    def get_arena_participants(self) -> List[Dict[str, Any]]:
-        """Get all arena participants."""
-        arena = self.data.get('arena', {})
-        participants = []
-        
-        for discord_id, participant_data in arena.get('participants', {}).items():
-            participant_info = participant_data.copy()
-            participant_info['discord_id'] = discord_id
-            participants.append(participant_info)
-        
-        return participants
-    
-    def create_arena_teams(self, team_size: int) -> List[Dict[str, Any]]:
+    def get_arena_participants(self) -> Tuple[ArenaParticipant, ...]:
+        """Get all arena participants.
+
+        The tuple is cached until someone joins or leaves, so repeated
+        calls in a handler don't allocate.
+        """
+        if self._participant_list is None:
+            self._participant_list = tuple(self.data.get('arena', {}).get('participants', {}).values())
+        return self._participant_list
+    
+    def get_arena_participant(self, discord_id: str) -> Optional[ArenaParticipant]:
+        """Get one arena participant by Discord ID."""
+        return self.data.get('arena', {}).get('participants', {}).get(discord_id)
+    
+    def get_team_members(self, team_name: str) -> List[ArenaParticipant]:
+        """Get the participants assigned to a team."""
+        participants = self.data['arena']['participants']
+        return [participants[discord_id] for discord_id in self._team_members.get(team_name, {})]
+    
+    def create_arena_teams(self, team_size: int) -> List[ArenaTeam]:
         """Create balanced teams from participants."""
         try:
             participants = list(self.data['arena']['participants'].keys())
@@ -226,25 +455,26 @@ class Database:
                 team_members = participants[i:i + team_size]
                 team_name = f"Team {len(teams) + 1}"
                 
-                team = {
-                    'name': team_name,
-                    'members': [self.data['arena']['participants'][p]['username'] for p in team_members],
-                    'points': 0
-                }
+                team = ArenaTeam(
+                    name=team_name,
+                    members=[self.data['arena']['participants'][p].username for p in team_members],
+                    points=0
+                )
                 teams.append(team)
                 
                 # Update participant team assignments
                 for member_id in team_members:
-                    self.data['arena']['participants'][member_id]['team'] = team_name
+                    self.data['arena']['participants'][member_id].team = team_name
             
             self.data['arena']['teams'] = teams
-            self._save_data()
+            self._build_team_index()
+            self._save_data(('arena', 'participants'), ('arena', 'teams'))
             return teams
         except Exception as e:
             print(f"Error creating teams: {e}")
             return []
     
-    def get_arena_teams(self) -> List[Dict[str, Any]]:
+    def get_arena_teams(self) -> List[ArenaTeam]:
         """Get current arena teams."""
         arena = self.data.get('arena', {})
         return arena.get('teams', [])
@@ -257,20 +487,20 @@ class Database:
                 return "No Team"
             
             # Find smallest team
-            smallest_team = min(teams, key=lambda t: len(t['members']))
-            team_name = smallest_team['name']
+            smallest_team = min(teams, key=lambda t: len(t.members))
+            team_name = smallest_team.name
             
             # Add to team
-            smallest_team['members'].append(trakt_username)
-            self.data['arena']['participants'][discord_id]['team'] = team_name
+            smallest_team.members.append(trakt_username)
+            self._set_participant_team(discord_id, team_name)
             
-            self._save_data()
+            self._save_data(('arena', 'teams'), ('arena', 'participants', discord_id))
             return team_name
         except Exception as e:
             print(f"Error balancing teams: {e}")
             return "No Team"
     
-    def rebalance_all_arena_teams(self) -> List[Dict[str, Any]]:
+    def rebalance_all_arena_teams(self) -> List[ArenaTeam]:
         """Rebalance all teams to be roughly equal."""
         try:
             participants = list(self.data['arena']['participants'].items())
@@ -281,17 +511,18 @@ class Database:
             
             # Clear current teams
             for team in teams:
-                team['members'] = []
+                team.members = []
             
             # Redistribute participants
             for i, (discord_id, participant_data) in enumerate(participants):
                 team_index = i % len(teams)
-                team_name = teams[team_index]['name']
+                team_name = teams[team_index].name
                 
-                teams[team_index]['members'].append(participant_data['username'])
-                self.data['arena']['participants'][discord_id]['team'] = team_name
+                teams[team_index].members.append(participant_data.username)
+                participant_data.team = team_name
             
-            self._save_data()
+            self._build_team_index()
+            self._save_data(('arena', 'participants'), ('arena', 'teams'))
             return teams
         except Exception as e:
             print(f"Error rebalancing teams: {e}")
@@ -304,7 +535,7 @@ class Database:
                 self.data['arena'] = {}
             
             self.data['arena']['current_challenge'] = challenge
-            self._save_data()
+            self._save_data(('arena', 'current_challenge'))
             return True
         except Exception as e:
             print(f"Error setting challenge: {e}")
@@ -322,7 +553,7 @@ class Database:
                 self.data['arena'] = {}
             
             self.data['arena']['active'] = active
-            self._save_data()
+            self._save_data(('arena', 'active'))
             return True
         except Exception as e:
             print(f"Error setting arena status: {e}")
@@ -332,8 +563,8 @@ class Database:
         """Add points to participant."""
         try:
             if discord_id in self.data['arena']['participants']:
-                self.data['arena']['participants'][discord_id]['points'] += points
-                self._save_data()
+                self.data['arena']['participants'][discord_id].points += points
+                self._save_data(('arena', 'participants', discord_id))
                 return True
         except Exception as e:
             print(f"Error adding points: {e}")
@@ -352,22 +583,18 @@ class Database:
                 
                 # Check if already completed this specific challenge instance
                 participant = self.data['arena']['participants'][discord_id]
-                completed_challenges = participant.get('completed_challenges', [])
-                
-                if challenge_id in completed_challenges:
+                if challenge_id in participant.completed_challenges:
                     return False  # Already completed
                 
                 # Mark as completed
-                if 'completed_challenges' not in participant:
-                    participant['completed_challenges'] = []
-                participant['completed_challenges'].append(challenge_id)
+                participant.completed_challenges.append(challenge_id)
                 
                 # Add wins and points
-                participant['challenges_won'] += 1
+                participant.challenges_won += 1
                 points = challenge.get('points', 10)
-                participant['points'] += points
+                participant.points += points
                 
-                self._save_data()
+                self._save_data(('arena', 'participants', discord_id))
                 return True
         except Exception as e:
             print(f"Error completing challenge: {e}")
@@ -399,7 +626,9 @@ class Database:
                 'active': False,
                 'week_start': datetime.now().isoformat()
             }
-            self._save_data()
+            self._team_members = {}
+            self._participant_list = None
+            self._save_data(('arena',))
             return True
         except Exception as e:
             print(f"Error resetting arena: {e}")
@@ -417,7 +646,7 @@ class Database:
             if 'arena' not in self.data:
                 self.data['arena'] = {}
             self.data['arena']['vote_state'] = vote_state
-            self._save_data()
+            self._save_data(('arena', 'vote_state'))
             return True
         except Exception as e:
             print(f"Error saving vote state: {e}")
@@ -428,7 +657,7 @@ class Database:
         try:
             if 'arena' in self.data:
                 self.data['arena']['vote_state'] = {}
-                self._save_data()
+                self._save_data(('arena', 'vote_state'))
                 return True
         except Exception as e:
             print(f"Error clearing vote state: {e}")
@@ -442,16 +671,18 @@ class Database:
             
             # Remove from participants
             if discord_id in arena.get('participants', {}):
-                username = arena['participants'][discord_id]['username']
+                username = arena['participants'][discord_id].username
+                self._set_participant_team(discord_id, None)
                 del arena['participants'][discord_id]
+                self._participant_list = None
                 
                 # Remove from teams
                 teams = arena.get('teams', [])
                 for team in teams:
-                    if username in team['members']:
-                        team['members'].remove(username)
+                    if username in team.members:
+                        team.members.remove(username)
                 
-                self._save_data()
+                self._save_data(('arena', 'participants', discord_id), ('arena', 'teams'))
                 return True
         except Exception as e:
             print(f"Error leaving arena: {e}")
@@ -476,9 +707,9 @@ class Database:
             
             # Clear old completed challenges if too many
             for participant in arena.get('participants', {}).values():
-                completed = participant.get('completed_challenges', [])
+                completed = participant.completed_challenges
                 if len(completed) > 50:  # Keep only last 50
-                    participant['completed_challenges'] = completed[-50:]
+                    participant.completed_challenges = completed[-50:]
             
             # Check if weekly reset is needed
             from datetime import datetime, timedelta
@@ -489,7 +720,7 @@ class Database:
                     # Auto weekly reset
                     return self.reset_arena()
             
-            self._save_data()
+            self._save_data(('arena', 'participants'))
             return True
         except Exception as e:
             print(f"Error cleaning up arena: {e}")
@@ -523,4 +754,19 @@ class Database:
             return completions
         except Exception as e:
             print(f"Error getting challenge completions: {e}")
-            return [] 
\ No newline at end of file
+            return []
+
+
+def open_database(backend: Optional[str] = None, db_file: Optional[str] = None):
+    """Open the configured storage backend ('json', 'journal' or 'sqlite')."""
+    backend = backend or config.DATABASE_BACKEND
+    db_file = db_file or config.DATABASE_FILE
+    if backend == 'sqlite':
+        from sqlite_database import SQLiteDatabase
+        return SQLiteDatabase(db_file)
+    if backend == 'journal':
+        from journal_database import JournalDatabase
+        return JournalDatabase(db_file)
+    if backend != 'json':
+        raise ValueError(f"Unknown DATABASE_BACKEND {backend!r}; expected 'json', 'journal' or 'sqlite'")
+    return Database(db_file)
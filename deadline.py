@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterable, List, Optional, Tuple
+import discord
+from discord import app_commands
+import config
+
+# Monotonic time by which the current interaction should have answered
+_deadline: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised when a call would start or wait after the interaction's deadline."""
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None when there is no deadline."""
+    deadline_at = _deadline.get()
+    if deadline_at is None:
+        return None
+    return deadline_at - time.monotonic()
+
+def current() -> Optional[float]:
+    """Monotonic time of the current deadline, or None when there is no deadline."""
+    return _deadline.get()
+
+def set_in(context: contextvars.Context, deadline_at: Optional[float]):
+    """Set the deadline seen by code running in context (which must not be running right now)."""
+    context.run(_deadline.set, deadline_at)
+
+def extend_in(context: contextvars.Context, deadline_at: Optional[float]):
+    """Push the deadline seen in context out to deadline_at if that is later (None is no deadline)."""
+    current_at = context.get(_deadline)
+    if current_at is not None and (deadline_at is None or deadline_at > current_at):
+        set_in(context, deadline_at)
+
+def check():
+    """Raise DeadlineExceeded if the current budget is used up."""
+    budget = remaining()
+    if budget is not None and budget <= 0:
+        raise DeadlineExceeded("Interaction deadline exceeded")
+
+def cap(timeout: float) -> float:
+    """Shorten a timeout so it ends no later than the current deadline."""
+    budget = remaining()
+    if budget is None:
+        return timeout
+    if budget <= 0:
+        raise DeadlineExceeded("Interaction deadline exceeded")
+    return min(timeout, budget)
+
+@contextmanager
+def deadline(seconds: float):
+    """Run the block with a budget of seconds, or the caller's budget if that is tighter."""
+    deadline_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline_at = min(deadline_at, current)
+    token = _deadline.set(deadline_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+async def gather_partial(aws: Iterable[Awaitable[Any]]) -> Tuple[List[Any], int]:
+    """Run awaitables concurrently until they finish or the budget runs out.
+
+    Returns the results in order, with None for anything that failed or
+    didn't finish in time, and how many finished before the deadline.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    if not tasks:
+        return [], 0
+
+    budget = remaining()
+    done, pending = await asyncio.wait(tasks, timeout=None if budget is None else max(0.0, budget))
+    for task in pending:
+        task.cancel()
+
+    results = []
+    for task in tasks:
+        if task in done and not task.cancelled() and task.exception() is None:
+            results.append(task.result())
+        else:
+            results.append(None)
+    return results, len(done)
+
+class DeadlineCommandTree(app_commands.CommandTree):
+    """Command tree that gives every slash command a deadline budget.
+
+    The budget is stored in a context variable, so every Trakt call made
+    while handling the interaction, including tasks it spawns, sees it.
+    Autocomplete gets a budget that fits Discord's 3 second response window.
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.autocomplete:
+            budget = config.AUTOCOMPLETE_DEADLINE
+        else:
+            budget = config.INTERACTION_DEADLINE
+        _deadline.set(time.monotonic() + budget)
+        return True
@@ -0,0 +1,641 @@
+"""Local stand-in for the Trakt API, for tests and benchmarks.
+
+Serves the endpoints AsyncTraktAPI uses from generated fixture data, with
+optional latency, jitter, 429/5xx injection and Trakt-style pagination.
+Point the bot at it with TRAKT_BASE_URL and TRAKT_AUTH_URL, e.g.:
+
+    python fake_trakt.py --port 8765 --users 100 --latency 0.05
+    TRAKT_BASE_URL=http://127.0.0.1:8765 TRAKT_AUTH_URL=http://127.0.0.1:8765/oauth python main.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Any
+from aiohttp import web
+
+GENRES = ['action', 'adventure', 'animation', 'comedy', 'crime', 'documentary', 'drama',
+          'fantasy', 'horror', 'mystery', 'romance', 'science-fiction', 'thriller']
+WORDS = ['Last', 'Dark', 'Silent', 'Broken', 'Golden', 'Hidden', 'Lost', 'Crimson', 'Endless',
+         'Wild', 'Frozen', 'Secret', 'Empire', 'River', 'City', 'Signal', 'Garden', 'Harbor',
+         'Machine', 'Kingdom', 'Orbit', 'Shadow', 'Station', 'Valley']
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _basic(content: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields Trakt returns without extended=full."""
+    return {key: content[key] for key in ('title', 'year', 'ids') if key in content}
+
+def build_fixtures(users: int = 10, shows: int = 50, movies: int = 50,
+                   history_per_user: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """Generate deterministic shows, movies and per-user activity."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def title(i: int) -> str:
+        return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+
+    show_list = []
+    for i in range(1, shows + 1):
+        trakt_id = 1000 + i
+        seasons = []
+        for season_number in range(1, rng.randint(1, 4) + 1):
+            episodes = []
+            for number in range(1, rng.randint(6, 10) + 1):
+                aired = now - timedelta(days=rng.randint(-21, 700))
+                episodes.append({
+                    'season': season_number,
+                    'number': number,
+                    'title': f"Episode {number}",
+                    'ids': {'trakt': trakt_id * 1000 + season_number * 100 + number},
+                    'overview': f"Season {season_number}, episode {number}.",
+                    'rating': round(rng.uniform(5, 9.5), 1),
+                    'runtime': rng.choice([22, 45, 60]),
+                    'first_aired': _timestamp(aired)
+                })
+            seasons.append({'number': season_number, 'ids': {'trakt': trakt_id * 10 + season_number},
+                            'episode_count': len(episodes), 'episodes': episodes})
+        show_list.append({
+            'title': title(i),
+            'year': rng.randint(1990, 2026),
+            'ids': {'trakt': trakt_id, 'slug': f"show-{trakt_id}", 'tmdb': 50000 + i, 'imdb': f"tt{1000000 + i}"},
+            'overview': 'A generated show used by the local Trakt fake.',
+            'genres': rng.sample(GENRES, 2),
+            'rating': round(rng.uniform(5, 9.5), 1),
+            'votes': rng.randint(10, 50000),
+            'runtime': rng.choice([22, 45, 60]),
+            'network': rng.choice(['HBO', 'Netflix', 'BBC', 'AMC']),
+            'status': rng.choice(['returning series', 'ended']),
+            'language': rng.choice(['en', 'en', 'ja', 'ko', 'fr']),
+            'seasons': seasons
+        })
+
+    movie_list = []
+    for i in range(1, movies + 1):
+        trakt_id = 5000 + i
+        movie_list.append({
+            'title': title(i),
+            'year': rng.randint(1960, 2026),
+            'ids': {'trakt': trakt_id, 'slug': f"movie-{trakt_id}", 'tmdb': 90000 + i, 'imdb': f"tt{2000000 + i}"},
+            'overview': 'A generated movie used by the local Trakt fake.',
+            'genres': rng.sample(GENRES, 2),
+            'rating': round(rng.uniform(4, 9.5), 1),
+            'votes': rng.randint(10, 50000),
+            'runtime': rng.randint(75, 180),
+            'language': rng.choice(['en', 'en', 'ja', 'ko', 'fr'])
+        })
+
+    user_list = {}
+    history_id = 1
+    for i in range(1, users + 1):
+        username = f"user{i}"
+        history = []
+        watched_at = now
+        for _ in range(history_per_user):
+            watched_at -= timedelta(minutes=rng.randint(20, 60 * 48))
+            if rng.random() < 0.7:
+                show = rng.choice(show_list)
+                season = rng.choice(show['seasons'])
+                episode = rng.choice(season['episodes'])
+                history.append({'id': history_id, 'watched_at': _timestamp(watched_at), 'action': 'watch',
+                                'type': 'episode', 'show_id': show['ids']['trakt'], 'episode_id': episode['ids']['trakt']})
+            else:
+                movie = rng.choice(movie_list)
+                history.append({'id': history_id, 'watched_at': _timestamp(watched_at), 'action': 'watch',
+                                'type': 'movie', 'movie_id': movie['ids']['trakt']})
+            history_id += 1
+
+        watching = None
+        if rng.random() < 0.3:
+            show = rng.choice(show_list)
+            watching = {'type': 'episode', 'show_id': show['ids']['trakt'],
+                        'episode_id': show['seasons'][0]['episodes'][0]['ids']['trakt']}
+
+        user_list[username] = {
+            'username': username,
+            'token': f"token-{username}",
+            'refresh_token': f"refresh-{username}",
+            'history': history,
+            'watchlist': [{'type': 'movie', 'movie_id': m['ids']['trakt'], 'listed_at': _timestamp(now)}
+                          for m in rng.sample(movie_list, min(5, len(movie_list)))],
+            'ratings': [{'type': 'movie', 'movie_id': m['ids']['trakt'], 'rating': rng.randint(1, 10),
+                         'rated_at': _timestamp(now)} for m in rng.sample(movie_list, min(5, len(movie_list)))],
+            'watching': watching,
+            'activities': {'watched_at': _timestamp(now), 'watchlisted_at': _timestamp(now), 'rated_at': _timestamp(now)}
+        }
+
+    return {'shows': show_list, 'movies': movie_list, 'users': user_list, 'next_history_id': history_id}
+
+class FakeTrakt:
+    """aiohttp application that behaves like the parts of Trakt the bot uses."""
+
+    def __init__(self, fixtures: Optional[Dict[str, Any]] = None, latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit_rate: float = 0.0, error_rate: float = 0.0, retry_after: float = 1.0, seed: int = 0):
+        self.fixtures = fixtures or build_fixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._index()
+
+    def _index(self):
+        self.shows = {}
+        for show in self.fixtures['shows']:
+            self.shows[str(show['ids']['trakt'])] = show
+            self.shows[show['ids']['slug']] = show
+        self.movies = {}
+        for movie in self.fixtures['movies']:
+            self.movies[str(movie['ids']['trakt'])] = movie
+            self.movies[movie['ids']['slug']] = movie
+        self.episodes = {}
+        for show in self.fixtures['shows']:
+            for season in show['seasons']:
+                for episode in season['episodes']:
+                    self.episodes[episode['ids']['trakt']] = episode
+        self.tokens = {user['token']: user for user in self.fixtures['users'].values()}
+
+    # Serialization helpers
+
+    def _show(self, show: Dict[str, Any], extended: bool) -> Dict[str, Any]:
+        if extended:
+            return {key: value for key, value in show.items() if key != 'seasons'}
+        return _basic(show)
+
+    def _movie(self, movie: Dict[str, Any], extended: bool) -> Dict[str, Any]:
+        return dict(movie) if extended else _basic(movie)
+
+    def _episode(self, episode: Dict[str, Any], extended: bool) -> Dict[str, Any]:
+        if extended:
+            return dict(episode)
+        return {key: episode[key] for key in ('season', 'number', 'title', 'ids')}
+
+    def _history_item(self, entry: Dict[str, Any], extended: bool) -> Dict[str, Any]:
+        item = {key: entry[key] for key in ('id', 'watched_at', 'action', 'type')}
+        if entry['type'] == 'movie':
+            item['movie'] = self._movie(self.movies[str(entry['movie_id'])], extended)
+        else:
+            item['show'] = self._show(self.shows[str(entry['show_id'])], extended)
+            item['episode'] = self._episode(self.episodes[entry['episode_id']], extended)
+        return item
+
+    def _list_item(self, entry: Dict[str, Any], extended: bool, stamp_key: str) -> Dict[str, Any]:
+        item = {'type': entry['type'], stamp_key: entry.get(stamp_key)}
+        if 'rating' in entry:
+            item['rating'] = entry['rating']
+        if entry['type'] == 'movie':
+            item['movie'] = self._movie(self.movies[str(entry['movie_id'])], extended)
+        else:
+            item['show'] = self._show(self.shows[str(entry['show_id'])], extended)
+        return item
+
+    # Request plumbing
+
+    def _json(self, request: web.Request, data: Any, status: int = 200,
+              headers: Optional[Dict[str, str]] = None) -> web.Response:
+        body = json.dumps(data).encode()
+        headers = dict(headers or {})
+        if request.method == 'GET' and status == 200:
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            headers['ETag'] = etag
+            if request.headers.get('If-None-Match') == etag:
+                return web.Response(status=304, headers=headers)
+        return web.Response(body=body, status=status, headers=headers, content_type='application/json')
+
+    def _paginate(self, request: web.Request, items: List[Any], default_limit: Optional[int] = None) -> web.Response:
+        """Slice items the way Trakt does once page or limit is given."""
+        if 'page' not in request.query and 'limit' not in request.query and default_limit is None:
+            return self._json(request, items)
+        page = max(1, int(request.query.get('page', 1)))
+        limit = max(1, int(request.query.get('limit', default_limit or 10)))
+        page_count = max(1, -(-len(items) // limit))
+        headers = {
+            'X-Pagination-Page': str(page),
+            'X-Pagination-Limit': str(limit),
+            'X-Pagination-Page-Count': str(page_count),
+            'X-Pagination-Item-Count': str(len(items))
+        }
+        return self._json(request, items[(page - 1) * limit:page * limit], headers=headers)
+
+    def _user(self, request: web.Request, username: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if username and username != 'me':
+            return self.fixtures['users'].get(username)
+        auth = request.headers.get('Authorization', '')
+        return self.tokens.get(auth[len('Bearer '):]) if auth.startswith('Bearer ') else None
+
+    def _extended(self, request: web.Request) -> bool:
+        return request.query.get('extended') in ('full', 'episodes')
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler):
+        """Count requests and inject latency, rate limiting and server errors."""
+        key = f"{request.method} {request.match_info.route.resource.canonical if request.match_info.route.resource else request.path}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.rate_limit_rate and self.rng.random() < self.rate_limit_rate:
+            until = datetime.now(timezone.utc) + timedelta(seconds=self.retry_after)
+            return web.Response(status=429, headers={
+                'Retry-After': str(self.retry_after),
+                'X-Ratelimit': json.dumps({'name': 'UNAUTHED_API_GET_LIMIT', 'period': 300, 'limit': 1000,
+                                           'remaining': 0, 'until': _timestamp(until)})
+            })
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return web.Response(status=self.rng.choice([500, 502, 503]), text='Injected error')
+        return await handler(request)
+
+    # Handlers
+
+    async def oauth_token(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if data.get('grant_type') == 'refresh_token':
+            user = next((u for u in self.fixtures['users'].values() if u['refresh_token'] == data.get('refresh_token')), None)
+        else:
+            user = self.fixtures['users'].get(str(data.get('code', '')).replace('code-', '', 1))
+        if not user:
+            return self._json(request, {'error': 'invalid_grant'}, status=401)
+        return self._json(request, {'access_token': user['token'], 'refresh_token': user['refresh_token'],
+                                    'expires_in': 7776000, 'created_at': int(datetime.now().timestamp()),
+                                    'token_type': 'bearer', 'scope': 'public'})
+
+    async def users_me(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        return self._json(request, {'username': user['username'], 'private': False, 'name': user['username'],
+                                    'vip': False, 'ids': {'slug': user['username']}})
+
+    async def search(self, request: web.Request) -> web.Response:
+        query = request.query.get('query', '').lower()
+        types = request.match_info['types'].split(',')
+        extended = self._extended(request)
+        results = []
+        if 'show' in types:
+            results += [{'type': 'show', 'score': 100, 'show': self._show(s, extended)}
+                        for s in self.fixtures['shows'] if query in s['title'].lower()]
+        if 'movie' in types:
+            results += [{'type': 'movie', 'score': 100, 'movie': self._movie(m, extended)}
+                        for m in self.fixtures['movies'] if query in m['title'].lower()]
+        return self._paginate(request, results, default_limit=10)
+
+    async def popular(self, request: web.Request) -> web.Response:
+        kind = request.match_info['kind']
+        extended = self._extended(request)
+        if kind == 'shows':
+            items = [self._show(s, extended) for s in self.fixtures['shows']]
+        else:
+            items = [self._movie(m, extended) for m in self.fixtures['movies']]
+        return self._paginate(request, items, default_limit=10)
+
+    async def show_summary(self, request: web.Request) -> web.Response:
+        show = self.shows.get(request.match_info['id'])
+        if not show:
+            return web.Response(status=404)
+        return self._json(request, self._show(show, self._extended(request)))
+
+    async def movie_summary(self, request: web.Request) -> web.Response:
+        movie = self.movies.get(request.match_info['id'])
+        if not movie:
+            return web.Response(status=404)
+        return self._json(request, self._movie(movie, self._extended(request)))
+
+    async def show_seasons(self, request: web.Request) -> web.Response:
+        show = self.shows.get(request.match_info['id'])
+        if not show:
+            return web.Response(status=404)
+        with_episodes = request.query.get('extended') == 'episodes'
+        seasons = []
+        for season in show['seasons']:
+            data = {'number': season['number'], 'ids': season['ids']}
+            if with_episodes:
+                data['episodes'] = [self._episode(e, False) for e in season['episodes']]
+            seasons.append(data)
+        return self._json(request, seasons)
+
+    async def season_episodes(self, request: web.Request) -> web.Response:
+        show = self.shows.get(request.match_info['id'])
+        number = int(request.match_info['season'])
+        season = next((s for s in (show or {}).get('seasons', []) if s['number'] == number), None)
+        if not season:
+            return web.Response(status=404)
+        return self._json(request, [self._episode(e, self._extended(request)) for e in season['episodes']])
+
+    async def show_progress(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        show = self.shows.get(request.match_info['id'])
+        if not user:
+            return web.Response(status=401)
+        if not show:
+            return web.Response(status=404)
+        watched = {}
+        for entry in user['history']:
+            if entry.get('show_id') == show['ids']['trakt']:
+                watched.setdefault(entry['episode_id'], entry['watched_at'])
+        seasons = []
+        for season in show['seasons']:
+            episodes = [{'number': e['number'], 'completed': e['ids']['trakt'] in watched,
+                         'last_watched_at': watched.get(e['ids']['trakt'])} for e in season['episodes']]
+            seasons.append({'number': season['number'], 'aired': len(episodes),
+                            'completed': sum(1 for e in episodes if e['completed']), 'episodes': episodes})
+        aired = sum(s['aired'] for s in seasons)
+        completed = sum(s['completed'] for s in seasons)
+        next_episode = next((self._episode(e, False) for s in show['seasons'] for e in s['episodes']
+                             if e['ids']['trakt'] not in watched), None)
+        return self._json(request, {'aired': aired, 'completed': completed,
+                                    'last_watched_at': max(watched.values()) if watched else None,
+                                    'seasons': seasons, 'next_episode': next_episode})
+
+    async def history(self, request: web.Request) -> web.Response:
+        user = self._user(request, request.match_info['user'])
+        if not user:
+            return web.Response(status=404 if request.match_info['user'] != 'me' else 401)
+        entries = user['history']
+        kind = request.match_info.get('type')
+        item_id = request.match_info.get('item_id')
+        if kind in ('shows', 'episodes'):
+            entries = [e for e in entries if e['type'] == 'episode']
+            if item_id:
+                entries = [e for e in entries if str(e['show_id']) == item_id]
+        elif kind == 'movies':
+            entries = [e for e in entries if e['type'] == 'movie']
+            if item_id:
+                entries = [e for e in entries if str(e['movie_id']) == item_id]
+        if request.query.get('start_at'):
+            start_at = _parse_timestamp(request.query['start_at'])
+            entries = [e for e in entries if _parse_timestamp(e['watched_at']) >= start_at]
+        if request.query.get('end_at'):
+            end_at = _parse_timestamp(request.query['end_at'])
+            entries = [e for e in entries if _parse_timestamp(e['watched_at']) <= end_at]
+        extended = self._extended(request)
+        return self._paginate(request, [self._history_item(e, extended) for e in entries], default_limit=10)
+
+    async def watched_shows(self, request: web.Request) -> web.Response:
+        user = self._user(request, request.match_info['user'])
+        if not user:
+            return web.Response(status=404)
+        plays: Dict[int, Dict[str, Any]] = {}
+        for entry in user['history']:
+            if entry['type'] == 'episode':
+                stats = plays.setdefault(entry['show_id'], {'plays': 0, 'last_watched_at': entry['watched_at']})
+                stats['plays'] += 1
+        extended = self._extended(request)
+        return self._json(request, [dict(stats, show=self._show(self.shows[str(show_id)], extended))
+                                    for show_id, stats in plays.items()])
+
+    async def collection_shows(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        show_ids = list(dict.fromkeys(e['show_id'] for e in user['history'] if e['type'] == 'episode'))[:10]
+        extended = self._extended(request)
+        return self._json(request, [{'last_collected_at': user['activities']['watched_at'],
+                                     'show': self._show(self.shows[str(show_id)], extended)} for show_id in show_ids])
+
+    async def watchlist(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        entries = user['watchlist']
+        kind = request.match_info.get('type')
+        if kind:
+            entries = [e for e in entries if f"{e['type']}s" == kind]
+        extended = self._extended(request)
+        return self._paginate(request, [self._list_item(e, extended, 'listed_at') for e in entries])
+
+    async def ratings(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        return self._json(request, [self._list_item(e, False, 'rated_at') for e in user['ratings']])
+
+    async def watching(self, request: web.Request) -> web.Response:
+        user = self._user(request, request.match_info['user'])
+        if not user or not user['watching']:
+            return web.Response(status=204)
+        entry = user['watching']
+        now = datetime.now(timezone.utc)
+        return self._json(request, {
+            'expires_at': _timestamp(now + timedelta(minutes=30)),
+            'started_at': _timestamp(now - timedelta(minutes=10)),
+            'action': 'watch',
+            'type': 'episode',
+            'show': self._show(self.shows[str(entry['show_id'])], True),
+            'episode': self._episode(self.episodes[entry['episode_id']], True)
+        })
+
+    async def calendar(self, request: web.Request) -> web.Response:
+        user = self._user(request, request.match_info.get('user'))
+        if not user:
+            return web.Response(status=401)
+        start = datetime.fromisoformat(request.match_info['start']).replace(tzinfo=timezone.utc)
+        end = start + timedelta(days=int(request.match_info['days']))
+        show_ids = {e['show_id'] for e in user['history'] if e['type'] == 'episode'}
+        items = []
+        for show_id in show_ids:
+            show = self.shows[str(show_id)]
+            for season in show['seasons']:
+                for episode in season['episodes']:
+                    aired = _parse_timestamp(episode['first_aired'])
+                    if start <= aired < end:
+                        items.append({'first_aired': episode['first_aired'],
+                                      'episode': self._episode(episode, False), 'show': self._show(show, False)})
+        items.sort(key=lambda item: item['first_aired'])
+        return self._json(request, items)
+
+    async def last_activities(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        acts = user['activities']
+        latest = max(acts.values())
+        return self._json(request, {
+            'all': latest,
+            'movies': {'watched_at': acts['watched_at'], 'watchlisted_at': acts['watchlisted_at'], 'rated_at': acts['rated_at']},
+            'episodes': {'watched_at': acts['watched_at'], 'watchlisted_at': acts['watchlisted_at'], 'rated_at': acts['rated_at']},
+            'shows': {'watchlisted_at': acts['watchlisted_at'], 'rated_at': acts['rated_at']},
+            'seasons': {'watchlisted_at': acts['watchlisted_at'], 'rated_at': acts['rated_at']}
+        })
+
+    def _sync_entries(self, data: Dict[str, Any]) -> List[tuple]:
+        """Resolve a /sync payload to (type, content, item) tuples."""
+        entries = []
+        for movie in data.get('movies', []):
+            content = self.movies.get(str(movie.get('ids', {}).get('trakt')))
+            entries.append(('movie', content, movie))
+        for show in data.get('shows', []):
+            content = self.shows.get(str(show.get('ids', {}).get('trakt')))
+            entries.append(('show', content, show))
+        return entries
+
+    def _selected_episodes(self, show: Dict[str, Any], item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Episodes of show named by a /sync item, or all of them when it names no seasons."""
+        if not item.get('seasons'):
+            return [e for s in show['seasons'] for e in s['episodes']]
+        selected = []
+        for wanted in item['seasons']:
+            season = next((s for s in show['seasons'] if s['number'] == wanted.get('number')), None)
+            if not season:
+                continue
+            numbers = {e.get('number') for e in wanted.get('episodes', [])}
+            selected += [e for e in season['episodes'] if not numbers or e['number'] in numbers]
+        return selected
+
+    async def sync_history_add(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        added = {'movies': 0, 'episodes': 0}
+        not_found = {'movies': [], 'shows': []}
+        now = _timestamp(datetime.now(timezone.utc))
+        for kind, content, item in self._sync_entries(await request.json()):
+            if not content:
+                not_found[f"{kind}s"].append(item)
+                continue
+            watched_at = item.get('watched_at', now)
+            if kind == 'movie':
+                new_entries = [{'type': 'movie', 'movie_id': content['ids']['trakt']}]
+            else:
+                new_entries = [{'type': 'episode', 'show_id': content['ids']['trakt'], 'episode_id': e['ids']['trakt']}
+                               for e in self._selected_episodes(content, item)]
+            for entry in new_entries:
+                # Trakt skips a play that already exists at the same watched_at
+                key = entry.get('movie_id') or entry.get('episode_id')
+                if any((e.get('movie_id') or e.get('episode_id')) == key and e['watched_at'] == watched_at
+                       for e in user['history']):
+                    continue
+                entry.update({'id': self.fixtures['next_history_id'], 'watched_at': watched_at, 'action': 'watch'})
+                self.fixtures['next_history_id'] += 1
+                user['history'].insert(0, entry)
+                added['movies' if kind == 'movie' else 'episodes'] += 1
+        user['history'].sort(key=lambda e: e['watched_at'], reverse=True)
+        user['activities']['watched_at'] = now
+        return self._json(request, {'added': added, 'not_found': not_found}, status=201)
+
+    async def sync_history_remove(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        deleted = {'movies': 0, 'episodes': 0}
+        for kind, content, item in self._sync_entries(await request.json()):
+            if not content:
+                continue
+            if kind == 'movie':
+                field, removed = 'movie_id', {content['ids']['trakt']}
+            else:
+                field, removed = 'episode_id', {e['ids']['trakt'] for e in self._selected_episodes(content, item)}
+            before = len(user['history'])
+            user['history'] = [e for e in user['history'] if e.get(field) not in removed]
+            deleted['movies' if kind == 'movie' else 'episodes'] += before - len(user['history'])
+        user['activities']['watched_at'] = _timestamp(datetime.now(timezone.utc))
+        return self._json(request, {'deleted': deleted, 'not_found': {'movies': [], 'shows': []}})
+
+    async def sync_watchlist_add(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        now = _timestamp(datetime.now(timezone.utc))
+        added = {'movies': 0, 'shows': 0}
+        existing = {(e['type'], e.get('movie_id') or e.get('show_id')) for e in user['watchlist']}
+        for kind, content, _ in self._sync_entries(await request.json()):
+            if content and (kind, content['ids']['trakt']) not in existing:
+                user['watchlist'].append({'type': kind, f"{kind}_id": content['ids']['trakt'], 'listed_at': now})
+                added[f"{kind}s"] += 1
+        user['activities']['watchlisted_at'] = now
+        return self._json(request, {'added': added, 'existing': {'movies': 0, 'shows': 0}}, status=201)
+
+    async def sync_watchlist_remove(self, request: web.Request) -> web.Response:
+        user = self._user(request)
+        if not user:
+            return web.Response(status=401)
+        removed = {(kind, content['ids']['trakt']) for kind, content, _ in self._sync_entries(await request.json()) if content}
+        before = len(user['watchlist'])
+        user['watchlist'] = [e for e in user['watchlist'] if (e['type'], e.get('movie_id') or e.get('show_id')) not in removed]
+        user['activities']['watchlisted_at'] = _timestamp(datetime.now(timezone.utc))
+        return self._json(request, {'deleted': {'items': before - len(user['watchlist'])}})
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults])
+        app.router.add_post('/oauth/token', self.oauth_token)
+        app.router.add_get('/users/me', self.users_me)
+        app.router.add_get('/search/{types}', self.search)
+        app.router.add_get('/{kind:shows|movies}/popular', self.popular)
+        app.router.add_get('/shows/{id}', self.show_summary)
+        app.router.add_get('/movies/{id}', self.movie_summary)
+        app.router.add_get('/shows/{id}/seasons', self.show_seasons)
+        app.router.add_get('/shows/{id}/seasons/{season:\\d+}', self.season_episodes)
+        app.router.add_get('/shows/{id}/progress/watched', self.show_progress)
+        app.router.add_get('/users/{user}/history', self.history)
+        app.router.add_get('/users/{user}/history/{type}', self.history)
+        app.router.add_get('/users/{user}/history/{type}/{item_id}', self.history)
+        app.router.add_get('/users/{user}/watched/shows', self.watched_shows)
+        app.router.add_get('/users/me/collection/shows', self.collection_shows)
+        app.router.add_get('/users/me/watchlist', self.watchlist)
+        app.router.add_get('/users/me/watchlist/{type}', self.watchlist)
+        app.router.add_get('/users/{user}/watching', self.watching)
+        app.router.add_get('/calendars/my/shows/{start}/{days}', self.calendar)
+        app.router.add_get('/users/{user}/calendar/shows/{start}/{days}', self.calendar)
+        app.router.add_get('/sync/last_activities', self.last_activities)
+        app.router.add_get('/sync/ratings', self.ratings)
+        app.router.add_post('/sync/history', self.sync_history_add)
+        app.router.add_post('/sync/history/remove', self.sync_history_remove)
+        app.router.add_post('/sync/watchlist', self.sync_watchlist_add)
+        app.router.add_post('/sync/watchlist/remove', self.sync_watchlist_remove)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Start serving and return the base URL (port 0 picks a free port)."""
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+async def _serve(args):
+    fake = FakeTrakt(
+        build_fixtures(users=args.users, shows=args.shows, movies=args.movies,
+                       history_per_user=args.history, seed=args.seed),
+        latency=args.latency, jitter=args.jitter,
+        rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, seed=args.seed
+    )
+    base_url = await fake.start(args.host, args.port)
+    print(f"Fake Trakt listening on {base_url} (tokens: token-user1 .. token-user{args.users})", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local fake of the Trakt API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--shows', type=int, default=50)
+    parser.add_argument('--movies', type=int, default=50)
+    parser.add_argument('--history', type=int, default=200, help="history entries per user")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 5xx")
+    parser.add_argument('--seed', type=int, default=0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,88 @@
+import aiohttp
+from typing import Optional, Dict
+import config
+
+class HTTPPool:
+    """Process-wide aiohttp session with keep-alive, DNS caching and pool statistics."""
+
+    def __init__(self, limit: int = None, limit_per_host: int = None,
+                 keepalive_timeout: float = None, dns_cache_ttl: int = None):
+        self.limit = limit if limit is not None else config.HTTP_POOL_LIMIT
+        self.limit_per_host = limit_per_host if limit_per_host is not None else config.HTTP_POOL_LIMIT_PER_HOST
+        self.keepalive_timeout = keepalive_timeout if keepalive_timeout is not None else config.HTTP_KEEPALIVE_TIMEOUT
+        self.dns_cache_ttl = dns_cache_ttl if dns_cache_ttl is not None else config.HTTP_DNS_CACHE_TTL
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._stats = {
+            'requests': 0,
+            'in_flight': 0,
+            'connections_opened': 0,
+            'connections_reused': 0
+        }
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Count requests, new connections and reused keep-alive connections."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._stats['requests'] += 1
+            self._stats['in_flight'] += 1
+
+        async def on_request_done(session, ctx, params):
+            self._stats['in_flight'] -= 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self._stats['connections_opened'] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._stats['connections_reused'] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_done)
+        trace_config.on_request_exception.append(on_request_done)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating the pool on first use."""
+        if self._session is None or self._session.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                trace_configs=[self._build_trace_config()]
+            )
+        return self._session
+
+    async def close(self):
+        """Close the session and every pooled connection."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._connector = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get a snapshot of pool usage."""
+        in_use = 0
+        idle = 0
+        if self._connector is not None and not self._connector.closed:
+            # aiohttp doesn't expose pool occupancy publicly
+            in_use = len(getattr(self._connector, '_acquired', ()))
+            idle = sum(len(conns) for conns in getattr(self._connector, '_conns', {}).values())
+
+        return {
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'in_use': in_use,
+            'idle': idle,
+            'in_flight': self._stats['in_flight'],
+            'requests': self._stats['requests'],
+            'connections_opened': self._stats['connections_opened'],
+            'handshakes_saved': self._stats['connections_reused']
+        }
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import time
+from typing import Optional, Dict, Any
+import aiohttp
+import config
+
+TMDB_API_URL = 'https://api.themoviedb.org/3'
+TMDB_IMAGE_URL = 'https://image.tmdb.org/t/p'
+
+# _resolve's answer for an ID TMDB doesn't know
+_NOT_FOUND = object()
+
+def _tmdb_kind(content_type: str) -> str:
+    """Map a Trakt content type to TMDB's namespace for that ID."""
+    return 'movie' if content_type.startswith('movie') else 'tv'
+
+class ImageResolver:
+    """Resolve TMDB IDs to real poster paths, off the request path.
+
+    Lookups are answered from a disk-backed cache only. IDs that aren't
+    cached yet are queued and resolved in batches by a background task, so
+    the embed that asked first goes without a poster and later ones get it.
+    IDs TMDB doesn't know, or failed to answer for in time, are remembered
+    for retry_after seconds so they aren't looked up on every embed.
+    """
+
+    def __init__(self, pool, cache_file: str = None, api_key: str = None,
+                 batch_size: int = None, batch_delay: float = None, retry_after: float = None):
+        self.pool = pool
+        self.cache_file = cache_file or config.IMAGE_CACHE_FILE
+        self.api_key = api_key if api_key is not None else config.TMDB_API_KEY
+        self.batch_size = batch_size or config.IMAGE_BATCH_SIZE
+        self.batch_delay = batch_delay if batch_delay is not None else config.IMAGE_BATCH_DELAY
+        self.retry_after = retry_after if retry_after is not None else config.IMAGE_RETRY_AFTER
+        self.paths: Dict[str, Optional[str]] = self._load_cache()
+        # Keys that came back 404 or failed, with the monotonic time to try them again
+        self._failed: Dict[str, float] = {}
+        self._pending = set()
+        self._worker: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._stats = {'hits': 0, 'misses': 0, 'negative_hits': 0, 'resolved': 0, 'not_found': 0,
+                       'errors': 0, 'batches': 0}
+
+    def _load_cache(self) -> Dict[str, Optional[str]]:
+        """Load resolved poster paths from disk."""
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, OSError):
+                pass
+        return {}
+
+    def _save_cache(self, paths: Dict[str, Optional[str]]):
+        """Write resolved poster paths to disk."""
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump(paths, f)
+        except Exception as e:
+            print(f"Error saving image cache: {e}")
+
+    def poster_url(self, content: Optional[Dict[str, Any]], content_type: str, size: str = 'w300') -> Optional[str]:
+        """Get the poster URL for a Trakt show or movie, or None if it isn't known yet."""
+        tmdb_id = (content or {}).get('ids', {}).get('tmdb')
+        if not tmdb_id:
+            return None
+
+        key = f"{_tmdb_kind(content_type)}:{tmdb_id}"
+        if key in self.paths:
+            self._stats['hits'] += 1
+            path = self.paths[key]
+            return f"{TMDB_IMAGE_URL}/{size}{path}" if path else None
+
+        retry_at = self._failed.get(key)
+        if retry_at is not None:
+            if time.monotonic() < retry_at:
+                self._stats['negative_hits'] += 1
+                return None
+            del self._failed[key]
+
+        self._stats['misses'] += 1
+        self._enqueue(key)
+        return None
+
+    def _enqueue(self, key: str):
+        if not self.api_key:
+            return
+        self._pending.add(key)
+        if self._worker is None or self._worker.done():
+            try:
+                self._worker = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                # No loop running; the key stays queued for the next lookup
+                pass
+
+    async def _run(self):
+        """Resolve queued IDs in batches until the queue is empty."""
+        while self._pending:
+            # Let lookups from the same command pile up into one batch
+            await asyncio.sleep(self.batch_delay)
+            batch = [self._pending.pop() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._stats['batches'] += 1
+            results = await asyncio.gather(*(self._resolve(key) for key in batch), return_exceptions=True)
+            retry_at = time.monotonic() + self.retry_after
+            for key, path in zip(batch, results):
+                if isinstance(path, Exception):
+                    self._stats['errors'] += 1
+                    self._failed[key] = retry_at
+                    continue
+                if path is _NOT_FOUND:
+                    self._failed[key] = retry_at
+                    continue
+                self.paths[key] = path
+                self._dirty = True
+            await self.flush()
+
+    async def _resolve(self, key: str) -> Optional[str]:
+        """Look up one poster path on TMDB (_NOT_FOUND if TMDB doesn't know the ID)."""
+        kind, tmdb_id = key.split(':', 1)
+        session = await self.pool.get_session()
+        timeout = aiohttp.ClientTimeout(total=config.IMAGE_REQUEST_TIMEOUT)
+        async with session.get(f"{TMDB_API_URL}/{kind}/{tmdb_id}", params={'api_key': self.api_key},
+                               timeout=timeout) as response:
+            if response.status == 404:
+                self._stats['not_found'] += 1
+                return _NOT_FOUND
+            if response.status != 200:
+                raise RuntimeError(f"TMDB returned {response.status} for {key}")
+            data = await response.json()
+
+        self._stats['resolved'] += 1
+        return data.get('poster_path')
+
+    async def flush(self):
+        """Write newly resolved paths to disk without blocking the event loop."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        await asyncio.to_thread(self._save_cache, dict(self.paths))
+
+    async def close(self):
+        """Stop resolving and persist what has been resolved so far."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters and resolution results."""
+        stats = dict(self._stats)
+        stats['cached'] = len(self.paths)
+        stats['pending'] = len(self._pending)
+        stats['failed'] = len(self._failed)
+        return stats
+
+class StaticImageResolver:
+    """Stand-in resolver for tests and local runs that never touches the network."""
+
+    def __init__(self, paths: Optional[Dict[str, Optional[str]]] = None, placeholder_url: Optional[str] = None):
+        self.paths = paths or {}
+        self.placeholder_url = placeholder_url
+
+    def poster_url(self, content: Optional[Dict[str, Any]], content_type: str, size: str = 'w300') -> Optional[str]:
+        """Get a poster URL from the fixed mapping, or the placeholder."""
+        tmdb_id = (content or {}).get('ids', {}).get('tmdb')
+        if not tmdb_id:
+            return None
+        path = self.paths.get(f"{_tmdb_kind(content_type)}:{tmdb_id}")
+        if path:
+            return f"{TMDB_IMAGE_URL}/{size}{path}"
+        return self.placeholder_url
+
+    async def close(self):
+        pass
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'cached': len(self.paths)}
+
+# Resolver used by the command modules; replaced by init_images at startup
+resolver = StaticImageResolver()
+
+def init_images(image_resolver):
+    """Set the resolver the command modules use for posters."""
+    global resolver
+    resolver = image_resolver
+
+def poster_url(content: Optional[Dict[str, Any]], content_type: str, size: str = 'w300') -> Optional[str]:
+    """Get the poster URL for a Trakt show or movie, or None if it isn't known yet."""
+    return resolver.poster_url(content, content_type, size)
+
+def item_poster_url(item: Dict[str, Any], size: str = 'w300') -> Optional[str]:
+    """Get the poster URL for a search/history item wrapping a 'show' or 'movie'."""
+    if item.get('show'):
+        return resolver.poster_url(item['show'], 'show', size)
+    return resolver.poster_url(item.get('movie'), 'movie', size)
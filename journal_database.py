@@ -0,0 +1,172 @@
+import json
+import os
+from typing import Dict, Any, Optional, List, Callable
+import config
+from database import Database
+from records import encode_record
+
+_MISSING = object()
+
+class JournalDatabase(Database):
+    """Database that appends each change to a journal instead of rewriting the file.
+
+    Every mutation appends one compact record per changed path, such as a
+    single user, one user's reminders or one arena participant, so a write
+    costs the size of the change rather than the size of the database.
+    Records are batched and fsynced once per flush interval. When the
+    journal has grown past snapshot_bytes, a snapshot of the whole data is
+    written (in the same format as users.json) and the journal is
+    compacted to the records the snapshot does not cover. On startup the
+    snapshot is loaded and the journal tail replayed; a record torn by a
+    crash mid-append is dropped.
+    """
+
+    def __init__(self, db_file: str = 'users.json', flush_interval: Optional[float] = None,
+                 snapshot_bytes: Optional[int] = None):
+        self.journal_file = f"{db_file}.journal"
+        self.snapshot_bytes = snapshot_bytes or config.DATABASE_SNAPSHOT_BYTES
+        self._pending: List[str] = []
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._journal_bytes = 0
+        self._snapshot_due = False
+        super().__init__(db_file, flush_interval)
+        # Snapshot files carry their journal position as the write sequence
+        self._written = self._snapshot_seq
+
+    def _load_data(self) -> Dict[str, Any]:
+        """Load the snapshot, then replay the journal records it doesn't cover."""
+        data = super()._load_data()
+        self._snapshot_seq = self._seq = data.pop('_journal_seq', 0)
+        self._journal_bytes = 0
+        if not os.path.exists(self.journal_file):
+            return data
+
+        records = []
+        with open(self.journal_file, 'rb+') as f:
+            good_offset = 0
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"Dropping torn journal record at byte {good_offset} of {self.journal_file}")
+                    f.truncate(good_offset)
+                    break
+                good_offset += len(line)
+                if record[0] > self._snapshot_seq:
+                    records.append(record)
+            self._journal_bytes = good_offset
+
+        # A shutdown flush can land ahead of an in-flight batch, so apply in sequence order
+        records.sort(key=lambda record: record[0])
+        for record in records:
+            self._apply(data, record[1], record[2] if len(record) > 2 else _MISSING)
+            self._seq = record[0]
+        if records:
+            print(f"Replayed {len(records)} journal records from {self.journal_file}")
+        return data
+
+    def _apply(self, data: Dict[str, Any], path: List[str], value: Any):
+        """Set (or, for _MISSING, delete) the value at path."""
+        if not path:
+            data.clear()
+            data.update(value)
+            return
+        target = data
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        if value is _MISSING:
+            target.pop(path[-1], None)
+        else:
+            target[path[-1]] = value
+
+    def _lookup(self, path) -> Any:
+        value = self.data
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                return _MISSING
+            value = value[key]
+        return value
+
+    def _save_data(self, *paths):
+        """Journal the current value of each changed path (the whole data if none are given)."""
+        for path in paths or ((),):
+            value = self._lookup(path)
+            self._seq += 1
+            record = [self._seq, list(path)] if value is _MISSING else [self._seq, list(path), value]
+            self._pending.append(json.dumps(record, default=encode_record) + '\n')
+        self._schedule_flush()
+
+    def _take_write(self) -> Callable[[], None]:
+        records = self._pending
+        self._pending = []
+        self._dirty = False
+        self._journal_bytes += sum(len(record) for record in records)
+
+        snapshot = None
+        if self._snapshot_due or self._journal_bytes >= self.snapshot_bytes:
+            snapshot = self._snapshot()
+        return lambda: self._write_journal(records, snapshot)
+
+    def _snapshot(self):
+        self._snapshot_due = False
+        self._journal_bytes = 0
+        data = dict(self.data)
+        data['_journal_seq'] = self._seq
+        return self._seq, json.dumps(data, default=encode_record)
+
+    def _write_journal(self, records: List[str], snapshot):
+        """Append records with one fsync, then write the snapshot and compact the journal."""
+        try:
+            if records:
+                with self._write_lock:
+                    with open(self.journal_file, 'a') as f:
+                        f.writelines(records)
+                        f.flush()
+                        os.fsync(f.fileno())
+        except Exception:
+            # These records are lost from the journal; the next snapshot covers them
+            self._snapshot_due = True
+            raise
+
+        if snapshot is not None:
+            seq, text = snapshot
+            self._write_file(seq, text)
+            self._compact(seq)
+
+    def _compact(self, snapshot_seq: int):
+        """Drop journal records already covered by the snapshot at snapshot_seq."""
+        with self._write_lock:
+            if not os.path.exists(self.journal_file):
+                return
+            tmp_file = f"{self.journal_file}.tmp"
+            with open(self.journal_file, 'r') as src, open(tmp_file, 'w') as dst:
+                for line in src:
+                    try:
+                        if json.loads(line)[0] > snapshot_seq:
+                            dst.write(line)
+                    except ValueError:
+                        break
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_file, self.journal_file)
+
+    def reload(self) -> bool:
+        """Re-read the snapshot and journal. Unsaved changes are dropped."""
+        self._pending = []
+        return super().reload()
+
+    def close(self):
+        """Write pending records and a final snapshot, so the next start has nothing to replay.
+
+        Records the cancelled task already took may still be in flight, or
+        lost if their append fails; the snapshot covers them either way, and
+        a late append is ignored on replay since its sequence numbers are
+        below the snapshot's.
+        """
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._snapshot_due = True
+        self.flush()
@@ -1,8 +1,15 @@
+import asyncio
 import discord
 from discord.ext import commands, tasks
 import config
-from database import Database
-from trakt_api import TraktAPI
+from database import open_database
+from trakt_api import AsyncTraktAPI
+from http_pool import HTTPPool
+from sync_engine import SyncEngine
+from token_manager import TokenManager
+from images import ImageResolver
+from deadline import DeadlineCommandTree
+from metrics import MetricsRegistry, MetricsServer
 from datetime import datetime, timedelta
 import pytz
 
@@ -15,27 +22,50 @@ intents.message_content = True
 intents.guilds = True
 
 try:
-    bot = commands.Bot(command_prefix=config.COMMAND_PREFIX, intents=intents)
+    bot = commands.Bot(command_prefix=config.COMMAND_PREFIX, intents=intents, tree_cls=DeadlineCommandTree)
 except Exception as e:
     print(f"Error creating bot: {e}")
     print("Make sure you have enabled the 'Message Content Intent' in the Discord Developer Portal!")
     exit(1)
 
 # Initialize shared components
-trakt_api = TraktAPI()
-db = Database()
+http_pool = HTTPPool()
+metrics = MetricsRegistry()
+trakt_api = AsyncTraktAPI(http_pool, metrics=metrics)
+db = open_database()
+token_manager = TokenManager(trakt_api, db)
+sync_engine = SyncEngine(trakt_api, db, tokens=token_manager)
+image_resolver = ImageResolver(http_pool)
+metrics_server = MetricsServer(metrics)
+
+# Export the client's internal stats next to the per-endpoint request metrics
+metrics.add_gauge_source('trakt_pool', trakt_api.get_pool_stats)
+metrics.add_gauge_source('trakt_rate_limit', trakt_api.get_rate_limit_stats)
+metrics.add_gauge_source('trakt_cache', trakt_api.get_cache_stats)
+metrics.add_gauge_source('trakt_coalescing', trakt_api.get_coalescing_stats)
+metrics.add_gauge_source('trakt_resilience', trakt_api.get_resilience_stats)
+metrics.add_gauge_source('trakt_breaker', trakt_api.get_breaker_stats)
+metrics.add_gauge_source('trakt_metadata', trakt_api.get_metadata_stats)
+metrics.add_gauge_source('trakt_writes', trakt_api.get_write_stats)
+metrics.add_gauge_source('trakt_sync', sync_engine.get_stats)
+metrics.add_gauge_source('trakt_tokens', token_manager.get_stats)
+metrics.add_gauge_source('images', image_resolver.get_stats)
 
 # Import command modules and initialize them BEFORE on_ready
+import images
 import views
 import commands
 import social
 import management
+import transfer
 
 # Initialize modules with shared objects
+images.init_images(image_resolver)
 views.init_views(trakt_api, db)
 commands.init_commands(bot, trakt_api, db)
-social.init_social(bot, trakt_api, db)
+social.init_social(bot, trakt_api, db, sync_engine, token_manager)
 management.init_management(bot, trakt_api, db)
+transfer.init_transfer(bot, trakt_api, db, token_manager)
 
 # Register error handler
 commands.register_error_handler()
@@ -61,6 +91,11 @@ async def on_ready():
     # Start background tasks
     check_reminders.start()
     arena_task.start()
+    sync_task.start()
+    token_task.start()
+    
+    # Pick up history imports interrupted by a restart
+    transfer.resume_jobs()
 
 @tasks.loop(hours=6)
 async def check_reminders():
@@ -86,7 +121,7 @@ async def check_reminders():
             try:
                 # Get user's upcoming episodes (next 3 days)
                 username = user['trakt_username']
-                upcoming_episodes = trakt_api.get_calendar(username, 3)
+                upcoming_episodes = await trakt_api.get_calendar(username, 3)
                 
                 if not upcoming_episodes:
                     continue
@@ -295,5 +330,46 @@ async def arena_task():
 async def before_arena_task():
     await bot.wait_until_ready()
 
+@tasks.loop(minutes=config.SYNC_INTERVAL_MINUTES)
+async def sync_task():
+    """Pull new Trakt activity for every connected user."""
+    try:
+        updated = await sync_engine.sync_all()
+        if updated:
+            print(f"🔄 Synced new Trakt activity for {updated} user(s)")
+    except Exception as e:
+        print(f"Sync task error: {e}")
+
+@sync_task.before_loop
+async def before_sync_task():
+    await bot.wait_until_ready()
+
+@tasks.loop(minutes=config.TOKEN_SWEEP_MINUTES)
+async def token_task():
+    """Refresh Trakt tokens that would expire before the next sweep."""
+    try:
+        refreshed = await token_manager.sweep(horizon=config.TOKEN_SWEEP_MINUTES * 60)
+        if refreshed:
+            print(f"🔑 Refreshed Trakt tokens for {refreshed} user(s)")
+    except Exception as e:
+        print(f"Token refresh task error: {e}")
+
+@token_task.before_loop
+async def before_token_task():
+    await bot.wait_until_ready()
+
+async def run_bot():
+    """Run the bot and release shared resources on shutdown."""
+    async with bot:
+        try:
+            await metrics_server.start()
+            await bot.start(config.DISCORD_TOKEN)
+        finally:
+            await metrics_server.stop()
+            await image_resolver.close()
+            await trakt_api.close()
+            db.close()
+
 if __name__ == "__main__":
-    bot.run(config.DISCORD_TOKEN) 
\ No newline at end of file
+    discord.utils.setup_logging()
+    asyncio.run(run_bot()) 
\ No newline at end of file
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
 from typing import Optional
-import requests
 from datetime import datetime
+from images import poster_url
 
 # Initialize these as None and set them later
 bot = None
@@ -84,9 +84,9 @@ class ShowProgressView(discord.ui.View):
         
         # Add poster
         try:
-            tmdb_id = self.show.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = poster_url(self.show, 'show')
+            if poster:
+                embed.set_thumbnail(url=poster)
         except:
             pass
         
@@ -101,7 +101,7 @@ class ShowProgressView(discord.ui.View):
         await interaction.response.defer()
         
         try:
-            progress = trakt_api.get_show_progress(self.access_token, self.show_id)
+            progress = await trakt_api.get_show_progress(self.access_token, self.show_id)
             embed = self.get_progress_embed(progress)
             await interaction.followup.edit_message(interaction.message.id, embed=embed, view=self)
         except Exception as e:
@@ -115,7 +115,7 @@ class ShowProgressView(discord.ui.View):
         
         await interaction.response.defer()
         
-        seasons = trakt_api.get_show_seasons(self.show_id)
+        seasons = await trakt_api.get_show_seasons(self.show_id)
         if not seasons:
             await interaction.followup.send("❌ Could not load seasons.", ephemeral=True)
             return
@@ -130,7 +130,8 @@ class ShowProgressView(discord.ui.View):
             await interaction.response.send_message("This isn't your show!", ephemeral=True)
             return
         
-        success = trakt_api.mark_as_watched(self.access_token, 'show', self.show_id)
+        await interaction.response.defer(ephemeral=True)
+        success = await trakt_api.mark_as_watched(self.access_token, 'show', self.show_id)
         
         if success:
             embed = discord.Embed(
@@ -141,7 +142,7 @@ class ShowProgressView(discord.ui.View):
         else:
             embed = discord.Embed(title="❌ Failed", description="Could not mark show", color=0xff0000)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
 class SeasonSelectView(discord.ui.View):
     def __init__(self, show, seasons, user_id, access_token):
@@ -206,7 +207,7 @@ class SeasonSelectView(discord.ui.View):
             await interaction.response.send_message("❌ Season not found.", ephemeral=True)
             return
         
-        episodes = trakt_api.get_season_episodes(self.show_id, season_number)
+        episodes = await trakt_api.get_season_episodes(self.show_id, season_number)
         view = EpisodeManageView(self.show, selected_season, episodes, self.user_id, self.access_token)
         embed = view.get_episode_embed()
         
@@ -301,7 +302,8 @@ class EpisodeManageView(discord.ui.View):
             await interaction.response.send_message("This isn't your season!", ephemeral=True)
             return
         
-        success = trakt_api.mark_season_watched(self.access_token, self.show_id, self.season_number)
+        await interaction.response.defer(ephemeral=True)
+        success = await trakt_api.mark_season_watched(self.access_token, self.show_id, self.season_number)
         
         if success:
             embed = discord.Embed(
@@ -312,7 +314,7 @@ class EpisodeManageView(discord.ui.View):
         else:
             embed = discord.Embed(title="❌ Failed", description="Could not mark season", color=0xff0000)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
 class EpisodeActionView(discord.ui.View):
     def __init__(self, show, season_number, episode, user_id, access_token):
@@ -331,7 +333,8 @@ class EpisodeActionView(discord.ui.View):
             await interaction.response.send_message("This isn't your episode!", ephemeral=True)
             return
         
-        success = trakt_api.mark_episode_watched(
+        await interaction.response.defer(ephemeral=True)
+        success = await trakt_api.mark_episode_watched(
             self.access_token, 
             self.show_id, 
             self.season_number, 
@@ -347,7 +350,7 @@ class EpisodeActionView(discord.ui.View):
         else:
             embed = discord.Embed(title="❌ Failed", description="Could not mark episode", color=0xff0000)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
     
     @discord.ui.button(label='❌ Unmark Episode', style=discord.ButtonStyle.danger)
     async def unmark_episode_watched(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -355,7 +358,8 @@ class EpisodeActionView(discord.ui.View):
             await interaction.response.send_message("This isn't your episode!", ephemeral=True)
             return
         
-        success = trakt_api.unmark_episode_watched(
+        await interaction.response.defer(ephemeral=True)
+        success = await trakt_api.unmark_episode_watched(
             self.access_token, 
             self.show_id, 
             self.season_number, 
@@ -371,7 +375,7 @@ class EpisodeActionView(discord.ui.View):
         else:
             embed = discord.Embed(title="❌ Failed", description="Could not unmark episode", color=0xff0000)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
 def register_management_commands():
     """Register management commands"""
@@ -382,7 +386,7 @@ def register_management_commands():
         if len(current) < 2:
             return []
         try:
-            results = trakt_api.search_content(current, 'show')
+            results = await trakt_api.search_content(current, 'show')
             choices = []
             for result in results[:10]:
                 show = result['show']
@@ -405,7 +409,7 @@ def register_management_commands():
             await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
             return
         
-        results = trakt_api.search_content(show_name, 'show')
+        results = await trakt_api.search_content(show_name, 'show')
         if not results:
             await interaction.followup.send(f"❌ No shows found for '{show_name}'")
             return
@@ -415,7 +419,7 @@ def register_management_commands():
         show_id = str(show['ids']['trakt'])
         
         try:
-            progress = trakt_api.get_show_progress(user['access_token'], show_id)
+            progress = await trakt_api.get_show_progress(user['access_token'], show_id)
             view = ShowProgressView(show_result, interaction.user.id, user['access_token'])
             embed = view.get_progress_embed(progress)
             await interaction.followup.send(embed=embed, view=view)
@@ -428,9 +432,9 @@ def register_management_commands():
                 color=0xff0000
             )
             
-            tmdb_id = show.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = poster_url(show, 'show')
+            if poster:
+                embed.set_thumbnail(url=poster)
             
             await interaction.followup.send(embed=embed)
 
@@ -445,7 +449,7 @@ def register_management_commands():
             await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
             return
         
-        results = trakt_api.search_content(show_name, 'show')
+        results = await trakt_api.search_content(show_name, 'show')
         if not results:
             await interaction.followup.send(f"❌ No shows found for '{show_name}'")
             return
@@ -467,9 +471,9 @@ def register_management_commands():
         status = show.get('status', 'N/A')
         embed.add_field(name="Status", value=f"📺 {status}", inline=True)
         
-        tmdb_id = show.get('ids', {}).get('tmdb')
-        if tmdb_id:
-            embed.set_image(url=f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg")
+        poster = poster_url(show, 'show', 'w500')
+        if poster:
+            embed.set_image(url=poster)
         
         view = ShowProgressView(show_result, interaction.user.id, user['access_token'])
         await interaction.followup.send(embed=embed, view=view)
@@ -487,42 +491,28 @@ def register_management_commands():
             continue_options = []
             
             # Check multiple sources for shows
-            collection_response = requests.get(
-                f"{trakt_api.base_url}/users/me/collection/shows?extended=full",
-                headers=trakt_api.get_headers(user['access_token'])
-            )
-            
-            watched_response = requests.get(
-                f"{trakt_api.base_url}/users/me/watched/shows?extended=full",
-                headers=trakt_api.get_headers(user['access_token'])
-            )
-            
-            history_response = requests.get(
-                f"{trakt_api.base_url}/users/me/history/shows?limit=50",
-                headers=trakt_api.get_headers(user['access_token'])
-            )
-            
-            all_shows = set()
-            
-            # Collect shows from all sources
-            for response in [collection_response, watched_response, history_response]:
-                if response.status_code == 200:
-                    items = response.json()
-                    for item in items:
-                        show = item.get('show', {})
-                        if show.get('ids', {}).get('trakt'):
-                            all_shows.add(str(show['ids']['trakt']))
+            collection_items = await trakt_api.get_user_collection_shows(user['access_token'])
+            watched_items = await trakt_api.get_user_watched_shows(user['access_token'])
+            history_items = await trakt_api.get_user_show_history(user['access_token'], 50)
+
+            all_shows = {}
+
+            # Collect shows from all sources; every source is requested with extended=full
+            for items in [collection_items, watched_items, history_items]:
+                for item in items:
+                    show = item.get('show', {})
+                    if show.get('ids', {}).get('trakt'):
+                        all_shows.setdefault(str(show['ids']['trakt']), show)
             
             print(f"Found {len(all_shows)} unique shows to check")
             
+            shows_to_check = list(all_shows.items())[:20]  # Limit to avoid rate limits
+            await trakt_api.hydrator.hydrate([show for _, show in shows_to_check], ('overview', 'rating'), 'show')
+            
             # Check progress for each show
-            for show_id in list(all_shows)[:20]:  # Limit to avoid rate limits
+            for show_id, show_info in shows_to_check:
                 try:
-                    show_info = trakt_api.get_show_info(show_id)
-                    if not show_info:
-                        continue
-                    
-                    progress = trakt_api.get_show_progress(user['access_token'], show_id)
+                    progress = await trakt_api.get_show_progress(user['access_token'], show_id)
                     if progress:
                         completed = progress.get('completed', 0)
                         total_episodes = progress.get('episodes', 0)
@@ -579,9 +569,9 @@ def register_management_commands():
             # Add poster from most progressed show
             if continue_options:
                 top_show = continue_options[0]['show']
-                tmdb_id = top_show.get('ids', {}).get('tmdb')
-                if tmdb_id:
-                    embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                poster = poster_url(top_show, 'show')
+                if poster:
+                    embed.set_thumbnail(url=poster)
             
             await interaction.followup.send(embed=embed)
             
@@ -613,7 +603,7 @@ def register_management_commands():
             await interaction.followup.send("❌ Season and episode numbers must be positive.")
             return
         
-        results = trakt_api.search_content(show_name, 'show')
+        results = await trakt_api.search_content(show_name, 'show')
         if not results:
             await interaction.followup.send(f"❌ No shows found for '{show_name}'")
             return
@@ -622,7 +612,7 @@ def register_management_commands():
         show = show_result.get('show')
         show_id = str(show['ids']['trakt'])
         
-        episodes = trakt_api.get_season_episodes(show_id, season)
+        episodes = await trakt_api.get_season_episodes(show_id, season)
         if not episodes:
             await interaction.followup.send(f"❌ Could not find season {season} for this show.")
             return
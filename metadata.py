@@ -0,0 +1,84 @@
+import asyncio
+from typing import Optional, Dict, List, Any, Iterable
+import config
+
+class MetadataHydrator:
+    """Fill in missing show/movie fields for a batch of items at once.
+
+    List endpoints should be asked for extended=full first; anything that
+    still lacks the requested fields is looked up once per unique title,
+    a few at a time, through the cached get_show_info/get_movie_info.
+    """
+
+    def __init__(self, api, concurrency: int = None):
+        self.api = api
+        self.concurrency = concurrency or config.METADATA_CONCURRENCY
+        self._stats = {'items': 0, 'already_full': 0, 'deduplicated': 0, 'fetched': 0, 'failed': 0}
+
+    def _split_item(self, item: Dict[str, Any], content_type: Optional[str]):
+        """Get (content, content_type) from a wrapper item or a bare show/movie."""
+        if content_type:
+            return item, content_type
+        if item.get('show'):
+            return item['show'], 'show'
+        if item.get('movie'):
+            return item['movie'], 'movie'
+        return None, None
+
+    async def hydrate(self, items: Iterable[Dict[str, Any]], fields: Iterable[str],
+                      content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Make sure every show/movie in items has fields, fetching only what is missing.
+
+        items are search/history entries wrapping a 'show' or 'movie', or bare
+        show/movie objects when content_type is given. Missing fields are
+        merged into the objects in place; the items are returned for chaining.
+        """
+        items = list(items)
+        fields = tuple(fields)
+        missing: Dict[tuple, List[Dict[str, Any]]] = {}
+
+        for item in items:
+            content, kind = self._split_item(item, content_type)
+            if not content:
+                continue
+            self._stats['items'] += 1
+            if all(field in content for field in fields):
+                self._stats['already_full'] += 1
+                continue
+
+            trakt_id = content.get('ids', {}).get('trakt')
+            if not trakt_id:
+                continue
+            key = (kind, str(trakt_id))
+            if key in missing:
+                self._stats['deduplicated'] += 1
+            missing.setdefault(key, []).append(content)
+
+        if missing:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(kind: str, trakt_id: str) -> Optional[Dict[str, Any]]:
+                async with semaphore:
+                    if kind == 'show':
+                        return await self.api.get_show_info(trakt_id)
+                    return await self.api.get_movie_info(trakt_id)
+
+            keys = list(missing)
+            results = await asyncio.gather(*(fetch(kind, trakt_id) for kind, trakt_id in keys),
+                                           return_exceptions=True)
+            for key, detailed in zip(keys, results):
+                self._stats['fetched'] += 1
+                if not detailed or isinstance(detailed, Exception):
+                    self._stats['failed'] += 1
+                    continue
+                for content in missing[key]:
+                    for field, value in detailed.items():
+                        content.setdefault(field, value)
+
+        return items
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get how many per-item lookups were avoided."""
+        stats = dict(self._stats)
+        stats['calls_saved'] = stats['items'] - stats['fetched']
+        return stats
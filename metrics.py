@@ -0,0 +1,205 @@
+import re
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+import config
+
+# Latency bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Path segments that name a collection rather than an ID
+STATIC_SEGMENTS = {
+    'me', 'popular', 'trending', 'anticipated', 'recommended', 'watched', 'played',
+    'collected', 'updates', 'boxoffice', 'summary'
+}
+ID_PARENTS = {'users', 'shows', 'movies', 'people', 'lists', 'comments'}
+DATE_SEGMENT = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+def endpoint_template(path: str) -> str:
+    """Collapse IDs, usernames, numbers and dates in a Trakt path into placeholders."""
+    segments = [segment for segment in path.split('/') if segment]
+    template = []
+    for i, segment in enumerate(segments):
+        parent = segments[i - 1] if i else None
+        if DATE_SEGMENT.match(segment):
+            template.append('{date}')
+        elif segment.isdigit():
+            template.append('{n}' if parent in ('seasons', 'episodes') or parent not in ID_PARENTS else '{id}')
+        elif parent in ID_PARENTS and segment not in STATIC_SEGMENTS:
+            template.append('{id}')
+        else:
+            template.append(segment)
+    return '/' + '/'.join(template)
+
+class LatencyHistogram:
+    """Cumulative latency histogram with quantiles estimated from the buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket, like Prometheus does."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):
+                    return lower
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+class EndpointMetrics:
+    """Counters and latency for one method + endpoint template."""
+
+    def __init__(self):
+        self.calls = 0
+        self.statuses: Dict[str, int] = {}
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'statuses': dict(self.statuses),
+            'bytes_received': self.bytes_received,
+            'latency': {
+                'count': self.latency.count,
+                'sum': self.latency.sum,
+                'p50': self.latency.quantile(0.50),
+                'p95': self.latency.quantile(0.95),
+                'p99': self.latency.quantile(0.99)
+            }
+        }
+
+class MetricsRegistry:
+    """Per-endpoint request metrics plus gauges pulled from other components."""
+
+    def __init__(self):
+        self.endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        self._gauge_sources: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def observe(self, method: str, path: str, status: Optional[int], seconds: float, bytes_received: int = 0):
+        """Record one HTTP round trip; status None means it failed without a response."""
+        key = (method.upper(), endpoint_template(path))
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            metrics = self.endpoints[key] = EndpointMetrics()
+        metrics.calls += 1
+        status_label = str(status) if status is not None else 'error'
+        metrics.statuses[status_label] = metrics.statuses.get(status_label, 0) + 1
+        metrics.bytes_received += bytes_received
+        metrics.latency.observe(seconds)
+
+    def add_gauge_source(self, prefix: str, source: Callable[[], Dict[str, Any]]):
+        """Export the numeric values of source() as gauges named prefix_<key>."""
+        self._gauge_sources.append((prefix, source))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get every endpoint's metrics keyed by 'METHOD /template'."""
+        return {f"{method} {template}": metrics.snapshot()
+                for (method, template), metrics in sorted(self.endpoints.items())}
+
+    def _flatten(self, prefix: str, values: Dict[str, Any], labels: Dict[str, str] = None) -> List[str]:
+        """Turn a stats dict into gauge lines; the first level of nested dicts becomes a group label."""
+        labels = labels or {}
+        lines = []
+        for key, value in values.items():
+            name = f"{prefix}_{key}"
+            if isinstance(value, dict):
+                if labels:
+                    lines.extend(self._flatten(name, value, labels))
+                else:
+                    lines.extend(self._flatten(prefix, value, {'group': key}))
+                continue
+            if isinstance(value, str):
+                # Enum-like values such as a breaker state are exported as a labelled 1
+                value_labels = dict(labels, **{key: value})
+                name, value = f"{name}_info", 1
+            elif isinstance(value, (bool, int, float)):
+                value_labels = labels
+            else:
+                continue
+            label_text = ','.join(f'{k}="{v}"' for k, v in value_labels.items())
+            lines.append(f"{name}{{{label_text}}} {float(value)}" if label_text else f"{name} {float(value)}")
+        return lines
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = [
+            '# HELP trakt_requests_total Trakt HTTP round trips by endpoint and status.',
+            '# TYPE trakt_requests_total counter'
+        ]
+        for (method, template), metrics in sorted(self.endpoints.items()):
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(f'trakt_requests_total{{method="{method}",endpoint="{template}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP trakt_response_bytes_total Bytes received from Trakt by endpoint.',
+            '# TYPE trakt_response_bytes_total counter'
+        ]
+        for (method, template), metrics in sorted(self.endpoints.items()):
+            lines.append(f'trakt_response_bytes_total{{method="{method}",endpoint="{template}"}} {metrics.bytes_received}')
+
+        lines += [
+            '# HELP trakt_request_duration_seconds Trakt request latency by endpoint.',
+            '# TYPE trakt_request_duration_seconds histogram'
+        ]
+        for (method, template), metrics in sorted(self.endpoints.items()):
+            labels = f'method="{method}",endpoint="{template}"'
+            histogram = metrics.latency
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'trakt_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'trakt_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'trakt_request_duration_seconds_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'trakt_request_duration_seconds_count{{{labels}}} {histogram.count}')
+
+        for prefix, source in self._gauge_sources:
+            try:
+                lines.extend(self._flatten(prefix, source()))
+            except Exception as e:
+                print(f"Error collecting {prefix} metrics: {e}")
+
+        return '\n'.join(lines) + '\n'
+
+class MetricsServer:
+    """Serve /metrics in Prometheus format on a local port."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = None, port: int = None):
+        self.registry = registry
+        self.host = host or config.METRICS_HOST
+        self.port = port if port is not None else config.METRICS_PORT
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+    async def start(self):
+        """Start serving; a port of 0 disables the exporter."""
+        if not self.port or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"📊 Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+import config
+
+class TokenBucket:
+    """Token bucket for one Trakt rate-limit budget."""
+
+    def __init__(self, name: str, limit: int, period: float):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.period
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(float(self.limit), self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token if one is available, otherwise return seconds to wait."""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block_for(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def update_from_server(self, limit: Optional[int], period: Optional[float],
+                           remaining: Optional[int], reset_in: Optional[float]):
+        """Align the bucket with the budget Trakt reports."""
+        if limit and period:
+            self.limit = int(limit)
+            self.period = float(period)
+        self._refill(time.monotonic())
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0 and reset_in and reset_in > 0:
+                self.block_for(reset_in)
+
+class RateLimitScheduler:
+    """Queue Trakt requests against separate GET and POST budgets.
+
+    Trakt counts authenticated calls against the user whose token they
+    carry, so every access token gets its own GET and POST buckets and a
+    user who runs out (or gets an X-Ratelimit remaining=0) only stalls their
+    own requests. The shared 'GET'/'POST' buckets are kept for app-level,
+    unauthenticated traffic.
+    """
+
+    def __init__(self, get_limit: int = None, get_period: float = None,
+                 post_limit: int = None, post_period: float = None, max_user_buckets: int = 1024):
+        self.limits = {
+            'GET': (
+                get_limit if get_limit is not None else config.TRAKT_GET_LIMIT,
+                get_period if get_period is not None else config.TRAKT_GET_PERIOD
+            ),
+            'POST': (
+                post_limit if post_limit is not None else config.TRAKT_POST_LIMIT,
+                post_period if post_period is not None else config.TRAKT_POST_PERIOD
+            )
+        }
+        self.buckets = {name: TokenBucket(name, limit, period) for name, (limit, period) in self.limits.items()}
+        self.user_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.max_user_buckets = max_user_buckets
+        self._stats = {
+            name: {'queued': 0, 'requests': 0, 'delayed': 0, 'total_wait': 0.0, 'max_wait': 0.0, 'rate_limited': 0}
+            for name in self.buckets
+        }
+
+    def _bucket_name(self, method: str) -> str:
+        return 'GET' if method.upper() in ('GET', 'HEAD') else 'POST'
+
+    def _bucket(self, name: str, key: Optional[str]) -> TokenBucket:
+        """Get the app bucket, or the bucket for the user identified by key."""
+        if key is None:
+            return self.buckets[name]
+        bucket = self.user_buckets.get((name, key))
+        if bucket is None:
+            if len(self.user_buckets) >= self.max_user_buckets:
+                self._prune_user_buckets()
+            limit, period = self.limits[name]
+            bucket = self.user_buckets[(name, key)] = TokenBucket(name, limit, period)
+        return bucket
+
+    def _prune_user_buckets(self):
+        """Forget user buckets that have refilled and have nobody waiting on them."""
+        now = time.monotonic()
+        for bucket_key, bucket in list(self.user_buckets.items()):
+            bucket._refill(now)
+            if bucket.tokens >= bucket.limit and bucket.blocked_until <= now and not bucket.lock.locked():
+                del self.user_buckets[bucket_key]
+
+    async def acquire(self, method: str, key: Optional[str] = None) -> float:
+        """Wait for a token in the method's budget and return the time spent waiting.
+
+        key identifies the user the request is made for (e.g. its access
+        token); requests without one share the app budget.
+        """
+        name = self._bucket_name(method)
+        bucket = self._bucket(name, key)
+        stats = self._stats[name]
+
+        stats['queued'] += 1
+        start = time.monotonic()
+        try:
+            async with bucket.lock:
+                while True:
+                    delay = bucket.reserve()
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+        finally:
+            stats['queued'] -= 1
+
+        waited = time.monotonic() - start
+        stats['requests'] += 1
+        stats['total_wait'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+        if waited > 0.001:
+            stats['delayed'] += 1
+        return waited
+
+    def observe(self, method: str, status: int, headers: Dict[str, str], key: Optional[str] = None) -> Optional[float]:
+        """Feed response headers back into the budget the request was made from.
+
+        Returns the number of seconds to wait before retrying when the
+        request was rejected with 429, otherwise None.
+        """
+        name = self._bucket_name(method)
+        bucket = self._bucket(name, key)
+
+        header = headers.get('X-Ratelimit') or headers.get('x-ratelimit')
+        if header:
+            info = self._parse_ratelimit_header(header)
+            if info:
+                bucket.update_from_server(info.get('limit'), info.get('period'),
+                                          info.get('remaining'), info.get('reset_in'))
+
+        if status != 429:
+            return None
+
+        self._stats[name]['rate_limited'] += 1
+        retry_after = self._parse_retry_after(headers.get('Retry-After') or headers.get('retry-after'))
+        if retry_after is None:
+            retry_after = 1.0 / bucket.rate
+        bucket.block_for(retry_after)
+        return retry_after
+
+    def _parse_ratelimit_header(self, header: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = json.loads(header)
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        info = {
+            'limit': data.get('limit'),
+            'period': data.get('period'),
+            'remaining': data.get('remaining'),
+            'reset_in': None
+        }
+        until = data.get('until')
+        if until:
+            try:
+                until_date = datetime.fromisoformat(until.replace('Z', '+00:00'))
+                info['reset_in'] = until_date.timestamp() - time.time()
+            except (ValueError, AttributeError):
+                pass
+        return info
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get queue depth and wait time per budget, across the app and all users."""
+        snapshot = {}
+        for name, stats in self._stats.items():
+            bucket = self.buckets[name]
+            snapshot[name] = {
+                'queue_depth': stats['queued'],
+                'requests': stats['requests'],
+                'delayed': stats['delayed'],
+                'rate_limited': stats['rate_limited'],
+                'avg_wait': stats['total_wait'] / stats['requests'] if stats['requests'] else 0.0,
+                'max_wait': stats['max_wait'],
+                'limit': bucket.limit,
+                'period': bucket.period,
+                'user_buckets': sum(1 for bucket_name, _ in self.user_buckets if bucket_name == name)
+            }
+        return snapshot
@@ -0,0 +1,78 @@
+from collections.abc import Mapping
+from typing import Dict, Any, Optional
+
+class Record(Mapping):
+    """Slotted record that reads like the dict it replaces.
+
+    Handlers keep using record['field'] and record.get('field'), but the
+    mapping is read-only: only the Database changes records, through
+    their attributes. Records are stored as plain objects in JSON; the
+    key field (e.g. discord_id) is the key they're stored under.
+    """
+
+    __slots__ = ()
+    _defaults: Dict[str, Any] = {}
+    _key: Optional[str] = None
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            if field in values:
+                value = values[field]
+            else:
+                value = self._defaults.get(field)
+                if isinstance(value, list):
+                    value = list(value)
+            setattr(self, field, value)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], key: Optional[str] = None):
+        """Build a record from its stored JSON object and the key it's stored under."""
+        values = {field: data[field] for field in cls.__slots__ if field in data}
+        if cls._key:
+            values[cls._key] = key
+        return cls(**values)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__ if field != self._key}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class User(Record):
+    __slots__ = ('discord_id', 'trakt_username', 'access_token', 'refresh_token',
+                 'expires_in', 'created_at', 'is_public', 'connected_at')
+    _defaults = {'trakt_username': '', 'access_token': '', 'refresh_token': '',
+                 'is_public': False, 'connected_at': ''}
+    _key = 'discord_id'
+
+class Reminder(Record):
+    __slots__ = ('show_name', 'hours_before', 'message', 'added_at')
+    _defaults = {'hours_before': 1, 'message': ''}
+
+class ArenaParticipant(Record):
+    __slots__ = ('discord_id', 'username', 'points', 'challenges_won', 'team',
+                 'joined_at', 'completed_challenges')
+    _defaults = {'username': '', 'points': 0, 'challenges_won': 0, 'completed_challenges': []}
+    _key = 'discord_id'
+
+class ArenaTeam(Record):
+    __slots__ = ('name', 'members', 'points')
+    _defaults = {'members': [], 'points': 0}
+
+def encode_record(obj: Any) -> Any:
+    """json.dumps default= hook: records as their JSON objects, anything else as a string."""
+    if isinstance(obj, Record):
+        return obj.to_json()
+    return str(obj)
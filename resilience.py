@@ -0,0 +1,108 @@
+import random
+import time
+from typing import Dict, Any, Iterable
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a circuit breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Trakt {name} requests are failing, not retrying for {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+class RetryPolicy:
+    """How often and how long to retry one class of requests.
+
+    Backoff is exponential with full jitter: attempt n waits a random time
+    between 0 and min(max_delay, base_delay * 2**n).
+    """
+
+    def __init__(self, name: str, max_attempts: int, base_delay: float = 0.5, max_delay: float = 8.0,
+                 retry_statuses: Iterable[int] = (500, 502, 503, 504, 520, 521, 522, 524)):
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self._stats = {'requests': 0, 'retries': 0, 'recovered': 0, 'gave_up': 0}
+
+    def should_retry(self, attempt: int) -> bool:
+        """Whether another attempt is allowed after attempt (0-based) failed."""
+        return attempt + 1 < self.max_attempts
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retrying after attempt (0-based) failed."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def record(self, attempts: int, succeeded: bool):
+        """Count one finished request that took the given number of attempts."""
+        self._stats['requests'] += 1
+        self._stats['retries'] += attempts - 1
+        if attempts > 1 and succeeded:
+            self._stats['recovered'] += 1
+        if not succeeded:
+            self._stats['gave_up'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get retry counters for this request class."""
+        stats = dict(self._stats)
+        stats['max_attempts'] = self.max_attempts
+        return stats
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, then let one probe through after a cool-down.
+
+    closed: requests flow and consecutive failures are counted.
+    open: requests are rejected until reset_timeout has passed.
+    half_open: one probe was let through; success closes, failure reopens.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._stats = {'opened': 0, 'rejected': 0}
+
+    def check(self):
+        """Raise CircuitOpenError if a request shouldn't be sent right now."""
+        if self.state == 'closed':
+            return
+
+        now = time.monotonic()
+        elapsed = now - self.opened_at
+        if elapsed >= self.reset_timeout:
+            # Cool-down is over, or the last probe never reported back
+            self.state = 'half_open'
+            self.opened_at = now
+            return
+
+        self._stats['rejected'] += 1
+        raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+            self._stats['opened'] += 1
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are being rejected or only probing."""
+        return self.state != 'closed'
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the breaker state and how often it opened or rejected requests."""
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened': self._stats['opened'],
+            'rejected': self._stats['rejected']
+        }
@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import deadline
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one outstanding call.
+
+    The first caller starts the work as a task; anyone asking for the same
+    key while it runs awaits that task instead of starting their own. A
+    caller being cancelled doesn't cancel the shared work for the others.
+
+    The task runs in a context of its own whose deadline is the longest
+    among the callers waiting on it, so a caller with a tight deadline can't
+    cut the work short for one with more time. Each caller still only waits
+    until its own deadline.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Tuple[asyncio.Task, contextvars.Context]] = {}
+        self._stats = {'calls': 0, 'shared': 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the call already running for it."""
+        deadline_at = deadline.current()
+        call = self._calls.get(key)
+        if call is None:
+            self._stats['calls'] += 1
+            context = contextvars.Context()
+            deadline.set_in(context, deadline_at)
+            task = asyncio.get_running_loop().create_task(fn(), context=context)
+            self._calls[key] = (task, context)
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        else:
+            self._stats['shared'] += 1
+            task, context = call
+            deadline.extend_in(context, deadline_at)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), deadline.remaining())
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            raise deadline.DeadlineExceeded("Deadline passed while waiting for a shared call")
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get how many calls ran and how many callers joined one already running."""
+        return {
+            'calls': self._stats['calls'],
+            'shared': self._stats['shared'],
+            'in_flight': len(self._calls)
+        }
@@ -1,19 +1,26 @@
 import discord
 from discord import app_commands
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from images import poster_url, item_poster_url
+from deadline import gather_partial
+from sync_engine import count_watches
 
 # Initialize these as None and set them later
 bot = None
 trakt_api = None
 db = None
+sync_engine = None
+token_manager = None
 
-def init_social(discord_bot, api, database):
+def init_social(discord_bot, api, database, sync=None, tokens=None):
     """Initialize the social module with shared objects"""
-    global bot, trakt_api, db
+    global bot, trakt_api, db, sync_engine, token_manager
     bot = discord_bot
     trakt_api = api
     db = database
+    sync_engine = sync
+    token_manager = tokens
     
     # Register all social commands
     register_social_commands()
@@ -42,7 +49,7 @@ def register_social_commands():
                 return
             username = current_user['trakt_username']
         
-        watching = trakt_api.get_watching_now(username)
+        watching = await trakt_api.get_watching_now(username)
         
         if not watching:
             name = f"**{username}**" if user else "You"
@@ -75,9 +82,9 @@ def register_social_commands():
             )
         
         # Add poster
-        tmdb_id = content.get('ids', {}).get('tmdb')
-        if tmdb_id:
-            embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+        poster = item_poster_url(watching)
+        if poster:
+            embed.set_thumbnail(url=poster)
         
         await interaction.followup.send(embed=embed)
 
@@ -108,7 +115,7 @@ def register_social_commands():
                 return
             username = current_user['trakt_username']
         
-        history = trakt_api.get_user_history(username, count)
+        history = await trakt_api.get_user_history(username, count)
         
         if not history:
             name = f"**{username}**" if user else "You"
@@ -155,9 +162,9 @@ def register_social_commands():
         # Add poster from most recent item
         if history:
             recent_content = history[0].get('show') or history[0].get('movie')
-            tmdb_id = recent_content.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = item_poster_url(history[0])
+            if poster:
+                embed.set_thumbnail(url=poster)
         
         await interaction.followup.send(embed=embed)
 
@@ -170,12 +177,12 @@ def register_social_commands():
             await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
             return
         
-        profile = trakt_api.get_user_profile(user['access_token'])
+        profile = await trakt_api.get_user_profile(user['access_token'])
         if not profile:
             await interaction.followup.send("❌ Failed to get your profile information.")
             return
         
-        history = trakt_api.get_user_history(user['trakt_username'], 50)
+        history = await trakt_api.get_user_history(user['trakt_username'], 50)
         reminders = db.get_user_reminders(str(interaction.user.id))
         
         embed = discord.Embed(
@@ -270,16 +277,16 @@ def register_social_commands():
         # Get comprehensive profile data
         try:
             # Get profile info
-            profile = trakt_api.get_user_profile(username if user else current_user['access_token'])
+            profile = await trakt_api.get_user_profile(username if user else current_user['access_token'])
             if not profile:
                 await interaction.followup.send("❌ Failed to load profile data. Please try again.")
                 return
 
             # Get recent activity
-            history = trakt_api.get_user_history(username, 10)
+            history = await trakt_api.get_user_history(username, 10)
             
             # Get current watching
-            watching = trakt_api.get_watching_now(username)
+            watching = await trakt_api.get_watching_now(username)
             
             # Get reminders (only for own profile)
             reminders = []
@@ -386,9 +393,9 @@ def register_social_commands():
             # Add poster from most recent watch
             if history:
                 recent_content = history[0].get('show') or history[0].get('movie')
-                tmdb_id = recent_content.get('ids', {}).get('tmdb')
-                if tmdb_id:
-                    embed.set_image(url=f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg")
+                poster = item_poster_url(history[0], 'w500')
+                if poster:
+                    embed.set_image(url=poster)
 
             await interaction.followup.send(embed=embed)
 
@@ -423,9 +430,13 @@ def register_social_commands():
         trending_movies = {}
         active_users = []
         
-        for user in public_users:
+        # Ask for everyone at once; users who don't answer within the deadline are skipped
+        results, checked = await gather_partial(
+            trakt_api.get_watching_now(user['trakt_username']) for user in public_users
+        )
+        
+        for user, watching in zip(public_users, results):
             try:
-                watching = trakt_api.get_watching_now(user['trakt_username'])
                 if watching:
                     currently_watching.append({'user': user, 'watching': watching})
                     
@@ -449,6 +460,19 @@ def register_social_commands():
             inline=False
         )
         
+        if trakt_api.is_degraded('GET /users/{id}/watching'):
+            embed.add_field(
+                name="⚠️ Trakt Unavailable",
+                value="Trakt.tv isn't responding right now, so live activity may be incomplete.",
+                inline=False
+            )
+        elif checked < len(public_users):
+            embed.add_field(
+                name="⏳ Partial Results",
+                value=f"Trakt was slow, so only {checked} of {len(public_users)} members could be checked in time.",
+                inline=False
+            )
+        
         # Show trending content
         if trending_shows or trending_movies:
             trending_text = ""
@@ -505,20 +529,20 @@ def register_social_commands():
         # Add poster from most popular content
         if trending_shows:
             top_show = max(trending_shows.items(), key=lambda x: x[1])[0]
-            search_results = trakt_api.search_content(top_show, 'show')
+            search_results = await trakt_api.search_content(top_show, 'show')
             if search_results:
                 content = search_results[0].get('show')
-                tmdb_id = content.get('ids', {}).get('tmdb')
-                if tmdb_id:
-                    embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                poster = poster_url(content, 'show')
+                if poster:
+                    embed.set_thumbnail(url=poster)
         elif trending_movies:
             top_movie = max(trending_movies.items(), key=lambda x: x[1])[0]
-            search_results = trakt_api.search_content(top_movie, 'movie')
+            search_results = await trakt_api.search_content(top_movie, 'movie')
             if search_results:
                 content = search_results[0].get('movie')
-                tmdb_id = content.get('ids', {}).get('tmdb')
-                if tmdb_id:
-                    embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                poster = poster_url(content, 'movie')
+                if poster:
+                    embed.set_thumbnail(url=poster)
         
         embed.set_footer(text="🔄 Live data • Use /public to join the community watch!")
         await interaction.followup.send(embed=embed)
@@ -554,9 +578,19 @@ def register_social_commands():
         total_movies = 0
         most_active_users = {}
         
-        for user in public_users:
+        async def load_history(user):
+            history = sync_engine.get_recent_history(user['discord_id'], 50) if sync_engine else None
+            if history is None:
+                history = await trakt_api.get_user_history(user['trakt_username'], 50)
+            return history
+        
+        # Load everyone at once; users who don't answer within the deadline are skipped
+        histories, checked = await gather_partial(load_history(user) for user in public_users)
+        
+        for user, history in zip(public_users, histories):
             try:
-                history = trakt_api.get_user_history(user['trakt_username'], 50)
+                if not history:
+                    continue
                 
                 user_activity = 0
                 for item in history:
@@ -591,6 +625,13 @@ def register_social_commands():
             inline=False
         )
         
+        if checked < len(public_users):
+            embed.add_field(
+                name="⏳ Partial Results",
+                value=f"Trakt was slow, so only {checked} of {len(public_users)} members are included.",
+                inline=False
+            )
+        
         # Top trending shows
         if all_shows:
             top_shows = sorted(all_shows.items(), key=lambda x: x[1], reverse=True)[:5]
@@ -620,22 +661,24 @@ def register_social_commands():
         
         # Add poster from top trending content
         top_content = None
+        top_content_type = 'show'
         if all_shows:
             top_show = max(all_shows.items(), key=lambda x: x[1])[0]
-            search_results = trakt_api.search_content(top_show, 'show')
+            search_results = await trakt_api.search_content(top_show, 'show')
             if search_results:
                 top_content = search_results[0].get('show')
         
         if not top_content and all_movies:
             top_movie = max(all_movies.items(), key=lambda x: x[1])[0] 
-            search_results = trakt_api.search_content(top_movie, 'movie')
+            search_results = await trakt_api.search_content(top_movie, 'movie')
             if search_results:
                 top_content = search_results[0].get('movie')
+                top_content_type = 'movie'
         
         if top_content:
-            tmdb_id = top_content.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = poster_url(top_content, top_content_type)
+            if poster:
+                embed.set_thumbnail(url=poster)
         
         # Fun stats
         if total_episodes > 0 or total_movies > 0:
@@ -720,24 +763,39 @@ def register_social_commands():
         total_community_episodes = 0
         total_community_movies = 0
         
-        for user in public_users:
+        # Only pages inside the window are fetched; all time reads the full history of unsynced users
+        start_at = datetime.now(timezone.utc) - timedelta(days=days_back) if timeframe != "all" else None
+        
+        async def load_counts(user):
+            # Synced users are counted locally without touching Trakt, all time from running totals
+            if sync_engine:
+                if start_at is None:
+                    counts = sync_engine.get_counts(user['discord_id'])
+                else:
+                    history = sync_engine.get_history(user['discord_id'], start_at)
+                    counts = count_watches(history) if history is not None else None
+                if counts is not None:
+                    return counts
+            counts = {'movies': 0, 'episodes': 0}
+            async for item in trakt_api.iter_user_history(user['trakt_username'], start_at=start_at):
+                if 'show' in item:
+                    counts['episodes'] += 1
+                elif 'movie' in item:
+                    counts['movies'] += 1
+            return counts
+        
+        # Load everyone at once; users who don't answer within the deadline are skipped
+        all_counts, checked = await gather_partial(load_counts(user) for user in public_users)
+        
+        for user, counts in zip(public_users, all_counts):
             try:
-                history = trakt_api.get_user_history(user['trakt_username'], 100)
-                
-                episodes_count = 0
-                movies_count = 0
+                if not counts:
+                    continue
                 
-                for item in history:
-                    watched_date = datetime.fromisoformat(item['watched_at'].replace('Z', '+00:00'))
-                    days_ago = (datetime.now().replace(tzinfo=watched_date.tzinfo) - watched_date).days
-                    
-                    if days_ago <= days_back:
-                        if 'show' in item:
-                            episodes_count += 1
-                            total_community_episodes += 1
-                        elif 'movie' in item:
-                            movies_count += 1
-                            total_community_movies += 1
+                episodes_count = counts['episodes']
+                movies_count = counts['movies']
+                total_community_episodes += episodes_count
+                total_community_movies += movies_count
                 
                 # Calculate the score based on category
                 if category == "episodes":
@@ -844,18 +902,21 @@ def register_social_commands():
             # Try to get recent popular content for thumbnail
             try:
                 sample_user = public_users[0]
-                recent_history = trakt_api.get_user_history(sample_user['trakt_username'], 5)
+                recent_history = await trakt_api.get_user_history(sample_user['trakt_username'], 5)
                 if recent_history:
                     recent_item = recent_history[0]
                     content = recent_item.get('show') or recent_item.get('movie')
                     if content:
-                        tmdb_id = content.get('ids', {}).get('tmdb')
-                        if tmdb_id:
-                            embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                        poster = item_poster_url(recent_item)
+                        if poster:
+                            embed.set_thumbnail(url=poster)
             except:
                 pass
         
-        embed.set_footer(text=f"🏆 {emoji} {timeframe_title} leaderboard • Use /public to compete!")
+        footer_text = f"🏆 {emoji} {timeframe_title} leaderboard • Use /public to compete!"
+        if checked < len(public_users):
+            footer_text += f" • ⏳ {checked}/{len(public_users)} members loaded in time"
+        embed.set_footer(text=footer_text)
         await interaction.followup.send(embed=embed)
 
     @bot.tree.command(name="compare", description="Compare watching habits between two users")
@@ -905,8 +966,8 @@ def register_social_commands():
         
         try:
             # Get user histories
-            user1_history = trakt_api.get_user_history(user1_username, 100)
-            user2_history = trakt_api.get_user_history(user2_username, 100)
+            user1_history = await trakt_api.get_user_history(user1_username, 100, extended=True)
+            user2_history = await trakt_api.get_user_history(user2_username, 100, extended=True)
             
             if not user1_history or not user2_history:
                 await interaction.followup.send("❌ Not enough data to compare users.")
@@ -1025,36 +1086,18 @@ def register_social_commands():
             user1_genres = {}
             user2_genres = {}
             
-            # Get detailed info for genre analysis (sample recent items)
+            # Genres come with the extended history; hydrate only fills gaps (sample recent items)
+            await trakt_api.hydrator.hydrate(user1_history[:20] + user2_history[:20], ('genres',))
+            
             for item in user1_history[:20]:
                 content = item.get('show') or item.get('movie')
-                content_type = 'show' if 'show' in item else 'movie'
-                try:
-                    if content_type == 'show':
-                        detailed = trakt_api.get_show_info(str(content['ids']['trakt']))
-                    else:
-                        detailed = trakt_api.get_movie_info(str(content['ids']['trakt']))
-                    
-                    if detailed and detailed.get('genres'):
-                        for genre in detailed['genres']:
-                            user1_genres[genre] = user1_genres.get(genre, 0) + 1
-                except:
-                    continue
+                for genre in (content or {}).get('genres') or []:
+                    user1_genres[genre] = user1_genres.get(genre, 0) + 1
             
             for item in user2_history[:20]:
                 content = item.get('show') or item.get('movie')
-                content_type = 'show' if 'show' in item else 'movie'
-                try:
-                    if content_type == 'show':
-                        detailed = trakt_api.get_show_info(str(content['ids']['trakt']))
-                    else:
-                        detailed = trakt_api.get_movie_info(str(content['ids']['trakt']))
-                    
-                    if detailed and detailed.get('genres'):
-                        for genre in detailed['genres']:
-                            user2_genres[genre] = user2_genres.get(genre, 0) + 1
-                except:
-                    continue
+                for genre in (content or {}).get('genres') or []:
+                    user2_genres[genre] = user2_genres.get(genre, 0) + 1
             
             # Show top genres
             if user1_genres and user2_genres:
@@ -1117,12 +1160,12 @@ def register_social_commands():
             if shared_content:
                 try:
                     shared_title = list(shared_content)[0]
-                    search_results = trakt_api.search_content(shared_title)
+                    search_results = await trakt_api.search_content(shared_title)
                     if search_results:
                         content = search_results[0].get('show') or search_results[0].get('movie')
-                        tmdb_id = content.get('ids', {}).get('tmdb')
-                        if tmdb_id:
-                            embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+                        poster = item_poster_url(search_results[0])
+                        if poster:
+                            embed.set_thumbnail(url=poster)
                 except:
                     pass
             
@@ -1258,40 +1301,24 @@ def register_social_commands():
         # Validate against Trakt data
         await interaction.followup.send("🔍 Checking your Trakt watch history...", ephemeral=True)
         
-        # Try to refresh token if needed
+        # The token manager refreshes tokens ahead of expiry, so this is normally just a lookup
         validation_result = None
-        access_token = user['access_token']
+        if token_manager:
+            access_token = await token_manager.get_access_token(str(interaction.user.id))
+        else:
+            access_token = user['access_token']
         
-        try:
-            validation_result = trakt_api.validate_arena_challenge(
-                access_token, 
-                challenge, 
-                challenge_start
-            )
-        except Exception as e:
-            print(f"First validation attempt failed: {e}")
-            
-            # Try refreshing the token
+        if not access_token:
+            validation_result = {'valid': False, 'reason': 'Authentication error. Please reconnect your Trakt account.'}
+        else:
             try:
-                token_response = trakt_api.refresh_token(user['refresh_token'])
-                if token_response:
-                    new_access_token = token_response['access_token']
-                    new_refresh_token = token_response['refresh_token']
-                    
-                    # Update tokens in database
-                    db.update_user_tokens(str(interaction.user.id), new_access_token, new_refresh_token)
-                    
-                    # Retry validation with new token
-                    validation_result = trakt_api.validate_arena_challenge(
-                        new_access_token, 
-                        challenge, 
-                        challenge_start
-                    )
-                else:
-                    validation_result = {'valid': False, 'reason': 'Failed to refresh authentication token'}
-            except Exception as refresh_error:
-                print(f"Token refresh failed: {refresh_error}")
-                validation_result = {'valid': False, 'reason': 'Authentication error. Please reconnect your Trakt account.'}
+                validation_result = await trakt_api.validate_arena_challenge(
+                    access_token, 
+                    challenge, 
+                    challenge_start
+                )
+            except Exception as e:
+                print(f"Arena validation failed: {e}")
         
         if not validation_result or not validation_result['valid']:
             reason = validation_result.get('reason', 'Unknown validation error') if validation_result else 'Validation system error'
@@ -1346,11 +1373,7 @@ def register_social_commands():
         
         if success:
             validated_movie = validation_result.get('movie', {})
-            participant = None
-            for p in db.get_arena_participants():
-                if p['discord_id'] == str(interaction.user.id):
-                    participant = p
-                    break
+            participant = db.get_arena_participant(str(interaction.user.id))
             
             embed = discord.Embed(
                 title="🏆 Challenge Completed!",
@@ -1432,11 +1455,7 @@ def register_social_commands():
             return
         
         user = db.get_user(str(interaction.user.id))
-        participant = None
-        for p in db.get_arena_participants():
-            if p['discord_id'] == str(interaction.user.id):
-                participant = p
-                break
+        participant = db.get_arena_participant(str(interaction.user.id))
         
         if not participant:
             await interaction.followup.send("❌ Arena data not found!", ephemeral=True)
@@ -1488,13 +1507,10 @@ def register_social_commands():
                 # Calculate team points
                 team_points = 0
                 team_wins = 0
-                participants = db.get_arena_participants()
                 
-                for member_username in team_info['members']:
-                    for p in participants:
-                        if p['username'] == member_username:
-                            team_points += p.get('points', 0)
-                            team_wins += p.get('challenges_won', 0)
+                for p in db.get_team_members(user_team):
+                    team_points += p.get('points', 0)
+                    team_wins += p.get('challenges_won', 0)
                 
                 embed.add_field(
                     name=f"👥 {user_team} Stats",
@@ -1694,20 +1710,16 @@ def register_social_commands():
                 team_wins = 0
                 team_members_detail = []
                 
-                for member_username in team['members']:
-                    # Find participant data
-                    for participant in participants:
-                        if participant['username'] == member_username:
-                            points = participant.get('points', 0)
-                            wins = participant.get('challenges_won', 0)
-                            team_points += points
-                            team_wins += wins
-                            team_members_detail.append({
-                                'username': member_username,
-                                'points': points,
-                                'wins': wins
-                            })
-                            break
+                for participant in db.get_team_members(team['name']):
+                    points = participant.get('points', 0)
+                    wins = participant.get('challenges_won', 0)
+                    team_points += points
+                    team_wins += wins
+                    team_members_detail.append({
+                        'username': participant['username'],
+                        'points': points,
+                        'wins': wins
+                    })
                 
                 team_stats.append({
                     'name': team['name'],
@@ -2029,13 +2041,9 @@ class ArenaView(discord.ui.View):
             team_points = 0
             team_wins = 0
             
-            for member_username in team['members']:
-                # Find participant data
-                for participant in participants:
-                    if participant['username'] == member_username:
-                        team_points += participant.get('points', 0)
-                        team_wins += participant.get('challenges_won', 0)
-                        break
+            for participant in db.get_team_members(team['name']):
+                team_points += participant.get('points', 0)
+                team_wins += participant.get('challenges_won', 0)
             
             team_stats.append({
                 'name': team['name'],
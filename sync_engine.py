@@ -0,0 +1,228 @@
+from datetime import datetime
+from typing import Optional, Dict, List, Any
+import config
+
+# Activity timestamps in /sync/last_activities that move when each section changes
+ACTIVITY_FIELDS = {
+    'history': [('movies', 'watched_at'), ('episodes', 'watched_at')]
+}
+
+def count_watches(history: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count the episodes and movies in a list of history entries."""
+    counts = {'movies': 0, 'episodes': 0}
+    for item in history:
+        _add_watch(counts, item)
+    return counts
+
+def _add_watch(counts: Dict[str, int], item: Dict[str, Any]):
+    if 'show' in item:
+        counts['episodes'] += 1
+    elif 'movie' in item:
+        counts['movies'] += 1
+
+class SyncEngine:
+    """Keep a local copy of each public user's recent watch history.
+
+    Every cycle costs one /sync/last_activities call per public user. A
+    section is only fetched again when its activity timestamp moved since
+    the cursor stored in the database, and new history is read page by page
+    until it reaches an entry that is already known. Only the fields the
+    community commands read are kept for each entry, plus running totals of
+    every movie and episode watched, so all-time counts never need the
+    whole history.
+    """
+
+    def __init__(self, api, db, history_limit: int = None, tokens=None):
+        self.api = api
+        self.db = db
+        self.tokens = tokens
+        self.history_limit = history_limit if history_limit is not None else config.SYNC_HISTORY_LIMIT
+        self._stats = {'cycles': 0, 'users_checked': 0, 'users_idle': 0, 'sections_fetched': 0, 'errors': 0}
+
+    def _activity_cursor(self, activities: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """Reduce last_activities to one timestamp per synced section."""
+        cursor = {'all': activities.get('all')}
+        for section, fields in ACTIVITY_FIELDS.items():
+            stamps = [activities.get(group, {}).get(field) for group, field in fields]
+            stamps = [stamp for stamp in stamps if stamp]
+            # Trakt timestamps share one ISO format, so they sort as strings
+            cursor[section] = max(stamps) if stamps else None
+        return cursor
+
+    def _slim(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the fields of a history entry that synced readers use."""
+        slim = {'id': item.get('id'), 'watched_at': item.get('watched_at'), 'type': item.get('type')}
+        for key in ('movie', 'show'):
+            if key in item:
+                content = item[key]
+                slim[key] = {'title': content.get('title'), 'ids': content.get('ids', {})}
+        return slim
+
+    async def _fetch_history(self, access_token: str, known: List[Dict[str, Any]],
+                             counts: Dict[str, int]) -> Dict[str, Any]:
+        """Read new history entries, falling back to a full read when none are new.
+
+        Pages are read strictly: a failed page raises instead of passing a
+        partial history off as the whole window. Every entry read is added
+        to the running counts, including those past the stored window.
+        """
+        known_ids = {item.get('id') for item in known}
+        new_items = []
+        new_counts = {'movies': 0, 'episodes': 0}
+        complete = True
+
+        if known_ids:
+            reached_known = False
+            async for item in self.api.iter_user_history(access_token=access_token, strict=True):
+                if item.get('id') in known_ids:
+                    reached_known = True
+                    break
+                _add_watch(new_counts, item)
+                if len(new_items) < self.history_limit:
+                    new_items.append(self._slim(item))
+                else:
+                    complete = False
+            if reached_known:
+                new_counts = {kind: counts.get(kind, 0) + new_counts[kind] for kind in new_counts}
+            else:
+                # None of the known entries are left, so the whole history was just read
+                known = []
+
+        if new_items:
+            history = new_items + [self._slim(item) for item in known]
+            if len(history) > self.history_limit:
+                history = history[:self.history_limit]
+                complete = False
+            return {'history': history, 'complete': complete, 'counts': new_counts}
+
+        # First sync, or the change wasn't a new entry on top (a removal or a
+        # backdated watch), so read the whole history again: the window is
+        # kept and everything is counted
+        history = []
+        counts = {'movies': 0, 'episodes': 0}
+        async for item in self.api.iter_user_history(access_token=access_token, strict=True):
+            _add_watch(counts, item)
+            if len(history) < self.history_limit:
+                history.append(self._slim(item))
+            else:
+                complete = False
+        return {'history': history, 'complete': complete, 'counts': counts}
+
+    async def sync_user(self, discord_id: str) -> Dict[str, bool]:
+        """Bring one user's synced data up to date and return which sections changed.
+
+        A section's cursor only moves once that section was read in full, so
+        a failed read is retried on the next cycle and the stored copy is
+        left as it was.
+        """
+        changed = {section: False for section in ACTIVITY_FIELDS}
+        user = self.db.get_user(discord_id)
+        if not user or not user.get('access_token'):
+            return changed
+        access_token = await self.tokens.get_access_token(discord_id) if self.tokens else user['access_token']
+        if not access_token:
+            return changed
+
+        self._stats['users_checked'] += 1
+        activities = await self.api.get_last_activities(access_token)
+        if activities is None:
+            self._stats['errors'] += 1
+            return changed
+
+        cursor = self._activity_cursor(activities)
+        # Work on a copy so a failed section never leaves half an update behind
+        state = dict(self.db.get_sync_state(discord_id) or {})
+        if 'counts' not in state:
+            # Synced before running counts were kept: read everything again once
+            state = {}
+        previous = state.get('cursor', {})
+        if previous and previous.get('all') == cursor['all']:
+            self._stats['users_idle'] += 1
+            return changed
+
+        new_cursor = dict(previous)
+        failed = False
+        for section in ACTIVITY_FIELDS:
+            if section in state and previous.get(section) == cursor[section]:
+                continue
+
+            try:
+                result = await self._fetch_history(access_token, state.get('history', []), state.get('counts', {}))
+            except Exception as e:
+                failed = True
+                self._stats['errors'] += 1
+                print(f"Error syncing {section} for user {discord_id}: {e}")
+                continue
+
+            state['history'] = result['history']
+            state['history_complete'] = result['complete']
+            state['counts'] = result['counts']
+            new_cursor[section] = cursor[section]
+            changed[section] = True
+            self._stats['sections_fetched'] += 1
+
+        if not any(changed.values()):
+            return changed
+
+        # 'all' is what marks the user idle, so it only moves once every section caught up
+        new_cursor['all'] = previous.get('all') if failed else cursor['all']
+        state['cursor'] = new_cursor
+        state['synced_at'] = datetime.now().isoformat()
+        self.db.set_sync_state(discord_id, state)
+        return changed
+
+    async def sync_all(self) -> int:
+        """Sync every public user and return how many had changes.
+
+        Synced history only serves the community commands, which only read
+        public profiles, so private users are never fetched.
+        """
+        self._stats['cycles'] += 1
+        updated = 0
+        for user in self.db.get_public_users():
+            discord_id = user['discord_id']
+            try:
+                changed = await self.sync_user(discord_id)
+                if any(changed.values()):
+                    updated += 1
+            except Exception as e:
+                self._stats['errors'] += 1
+                print(f"Error syncing user {discord_id}: {e}")
+        return updated
+
+    def get_history(self, discord_id: str, since: Optional[datetime] = None) -> Optional[List[Dict[str, Any]]]:
+        """Get synced history newer than since, or None if the synced copy doesn't cover it."""
+        state = self.db.get_sync_state(discord_id)
+        if not state or 'history' not in state:
+            return None
+
+        history = state['history']
+        if since is None:
+            return history if state.get('history_complete') else None
+
+        items = []
+        for item in history:
+            watched_at = datetime.fromisoformat(item['watched_at'].replace('Z', '+00:00'))
+            if watched_at < since:
+                return items
+            items.append(item)
+        # Ran out of synced entries before reaching the start of the window
+        return items if state.get('history_complete') else None
+
+    def get_recent_history(self, discord_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Get the latest limit synced history entries, or None if the user isn't synced."""
+        state = self.db.get_sync_state(discord_id)
+        if not state or 'history' not in state:
+            return None
+        if len(state['history']) < limit and not state.get('history_complete'):
+            return None
+        return state['history'][:limit]
+
+    def get_counts(self, discord_id: str) -> Optional[Dict[str, int]]:
+        """Get how many movies and episodes a user has watched in all, or None if the user isn't synced."""
+        state = self.db.get_sync_state(discord_id)
+        return state.get('counts') if state else None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get how many users were checked, idle or fetched again."""
+        return dict(self._stats)
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Optional, Dict, Any
+import config
+
+class TokenManager:
+    """Keep users' Trakt access tokens fresh before they expire.
+
+    Expiry is recorded from each token response. A background sweep
+    refreshes tokens that are close to expiring, so handlers normally get
+    a valid token straight from the database. Refreshes are serialized per
+    user, so concurrent handlers and the sweep never spend the same
+    refresh token twice.
+    """
+
+    def __init__(self, api, db, refresh_margin: float = None, concurrency: int = 4):
+        self.api = api
+        self.db = db
+        self.refresh_margin = refresh_margin if refresh_margin is not None else config.TOKEN_REFRESH_MARGIN
+        self.concurrency = concurrency
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stats = {'refreshed': 0, 'failed': 0, 'on_demand': 0, 'sweeps': 0}
+
+    def _lock(self, discord_id: str) -> asyncio.Lock:
+        lock = self._locks.get(discord_id)
+        if lock is None:
+            lock = self._locks[discord_id] = asyncio.Lock()
+        return lock
+
+    def expires_at(self, user: Dict[str, Any]) -> Optional[float]:
+        """Unix time the user's access token expires, or None if it was never recorded."""
+        if not user.get('expires_in') or not user.get('created_at'):
+            return None
+        return float(user['created_at']) + float(user['expires_in'])
+
+    def needs_refresh(self, user: Dict[str, Any], horizon: float = 0.0) -> bool:
+        """Whether the token expires within the refresh margin (plus horizon seconds)."""
+        expires_at = self.expires_at(user)
+        if expires_at is None:
+            return False
+        margin = min(self.refresh_margin, float(user['expires_in']) / 2)
+        return expires_at - time.time() <= margin + horizon
+
+    async def get_access_token(self, discord_id: str) -> Optional[str]:
+        """Get a usable access token, refreshing first only if it is about to expire."""
+        user = self.db.get_user(discord_id)
+        if not user or not user.get('access_token'):
+            return None
+        if not self.needs_refresh(user):
+            return user['access_token']
+
+        self._stats['on_demand'] += 1
+        return await self.refresh(discord_id)
+
+    async def refresh(self, discord_id: str, horizon: float = 0.0, force: bool = False) -> Optional[str]:
+        """Refresh the user's token and return the access token to use.
+
+        Unless force is set, a token that no longer needs refreshing (for
+        example because another caller refreshed it while we waited for the
+        lock) is returned as is. If the refresh fails, the old token is
+        returned while it is still valid.
+        """
+        async with self._lock(discord_id):
+            user = self.db.get_user(discord_id)
+            if not user or not user.get('refresh_token'):
+                return None
+            if not force and self.expires_at(user) is not None and not self.needs_refresh(user, horizon):
+                return user['access_token']
+
+            token_data = await self.api.refresh_token(user['refresh_token'])
+            if not token_data or not token_data.get('access_token'):
+                self._stats['failed'] += 1
+                print(f"Failed to refresh Trakt token for user {discord_id}")
+                expires_at = self.expires_at(user)
+                if expires_at is None or expires_at > time.time():
+                    return user['access_token']
+                return None
+
+            self.db.update_user_tokens(
+                discord_id,
+                token_data['access_token'],
+                token_data.get('refresh_token', user['refresh_token']),
+                token_data.get('expires_in'),
+                token_data.get('created_at', int(time.time()))
+            )
+            self._stats['refreshed'] += 1
+            return token_data['access_token']
+
+    async def sweep(self, horizon: float = 0.0) -> int:
+        """Refresh every token expiring within the margin plus horizon seconds.
+
+        Tokens saved before expiry was recorded are refreshed once so
+        their expiry becomes known. Returns how many were refreshed.
+        """
+        self._stats['sweeps'] += 1
+        due = []
+        for discord_id, user in list(self.db.get_all_users().items()):
+            if not user.get('refresh_token'):
+                continue
+            if self.expires_at(user) is None or self.needs_refresh(user, horizon):
+                due.append(discord_id)
+        if not due:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        refreshed_before = self._stats['refreshed']
+
+        async def refresh_one(discord_id: str):
+            async with semaphore:
+                try:
+                    await self.refresh(discord_id, horizon)
+                except Exception as e:
+                    self._stats['failed'] += 1
+                    print(f"Error refreshing token for user {discord_id}: {e}")
+
+        await asyncio.gather(*(refresh_one(discord_id) for discord_id in due))
+        return self._stats['refreshed'] - refreshed_before
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get refresh counters and how many tokens expire within the margin."""
+        stats = dict(self._stats)
+        users = list(self.db.get_all_users().values())
+        stats['expiring'] = sum(1 for user in users if self.needs_refresh(user))
+        stats['unknown_expiry'] = sum(1 for user in users if user.get('refresh_token') and self.expires_at(user) is None)
+        return stats
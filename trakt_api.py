@@ -1,16 +1,369 @@
-import requests
+import asyncio
 import json
-from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Any
+import time
+import aiohttp
+from urllib.parse import urlsplit
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Any, AsyncIterator, Tuple
 import config
+from http_pool import HTTPPool
+from rate_limiter import RateLimitScheduler
+from cache import TTLCache
+from singleflight import SingleFlight
+from metadata import MetadataHydrator
+from write_queue import WriteQueue
+from resilience import RetryPolicy, CircuitBreaker
+import deadline
+from metrics import MetricsRegistry, endpoint_template
 
-class TraktAPI:
-    def __init__(self):
+# How long (seconds) responses from each cacheable endpoint stay fresh
+CACHE_TTLS = {
+    'search': config.CACHE_TTL_SEARCH,
+    'show': config.CACHE_TTL_METADATA,
+    'movie': config.CACHE_TTL_METADATA,
+    'seasons': config.CACHE_TTL_METADATA,
+    'episodes': config.CACHE_TTL_METADATA,
+    'popular': config.CACHE_TTL_LISTS,
+    'profile': config.CACHE_TTL_LISTS
+}
+
+# Retry policy per request class: reads are idempotent, /sync writes are made
+# safe to repeat first, other writes (OAuth token exchanges) never retry
+RETRY_ATTEMPTS = {
+    'read': config.TRAKT_READ_RETRIES,
+    'sync': config.TRAKT_SYNC_RETRIES,
+    'write': 1
+}
+
+# Movie fields arena challenges are checked against
+CHALLENGE_MOVIE_FIELDS = ('genres', 'rating', 'runtime', 'language', 'votes')
+
+class TraktResponse:
+    """Fully read HTTP response, detached from the connection it came from."""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self._data = None
+        self._parsed = False
+
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """Parse the body once per response object."""
+        if not self._parsed:
+            self._data = json.loads(self.body)
+            self._parsed = True
+        return self._data
+
+    def copy(self) -> 'TraktResponse':
+        """Same response with its own parsed body, so callers can't change each other's data."""
+        return TraktResponse(self.status_code, self.headers, self.body)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that revalidate this response."""
+        headers = {name.lower(): value for name, value in self.headers.items()}
+        conditional = {}
+        etag = headers.get('etag')
+        if etag:
+            conditional['If-None-Match'] = etag
+        last_modified = headers.get('last-modified')
+        if last_modified:
+            conditional['If-Modified-Since'] = last_modified
+        return conditional
+
+class AsyncTraktAPI:
+    def __init__(self, pool: Optional[HTTPPool] = None, scheduler: Optional[RateLimitScheduler] = None,
+                 cache: Optional[TTLCache] = None, metrics: Optional[MetricsRegistry] = None):
         self.client_id = config.TRAKT_CLIENT_ID
         self.client_secret = config.TRAKT_CLIENT_SECRET
         self.redirect_uri = config.TRAKT_REDIRECT_URI
         self.base_url = config.TRAKT_BASE_URL
         self.auth_url = config.TRAKT_AUTH_URL
+        self.pool = pool or HTTPPool()
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.cache = cache if cache is not None else TTLCache(config.CACHE_MAX_ENTRIES)
+        self.singleflight = SingleFlight()
+        self.hydrator = MetadataHydrator(self)
+        self.writes = WriteQueue(self)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.retry_policies = {
+            name: RetryPolicy(name, attempts, config.TRAKT_RETRY_BASE_DELAY, config.TRAKT_RETRY_MAX_DELAY)
+            for name, attempts in RETRY_ATTEMPTS.items()
+        }
+        # One breaker per 'METHOD /template', so one failing endpoint doesn't cut off the rest
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._breaker_classes: Dict[Tuple[str, str], str] = {}
+    
+    async def close(self):
+        """Send queued writes and close the shared HTTP connection pool."""
+        await self.writes.close()
+        await self.pool.close()
+    
+    def get_pool_stats(self) -> Dict[str, int]:
+        """Get connection pool statistics (in use, idle, handshakes saved)."""
+        return self.pool.get_stats()
+    
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get rate-limit queue depth and wait times for the GET and POST budgets."""
+        return self.scheduler.get_stats()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit/miss counters."""
+        return self.cache.get_stats()
+    
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        """Get how many GETs were sent and how many joined an identical one in flight."""
+        return self.singleflight.get_stats()
+    
+    def _breaker(self, method: str, path: str, request_class: str) -> CircuitBreaker:
+        """Get the circuit breaker for an endpoint, creating it on first use."""
+        key = (method.upper(), endpoint_template(path))
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(f"{key[0]} {key[1]}", config.TRAKT_BREAKER_THRESHOLD, config.TRAKT_BREAKER_RESET)
+            self.breakers[key] = breaker
+            self._breaker_classes[key] = request_class
+        return breaker
+    
+    def get_resilience_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get retry counts per request class, with its endpoints' circuit breakers added up."""
+        stats = {}
+        for name, policy in self.retry_policies.items():
+            breakers = [breaker.get_stats() for key, breaker in self.breakers.items()
+                        if self._breaker_classes[key] == name]
+            stats[name] = {
+                'breaker': {
+                    'endpoints': len(breakers),
+                    'open': sum(1 for breaker in breakers if breaker['state'] != 'closed'),
+                    'opened': sum(breaker['opened'] for breaker in breakers),
+                    'rejected': sum(breaker['rejected'] for breaker in breakers)
+                },
+                'retries': policy.get_stats()
+            }
+        return stats
+    
+    def get_breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get every endpoint's circuit breaker state keyed by 'METHOD /template'."""
+        return {f"{method} {template}": breaker.get_stats()
+                for (method, template), breaker in sorted(self.breakers.items())}
+    
+    def is_degraded(self, endpoint: Optional[str] = None) -> bool:
+        """Whether a Trakt read endpoint ('GET /template', or any if None) is currently failing fast."""
+        if endpoint is not None:
+            method, template = endpoint.split(' ', 1)
+            breaker = self.breakers.get((method, template))
+            return breaker is not None and breaker.is_open
+        return any(breaker.is_open for key, breaker in self.breakers.items()
+                   if self._breaker_classes[key] == 'read')
+    
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get call counts, status codes, bytes and latency percentiles per endpoint."""
+        return self.metrics.snapshot()
+    
+    def get_write_stats(self) -> Dict[str, int]:
+        """Get how many watch/watchlist writes were queued and merged."""
+        return self.writes.get_stats()
+    
+    def get_metadata_stats(self) -> Dict[str, int]:
+        """Get how many per-item metadata lookups hydration avoided."""
+        return self.hydrator.get_stats()
+    
+    async def _request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                       json: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                       cache_endpoint: Optional[str] = None) -> TraktResponse:
+        """Send a request, serving cacheable GETs from the response cache.
+
+        cache_endpoint names an entry in CACHE_TTLS; successful responses for
+        it are kept for that endpoint's TTL and shared between callers. Each
+        caller gets its own copy to parse, so data one caller changes (e.g.
+        by hydrating it) never leaks into another's. Once an entry expires
+        it is revalidated with its ETag/Last-Modified, and a 304 keeps the
+        cached response instead of downloading it again.
+        Identical GETs that are already in flight are joined rather than sent
+        again.
+        """
+        if method != 'GET':
+            return await self._send(method, url, params=params, json=json, headers=headers)
+
+        # Different tokens can see different data for the same URL
+        cache_key = (url, tuple(sorted((params or {}).items())), (headers or {}).get('Authorization'))
+        if cache_endpoint is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached.copy()
+
+        async def fetch() -> TraktResponse:
+            stale = self.cache.get_stale(cache_key) if cache_endpoint is not None else None
+            request_headers = headers
+            if stale is not None:
+                request_headers = dict(headers or {})
+                request_headers.update(stale.validators())
+
+            response = await self._send(method, url, params=params, headers=request_headers)
+            if cache_endpoint is None:
+                return response
+            if response.status_code == 304 and stale is not None:
+                self.cache.refresh(cache_key, CACHE_TTLS[cache_endpoint])
+                return stale
+            if response.status_code == 200:
+                self.cache.set(cache_key, response, CACHE_TTLS[cache_endpoint])
+            return response
+
+        response = await self.singleflight.do(cache_key, fetch)
+        return response.copy()
+    
+    def _request_class(self, method: str, url: str) -> str:
+        """Group a request under the retry policy it belongs to."""
+        if method.upper() in ('GET', 'HEAD'):
+            return 'read'
+        if url.startswith(f"{self.base_url}/sync/"):
+            return 'sync'
+        return 'write'
+
+    def _make_repeatable(self, url: str, json: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Pin watched_at on history adds so a retry resends the same play, not a new one."""
+        if not json or not url.endswith('/sync/history'):
+            return json
+        watched_at = self._format_date(datetime.now(timezone.utc))
+        pinned = {}
+        for key, items in json.items():
+            if isinstance(items, list):
+                items = [dict(item, watched_at=item.get('watched_at', watched_at)) for item in items]
+            pinned[key] = items
+        return pinned
+
+    def _fits_deadline(self, delay: float) -> bool:
+        """Whether there is time to wait delay seconds and still make another attempt."""
+        budget = deadline.remaining()
+        return budget is None or delay < budget
+
+    async def _send(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                    json: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> TraktResponse:
+        """Send a request over the shared session and read the whole body.
+
+        Requests wait for a token in Trakt's GET or POST budget first (the
+        user's own when the request carries an access token), and a 429
+        response is queued again after Retry-After instead of failing.
+        Network errors and 5xx responses are retried with jittered backoff
+        according to the request's class, and while the endpoint's circuit
+        breaker is open requests to it fail fast with CircuitOpenError. Waiting and
+        each attempt are capped by the current interaction's deadline.
+        """
+        request_class = self._request_class(method, url)
+        policy = self.retry_policies[request_class]
+        path = urlsplit(url).path
+        breaker = self._breaker(method, path, request_class)
+        if request_class == 'sync':
+            json = self._make_repeatable(url, json)
+
+        # Authenticated calls count against the user's own budget, not the app's
+        rate_key = (headers or {}).get('Authorization')
+        session = await self.pool.get_session()
+        attempt = 0
+        rate_limited = 0
+        while True:
+            breaker.check()
+            # Queueing for a rate-limit token counts against the caller's deadline too
+            try:
+                await asyncio.wait_for(self.scheduler.acquire(method, rate_key), deadline.remaining())
+            except asyncio.TimeoutError:
+                raise deadline.DeadlineExceeded(f"Deadline passed while queued for {method} {url}")
+            timeout = aiohttp.ClientTimeout(total=deadline.cap(config.TRAKT_REQUEST_TIMEOUT))
+            started = time.monotonic()
+            try:
+                async with session.request(method, url, params=params, json=json, headers=headers,
+                                           timeout=timeout) as response:
+                    body = await response.read()
+                    result = TraktResponse(response.status, dict(response.headers), body)
+                self.metrics.observe(method, path, result.status_code, time.monotonic() - started, len(body))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.metrics.observe(method, path, None, time.monotonic() - started)
+                if isinstance(e, asyncio.TimeoutError):
+                    # Cut short by the caller's deadline: not Trakt's fault, not worth retrying
+                    deadline.check()
+                breaker.record_failure()
+                if not policy.should_retry(attempt):
+                    policy.record(attempt + 1, False)
+                    raise
+                delay = policy.backoff(attempt)
+                if not self._fits_deadline(delay):
+                    policy.record(attempt + 1, False)
+                    raise
+                attempt += 1
+                print(f"Trakt {method} {url} failed ({e.__class__.__name__}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            retry_after = self.scheduler.observe(method, result.status_code, result.headers, rate_key)
+            if retry_after is not None:
+                # Trakt answered, so this says nothing about its health
+                breaker.record_success()
+                if rate_limited >= config.TRAKT_RATE_LIMIT_RETRIES:
+                    policy.record(attempt + 1, False)
+                    return result
+                rate_limited += 1
+                print(f"Trakt rate limit hit for {method} {url}, retrying in {retry_after:.1f}s")
+                continue
+
+            if result.status_code in policy.retry_statuses:
+                breaker.record_failure()
+                if not policy.should_retry(attempt):
+                    policy.record(attempt + 1, False)
+                    return result
+                delay = policy.backoff(attempt)
+                if not self._fits_deadline(delay):
+                    policy.record(attempt + 1, False)
+                    return result
+                attempt += 1
+                print(f"Trakt {method} {url} returned {result.status_code}, retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            policy.record(attempt + 1, True)
+            return result
+
+    async def _paginate(self, url: str, params: Optional[Dict[str, Any]] = None,
+                        headers: Optional[Dict[str, str]] = None, per_page: int = 100,
+                        strict: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Yield items from a paginated endpoint, fetching the next page only when needed.
+
+        Stops after the last page reported in X-Pagination-Page-Count, or as
+        soon as the caller stops iterating. A failed page ends iteration
+        quietly unless strict is set, in which case it raises.
+        """
+        page = 1
+        while True:
+            page_params = dict(params or {})
+            page_params.update({'page': page, 'limit': per_page})
+            response = await self._request('GET', url, params=page_params, headers=headers)
+            if response.status_code != 200:
+                if strict:
+                    raise aiohttp.ClientError(f"Page {page} of {url} returned {response.status_code}")
+                print(f"Pagination of {url} stopped at page {page}: {response.status_code}")
+                return
+
+            items = response.json()
+            for item in items:
+                yield item
+
+            try:
+                page_count = int(response.headers.get('X-Pagination-Page-Count', page))
+            except ValueError:
+                page_count = page
+            if not items or page >= page_count:
+                return
+            page += 1
+
+    def _format_date(self, value: datetime) -> str:
+        """Format a datetime the way Trakt's start_at/end_at filters expect."""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
         
     def get_headers(self, access_token: Optional[str] = None) -> Dict[str, str]:
         """Get headers for API requests."""
@@ -27,7 +380,7 @@ class TraktAPI:
         """Get the authorization URL for OAuth."""
         return f"{self.auth_url}/authorize?response_type=code&client_id={self.client_id}&redirect_uri={self.redirect_uri}"
     
-    def exchange_code_for_token(self, code: str) -> Optional[Dict[str, Any]]:
+    async def exchange_code_for_token(self, code: str) -> Optional[Dict[str, Any]]:
         """Exchange authorization code for access token."""
         data = {
             'code': code,
@@ -38,14 +391,14 @@ class TraktAPI:
         }
         
         try:
-            response = requests.post(f"{self.auth_url}/token", json=data)
+            response = await self._request('POST', f"{self.auth_url}/token", json=data)
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
             print(f"Error exchanging code for token: {e}")
         return None
     
-    def refresh_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
+    async def refresh_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
         """Refresh an access token."""
         data = {
             'refresh_token': refresh_token,
@@ -56,19 +409,21 @@ class TraktAPI:
         }
         
         try:
-            response = requests.post(f"{self.auth_url}/token", json=data)
+            response = await self._request('POST', f"{self.auth_url}/token", json=data)
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
             print(f"Error refreshing token: {e}")
         return None
     
-    def get_user_profile(self, access_token: str) -> Optional[Dict[str, Any]]:
+    async def get_user_profile(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Get user profile information."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/users/me",
-                headers=self.get_headers(access_token)
+                headers=self.get_headers(access_token),
+                cache_endpoint='profile'
             )
             if response.status_code == 200:
                 return response.json()
@@ -76,167 +431,113 @@ class TraktAPI:
             print(f"Error getting user profile: {e}")
         return None
     
-    def search_content(self, query: str, content_type: str = 'show,movie') -> List[Dict[str, Any]]:
-        """Search for shows/movies with extended information including images."""
+    async def search_content(self, query: str, content_type: str = 'show,movie',
+                             strict: bool = False) -> List[Dict[str, Any]]:
+        """Search for shows/movies with extended information including images.
+
+        Failures give an empty list unless strict is set, in which case
+        network errors, 5xx/429 answers and an open circuit breaker raise,
+        so an empty list only ever means nothing matched.
+        """
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/search/{content_type}",
                 params={'query': query, 'limit': 10, 'extended': 'full'},
-                headers=self.get_headers()
+                headers=self.get_headers(),
+                cache_endpoint='search'
             )
             if response.status_code == 200:
                 return response.json()
+            if strict and (response.status_code >= 500 or response.status_code == 429):
+                raise aiohttp.ClientError(f"Search for {query!r} returned {response.status_code}")
         except Exception as e:
+            if strict:
+                raise
             print(f"Error searching content: {e}")
         return []
     
-    def get_show_info(self, show_id: str) -> Optional[Dict[str, Any]]:
-        """Get detailed show information with images."""
+    async def get_show_info(self, show_id: str) -> Optional[Dict[str, Any]]:
+        """Get detailed show information."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/shows/{show_id}?extended=full",
-                headers=self.get_headers()
+                headers=self.get_headers(),
+                cache_endpoint='show'
             )
             if response.status_code == 200:
-                show_data = response.json()
-                
-                # Get images for the show
-                images_response = requests.get(
-                    f"https://api.themoviedb.org/3/tv/{show_data.get('ids', {}).get('tmdb')}?api_key=YOUR_TMDB_KEY&append_to_response=images",
-                    headers={'Content-Type': 'application/json'}
-                )
-                
-                # For now, we'll use a simpler approach - construct image URLs
-                if show_data.get('ids', {}).get('tmdb'):
-                    tmdb_id = show_data['ids']['tmdb']
-                    show_data['poster_url'] = f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg"  # This is a simplified approach
-                
-                return show_data
+                return response.json()
         except Exception as e:
             print(f"Error getting show info: {e}")
         return None
     
-    def get_movie_info(self, movie_id: str) -> Optional[Dict[str, Any]]:
-        """Get detailed movie information with images."""
+    async def get_movie_info(self, movie_id: str) -> Optional[Dict[str, Any]]:
+        """Get detailed movie information."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/movies/{movie_id}?extended=full",
-                headers=self.get_headers()
+                headers=self.get_headers(),
+                cache_endpoint='movie'
             )
             if response.status_code == 200:
-                movie_data = response.json()
-                
-                # Add poster URL if TMDB ID is available
-                if movie_data.get('ids', {}).get('tmdb'):
-                    tmdb_id = movie_data['ids']['tmdb']
-                    movie_data['poster_url'] = f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg"
-                
-                return movie_data
+                return response.json()
         except Exception as e:
             print(f"Error getting movie info: {e}")
         return None
     
-    def get_content_images(self, content_type: str, tmdb_id: int) -> Dict[str, str]:
-        """Get image URLs for content using TMDB ID."""
-        images = {}
-        try:
-            # Using fanart.tv API patterns for common poster locations
-            # This is a simplified approach - in production you'd want proper TMDB API integration
-            base_url = "https://image.tmdb.org/t/p"
-            
-            images['poster_small'] = f"{base_url}/w300/{tmdb_id}.jpg"
-            images['poster_medium'] = f"{base_url}/w500/{tmdb_id}.jpg" 
-            images['poster_large'] = f"{base_url}/w780/{tmdb_id}.jpg"
-            images['backdrop'] = f"{base_url}/w1280/{tmdb_id}.jpg"
-            
-        except Exception as e:
-            print(f"Error getting images: {e}")
-        
-        return images
-    
-    def mark_as_watched(self, access_token: str, content_type: str, item_id: str) -> bool:
+    async def mark_as_watched(self, access_token: str, content_type: str, item_id: str) -> bool:
         """Mark content as watched."""
         if content_type == 'show':
             # For shows, we need to mark episodes as watched
-            return self._mark_show_watched(access_token, item_id)
+            return await self._mark_show_watched(access_token, item_id)
         else:
             # For movies
-            return self._mark_movie_watched(access_token, item_id)
+            return await self._mark_movie_watched(access_token, item_id)
     
-    def _mark_movie_watched(self, access_token: str, movie_id: str) -> bool:
+    async def _mark_movie_watched(self, access_token: str, movie_id: str) -> bool:
         """Mark a movie as watched."""
-        data = {
-            'movies': [{'ids': {'trakt': int(movie_id)}}]
-        }
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/sync/history",
-                json=data,
-                headers=self.get_headers(access_token)
-            )
-            return response.status_code == 201
-        except Exception as e:
-            print(f"Error marking movie as watched: {e}")
-        return False
+        return await self.writes.submit(access_token, '/sync/history', 'movies', {'ids': {'trakt': int(movie_id)}})
     
-    def _mark_show_watched(self, access_token: str, show_id: str) -> bool:
+    async def _mark_show_watched(self, access_token: str, show_id: str) -> bool:
         """Mark all episodes of a show as watched."""
-        data = {
-            'shows': [{'ids': {'trakt': int(show_id)}}]
-        }
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/sync/history",
-                json=data,
-                headers=self.get_headers(access_token)
-            )
-            return response.status_code == 201
-        except Exception as e:
-            print(f"Error marking show as watched: {e}")
-        return False
+        return await self.writes.submit(access_token, '/sync/history', 'shows', {'ids': {'trakt': int(show_id)}})
     
-    def unmark_as_watched(self, access_token: str, content_type: str, item_id: str) -> bool:
+    async def unmark_as_watched(self, access_token: str, content_type: str, item_id: str) -> bool:
         """Remove content from watched history."""
-        if content_type == 'show':
-            data = {'shows': [{'ids': {'trakt': int(item_id)}}]}
-        else:
-            data = {'movies': [{'ids': {'trakt': int(item_id)}}]}
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/sync/history/remove",
-                json=data,
-                headers=self.get_headers(access_token)
-            )
-            return response.status_code == 200
-        except Exception as e:
-            print(f"Error unmarking as watched: {e}")
-        return False
+        kind = 'shows' if content_type == 'show' else 'movies'
+        return await self.writes.submit(access_token, '/sync/history/remove', kind, {'ids': {'trakt': int(item_id)}})
     
-    def add_to_watchlist(self, access_token: str, content_type: str, item_id: str) -> bool:
+    async def add_to_watchlist(self, access_token: str, content_type: str, item_id: str) -> bool:
         """Add content to watchlist."""
-        if content_type == 'show':
-            data = {'shows': [{'ids': {'trakt': int(item_id)}}]}
-        else:
-            data = {'movies': [{'ids': {'trakt': int(item_id)}}]}
-        
+        kind = 'shows' if content_type == 'show' else 'movies'
+        return await self.writes.submit(access_token, '/sync/watchlist', kind, {'ids': {'trakt': int(item_id)}})
+    
+    async def add_history_items(self, access_token: str, items: Dict[str, List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Add a batch of movies/shows/episodes to history in one /sync/history call.
+
+        Returns Trakt's added/not_found summary, or None if the request failed.
+        """
         try:
-            response = requests.post(
-                f"{self.base_url}/sync/watchlist",
-                json=data,
+            response = await self._request(
+                'POST',
+                f"{self.base_url}/sync/history",
+                json=items,
                 headers=self.get_headers(access_token)
             )
-            return response.status_code == 201
+            if response.status_code == 201:
+                return response.json()
+            print(f"Failed to add history batch: {response.status_code}")
         except Exception as e:
-            print(f"Error adding to watchlist: {e}")
-        return False
+            print(f"Error adding history batch: {e}")
+        return None
     
-    def get_watching_now(self, username: str) -> Optional[Dict[str, Any]]:
+    async def get_watching_now(self, username: str) -> Optional[Dict[str, Any]]:
         """Get what a user is currently watching."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/users/{username}/watching",
                 headers=self.get_headers()
             )
@@ -246,12 +547,16 @@ class TraktAPI:
             print(f"Error getting current watching: {e}")
         return None
     
-    def get_user_history(self, username: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get user's watch history."""
+    async def get_user_history(self, username: str, limit: int = 10, extended: bool = False) -> List[Dict[str, Any]]:
+        """Get user's watch history, with full show/movie details if extended."""
+        params = {'limit': limit}
+        if extended:
+            params['extended'] = 'full'
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/users/{username}/history",
-                params={'limit': limit},
+                params=params,
                 headers=self.get_headers()
             )
             if response.status_code == 200:
@@ -259,11 +564,51 @@ class TraktAPI:
         except Exception as e:
             print(f"Error getting user history: {e}")
         return []
+
+    async def iter_user_history(self, username: str = 'me', access_token: Optional[str] = None,
+                                content_type: Optional[str] = None, item_id: Optional[str] = None,
+                                start_at: Optional[datetime] = None, end_at: Optional[datetime] = None,
+                                extended: bool = False, per_page: int = 100,
+                                strict: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a user's watch history, newest first, page by page.
+
+        content_type ('shows', 'movies', 'episodes') and item_id narrow the
+        history server-side, as do the start_at/end_at dates. Break out of
+        the loop to stop early; later pages are never requested. A failed
+        page ends the stream quietly unless strict is set, in which case the
+        error is raised so callers can tell a partial history from a full one.
+        """
+        url = f"{self.base_url}/users/{username}/history"
+        if content_type:
+            url += f"/{content_type}"
+            if item_id:
+                url += f"/{item_id}"
+
+        params = {}
+        if start_at:
+            params['start_at'] = self._format_date(start_at)
+        if end_at:
+            params['end_at'] = self._format_date(end_at)
+        if extended:
+            params['extended'] = 'full'
+
+        pages = self._paginate(url, params, self.get_headers(access_token), per_page, strict=strict)
+        if strict:
+            async for item in pages:
+                yield item
+            return
+
+        try:
+            async for item in pages:
+                yield item
+        except Exception as e:
+            print(f"Error iterating user history: {e}")
     
-    def get_user_history_authenticated(self, access_token: str, limit: int = 20) -> List[Dict[str, Any]]:
+    async def get_user_history_authenticated(self, access_token: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Get authenticated user's watch history with extended data."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/users/me/history",
                 params={'limit': limit, 'extended': 'full'},
                 headers=self.get_headers(access_token)
@@ -274,10 +619,40 @@ class TraktAPI:
             print(f"Error getting authenticated user history: {e}")
         return []
     
-    def get_user_progress(self, username: str) -> List[Dict[str, Any]]:
+    async def get_last_activities(self, access_token: str) -> Optional[Dict[str, Any]]:
+        """Get when the authenticated user's history, watchlist, ratings etc. last changed."""
+        try:
+            response = await self._request(
+                'GET',
+                f"{self.base_url}/sync/last_activities",
+                headers=self.get_headers(access_token)
+            )
+            if response.status_code == 200:
+                return response.json()
+            print(f"Last activities API returned {response.status_code}")
+        except Exception as e:
+            print(f"Error getting last activities: {e}")
+        return None
+
+    async def get_user_ratings(self, access_token: str) -> List[Dict[str, Any]]:
+        """Get every rating of the authenticated user."""
+        try:
+            response = await self._request(
+                'GET',
+                f"{self.base_url}/sync/ratings",
+                headers=self.get_headers(access_token)
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Error getting user ratings: {e}")
+        return []
+
+    async def get_user_progress(self, username: str) -> List[Dict[str, Any]]:
         """Get user's show progress."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/users/{username}/watched/shows?extended=full",
                 headers=self.get_headers()
             )
@@ -286,20 +661,67 @@ class TraktAPI:
         except Exception as e:
             print(f"Error getting user progress: {e}")
         return []
-    
-    def get_calendar(self, username: str, days: int = 7, access_token: str = None) -> List[Dict[str, Any]]:
+
+    async def get_user_collection_shows(self, access_token: str) -> List[Dict[str, Any]]:
+        """Get authenticated user's collected shows."""
+        try:
+            response = await self._request(
+                'GET',
+                f"{self.base_url}/users/me/collection/shows",
+                params={'extended': 'full'},
+                headers=self.get_headers(access_token)
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Error getting user collection: {e}")
+        return []
+
+    async def get_user_watched_shows(self, access_token: str) -> List[Dict[str, Any]]:
+        """Get authenticated user's watched shows."""
+        try:
+            response = await self._request(
+                'GET',
+                f"{self.base_url}/users/me/watched/shows",
+                params={'extended': 'full'},
+                headers=self.get_headers(access_token)
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Error getting watched shows: {e}")
+        return []
+
+    async def get_user_show_history(self, access_token: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get authenticated user's episode watch history with full show details."""
+        try:
+            response = await self._request(
+                'GET',
+                f"{self.base_url}/users/me/history/shows",
+                params={'limit': limit, 'extended': 'full'},
+                headers=self.get_headers(access_token)
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Error getting show history: {e}")
+        return []
+
+    async def get_calendar(self, username: str, days: int = 7, access_token: str = None) -> List[Dict[str, Any]]:
         """Get upcoming episodes for user (requires authentication for personal calendar)."""
         start_date = datetime.now().strftime('%Y-%m-%d')
         try:
             if access_token:
                 # Use authenticated endpoint for personal calendar
-                response = requests.get(
+                response = await self._request(
+                    'GET',
                     f"{self.base_url}/calendars/my/shows/{start_date}/{days}",
                     headers=self.get_headers(access_token)
                 )
             else:
                 # Fallback to public endpoint (may have limited data)
-                response = requests.get(
+                response = await self._request(
+                    'GET',
                     f"{self.base_url}/users/{username}/calendar/shows/{start_date}/{days}",
                     headers=self.get_headers()
                 )
@@ -312,12 +734,14 @@ class TraktAPI:
             print(f"Error getting calendar: {e}")
         return []
     
-    def get_show_seasons(self, show_id: str) -> List[Dict[str, Any]]:
+    async def get_show_seasons(self, show_id: str) -> List[Dict[str, Any]]:
         """Get all seasons for a show with episode counts."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/shows/{show_id}/seasons?extended=episodes",
-                headers=self.get_headers()
+                headers=self.get_headers(),
+                cache_endpoint='seasons'
             )
             if response.status_code == 200:
                 return response.json()
@@ -325,12 +749,14 @@ class TraktAPI:
             print(f"Error getting show seasons: {e}")
         return []
     
-    def get_season_episodes(self, show_id: str, season_number: int) -> List[Dict[str, Any]]:
+    async def get_season_episodes(self, show_id: str, season_number: int) -> List[Dict[str, Any]]:
         """Get all episodes for a specific season."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/shows/{show_id}/seasons/{season_number}?extended=full",
-                headers=self.get_headers()
+                headers=self.get_headers(),
+                cache_endpoint='episodes'
             )
             if response.status_code == 200:
                 return response.json()
@@ -338,7 +764,7 @@ class TraktAPI:
             print(f"Error getting season episodes: {e}")
         return []
     
-    def get_show_progress(self, access_token: str, show_id: str) -> Optional[Dict[str, Any]]:
+    async def get_show_progress(self, access_token: str, show_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed watching progress for a show."""
         try:
             url = f"{self.base_url}/shows/{show_id}/progress/watched"
@@ -346,7 +772,7 @@ class TraktAPI:
             
             print(f"Getting progress for show {show_id} from {url}")
             
-            response = requests.get(url, headers=headers)
+            response = await self._request('GET', url, headers=headers)
             
             print(f"Progress response: {response.status_code}")
             
@@ -368,111 +794,35 @@ class TraktAPI:
             print(f"Error getting show progress: {e}")
             return None
     
-    def mark_episode_watched(self, access_token: str, show_id: str, season: int, episode: int) -> bool:
+    async def mark_episode_watched(self, access_token: str, show_id: str, season: int, episode: int) -> bool:
         """Mark a specific episode as watched."""
-        data = {
-            'shows': [{
-                'ids': {'trakt': int(show_id)},
-                'seasons': [{
-                    'number': season,
-                    'episodes': [{
-                        'number': episode
-                    }]
-                }]
-            }]
-        }
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/sync/history",
-                json=data,
-                headers=self.get_headers(access_token)
-            )
-            print(f"Mark episode response: {response.status_code}, {response.text}")
-            return response.status_code == 201
-        except Exception as e:
-            print(f"Error marking episode as watched: {e}")
-        return False
+        item = {'ids': {'trakt': int(show_id)}, 'seasons': [{'number': season, 'episodes': [{'number': episode}]}]}
+        return await self.writes.submit(access_token, '/sync/history', 'shows', item)
     
-    def mark_season_watched(self, access_token: str, show_id: str, season: int) -> bool:
+    async def mark_season_watched(self, access_token: str, show_id: str, season: int) -> bool:
         """Mark an entire season as watched."""
-        data = {
-            'shows': [{
-                'ids': {'trakt': int(show_id)},
-                'seasons': [{
-                    'number': season
-                }]
-            }]
-        }
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/sync/history",
-                json=data,
-                headers=self.get_headers(access_token)
-            )
-            print(f"Mark season response: {response.status_code}, {response.text}")
-            return response.status_code == 201
-        except Exception as e:
-            print(f"Error marking season as watched: {e}")
-        return False
+        item = {'ids': {'trakt': int(show_id)}, 'seasons': [{'number': season}]}
+        return await self.writes.submit(access_token, '/sync/history', 'shows', item)
     
-    def unmark_episode_watched(self, access_token: str, show_id: str, season: int, episode: int) -> bool:
+    async def unmark_episode_watched(self, access_token: str, show_id: str, season: int, episode: int) -> bool:
         """Unmark a specific episode as watched."""
-        data = {
-            'shows': [{
-                'ids': {'trakt': int(show_id)},
-                'seasons': [{
-                    'number': season,
-                    'episodes': [{
-                        'number': episode
-                    }]
-                }]
-            }]
-        }
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/sync/history/remove",
-                json=data,
-                headers=self.get_headers(access_token)
-            )
-            print(f"Unmark episode response: {response.status_code}, {response.text}")
-            return response.status_code == 200
-        except Exception as e:
-            print(f"Error unmarking episode: {e}")
-        return False
+        item = {'ids': {'trakt': int(show_id)}, 'seasons': [{'number': season, 'episodes': [{'number': episode}]}]}
+        return await self.writes.submit(access_token, '/sync/history/remove', 'shows', item)
     
-    def unmark_season_watched(self, access_token: str, show_id: str, season: int) -> bool:
+    async def unmark_season_watched(self, access_token: str, show_id: str, season: int) -> bool:
         """Unmark an entire season as watched."""
-        data = {
-            'shows': [{
-                'ids': {'trakt': int(show_id)},
-                'seasons': [{
-                    'number': season
-                }]
-            }]
-        }
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/sync/history/remove",
-                json=data,
-                headers=self.get_headers(access_token)
-            )
-            print(f"Unmark season response: {response.status_code}, {response.text}")
-            return response.status_code == 200
-        except Exception as e:
-            print(f"Error unmarking season: {e}")
-        return False
+        item = {'ids': {'trakt': int(show_id)}, 'seasons': [{'number': season}]}
+        return await self.writes.submit(access_token, '/sync/history/remove', 'shows', item)
     
-    def validate_arena_challenge(self, access_token: str, challenge: Dict[str, Any], challenge_start_time: float) -> Dict[str, Any]:
+    async def validate_arena_challenge(self, access_token: str, challenge: Dict[str, Any], challenge_start_time: float) -> Dict[str, Any]:
         """Validate if user completed arena challenge based on their Trakt history."""
         try:
             # Get recent watch history since challenge started
-            history = self.get_user_history_authenticated(access_token, 50)
+            history = await self.get_user_history_authenticated(access_token, 50)
             
             if not history:
+                if self.is_degraded('GET /users/me/history'):
+                    return {'valid': False, 'reason': 'Trakt is not responding right now. Please try again in a few minutes.'}
                 return {'valid': False, 'reason': 'Unable to fetch watch history from Trakt'}
             
             # Filter to movies watched after challenge started
@@ -499,14 +849,13 @@ class TraktAPI:
             if not challenge_movies:
                 return {'valid': False, 'reason': 'No movies watched since challenge started'}
             
+            # Fill in any details the history didn't carry, in one batch
+            await self.hydrator.hydrate(challenge_movies, CHALLENGE_MOVIE_FIELDS)
+            
             # Check each movie against challenge criteria
             for movie_item in challenge_movies:
                 movie = movie_item.get('movie', {})
                 
-                # If basic movie data is missing detailed info, fetch it
-                if not self._has_extended_data(movie):
-                    movie = self._fetch_extended_movie_data(movie)
-                
                 if movie and self._movie_matches_challenge(movie, challenge):
                     return {
                         'valid': True,
@@ -520,24 +869,6 @@ class TraktAPI:
             print(f"Error validating arena challenge: {e}")
             return {'valid': False, 'reason': f'Validation system error. Please try again in a few minutes.'}
 
-    def _has_extended_data(self, movie: Dict[str, Any]) -> bool:
-        """Check if movie has the extended data needed for validation."""
-        required_fields = ['genres', 'rating', 'runtime', 'language', 'votes']
-        return any(field in movie for field in required_fields)
-
-    def _fetch_extended_movie_data(self, movie: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Fetch extended movie data if not available in history."""
-        try:
-            movie_ids = movie.get('ids', {})
-            trakt_id = movie_ids.get('trakt')
-            
-            if trakt_id:
-                return self.get_movie_info(str(trakt_id))
-        except Exception as e:
-            print(f"Error fetching extended movie data: {e}")
-        
-        return movie  # Return original if fetch fails
-
     def _movie_matches_challenge(self, movie: Dict[str, Any], challenge: Dict[str, Any]) -> bool:
         """Check if a movie matches the challenge criteria with robust error handling."""
         try:
@@ -607,64 +938,60 @@ class TraktAPI:
             
         return False
 
-    def debug_recent_movies(self, access_token: str, limit: int = 10) -> List[Dict[str, Any]]:
+    async def debug_recent_movies(self, access_token: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Debug method to see what movie data is available for validation."""
         try:
-            history = self.get_user_history_authenticated(access_token, limit)
+            history = await self.get_user_history_authenticated(access_token, limit)
+            movies = [item for item in history if item.get('action') == 'watch' and item.get('type') == 'movie']
+            await self.hydrator.hydrate(movies, CHALLENGE_MOVIE_FIELDS)
             debug_info = []
             
-            for item in history:
-                if item.get('action') == 'watch' and item.get('type') == 'movie':
-                    movie = item.get('movie', {})
-                    
-                    # Get extended data if needed
-                    if not self._has_extended_data(movie):
-                        movie = self._fetch_extended_movie_data(movie)
-                    
-                    debug_info.append({
-                        'title': movie.get('title', 'Unknown'),
-                        'year': movie.get('year'),
-                        'watched_at': item.get('watched_at'),
-                        'has_genres': bool(movie.get('genres')),
-                        'genres': movie.get('genres', []),
-                        'has_rating': movie.get('rating') is not None,
-                        'rating': movie.get('rating'),
-                        'has_runtime': movie.get('runtime') is not None,
-                        'runtime': movie.get('runtime'),
-                        'has_language': bool(movie.get('language')),
-                        'language': movie.get('language'),
-                        'has_votes': movie.get('votes') is not None,
-                        'votes': movie.get('votes')
-                    })
+            for item in movies:
+                movie = item.get('movie', {})
+                
+                debug_info.append({
+                    'title': movie.get('title', 'Unknown'),
+                    'year': movie.get('year'),
+                    'watched_at': item.get('watched_at'),
+                    'has_genres': bool(movie.get('genres')),
+                    'genres': movie.get('genres', []),
+                    'has_rating': movie.get('rating') is not None,
+                    'rating': movie.get('rating'),
+                    'has_runtime': movie.get('runtime') is not None,
+                    'runtime': movie.get('runtime'),
+                    'has_language': bool(movie.get('language')),
+                    'language': movie.get('language'),
+                    'has_votes': movie.get('votes') is not None,
+                    'votes': movie.get('votes')
+                })
             
             return debug_info
         except Exception as e:
             print(f"Error in debug method: {e}")
             return []
 
-    def get_user_watchlist(self, access_token: str) -> List[Dict[str, Any]]:
-        """Get user's watchlist with authentication."""
+    async def iter_user_watchlist(self, access_token: str, content_type: Optional[str] = None,
+                                  per_page: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the authenticated user's watchlist page by page."""
+        url = f"{self.base_url}/users/me/watchlist"
+        if content_type:
+            url += f"/{content_type}"
+
         try:
-            response = requests.get(
-                f"{self.base_url}/users/me/watchlist",
-                params={'extended': 'full'},
-                headers=self.get_headers(access_token)
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Watchlist API returned {response.status_code}: {response.text}")
+            async for item in self._paginate(url, {'extended': 'full'}, self.get_headers(access_token), per_page):
+                yield item
         except Exception as e:
-            print(f"Error getting user watchlist: {e}")
-        return []
+            print(f"Error iterating user watchlist: {e}")
     
-    def get_popular_movies(self, limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_popular_movies(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get popular movies from Trakt."""
         try:
-            response = requests.get(
+            response = await self._request(
+                'GET',
                 f"{self.base_url}/movies/popular",
                 params={'limit': limit, 'extended': 'full'},
-                headers=self.get_headers()
+                headers=self.get_headers(),
+                cache_endpoint='popular'
             )
             if response.status_code == 200:
                 movies_data = response.json()
@@ -674,13 +1001,15 @@ class TraktAPI:
             print(f"Error getting popular movies: {e}")
         return []
     
-    def get_popular_shows(self, limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_popular_shows(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get popular shows from Trakt."""
         try:
-            response = requests.get(
-                f"{self.base_url}/shows/popular", 
+            response = await self._request(
+                'GET',
+                f"{self.base_url}/shows/popular",
                 params={'limit': limit, 'extended': 'full'},
-                headers=self.get_headers()
+                headers=self.get_headers(),
+                cache_endpoint='popular'
             )
             if response.status_code == 200:
                 shows_data = response.json()
@@ -0,0 +1,629 @@
+import asyncio
+import contextvars
+import csv
+import gzip
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Optional, Dict, List, Any, Callable, Iterator, Tuple
+import discord
+from discord import app_commands
+import config
+
+# Initialize these as None and set them later
+bot = None
+trakt_api = None
+db = None
+token_manager = None
+
+# Background jobs running in this process, by job ID
+_running: Dict[str, asyncio.Task] = {}
+# Set once resume_jobs has run in this process
+_resumed = False
+
+IMPORT_FORMATS = {'.csv': 'csv', '.json': 'json', '.ndjson': 'json', '.jsonl': 'json'}
+
+# Export columns use the same names /import reads, so an export can be imported again
+EXPORT_COLUMNS = ['watched_at', 'type', 'title', 'year', 'season', 'episode', 'episode_title',
+                  'trakt_id', 'imdb_id', 'tmdb_id', 'history_id']
+
+# Column names other trackers use for the fields we need
+FIELD_ALIASES = {
+    'title': ('title', 'name', 'show_title', 'movie_title', 'series_name'),
+    'year': ('year', 'release_year'),
+    'type': ('type', 'media_type', 'kind'),
+    'season': ('season', 'season_number'),
+    'episode': ('episode', 'episode_number'),
+    'watched_at': ('watched_at', 'watched_date', 'date_watched', 'date', 'last_watched_at'),
+    'trakt': ('trakt', 'trakt_id'),
+    'imdb': ('imdb', 'imdb_id'),
+    'tmdb': ('tmdb', 'tmdb_id'),
+    'tvdb': ('tvdb', 'tvdb_id')
+}
+
+def init_transfer(discord_bot, api, database, tokens=None):
+    """Initialize the transfer module with shared objects"""
+    global bot, trakt_api, db, token_manager
+    bot = discord_bot
+    trakt_api = api
+    db = database
+    token_manager = tokens
+
+    register_transfer_commands()
+
+# Parsing
+
+def _iter_json(f, block_size: int = 65536) -> Iterator[Any]:
+    """Yield the objects of a JSON array or newline-delimited JSON file, one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    while True:
+        # Skip whitespace and the array's brackets and separators
+        stripped = buffer.lstrip(' \t\r\n,[]')
+        if not stripped and eof:
+            return
+        try:
+            if not stripped:
+                raise ValueError("need more data")
+            value, end = decoder.raw_decode(stripped)
+        except ValueError:
+            if eof:
+                raise
+            chunk = f.read(block_size)
+            eof = not chunk
+            buffer = stripped + chunk
+            continue
+        buffer = stripped[end:]
+        yield value
+
+def _first(row: Dict[str, Any], field: str) -> Any:
+    for name in FIELD_ALIASES[field]:
+        value = row.get(name)
+        if value not in (None, ''):
+            return value
+    return None
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _parse_watched_at(value: Any) -> Optional[str]:
+    """Turn an ISO date or datetime into Trakt's timestamp format."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+def normalize_row(raw: Any) -> Optional[Dict[str, Any]]:
+    """Map one CSV/JSON record to {type, title, year, season, episode, watched_at, ids}.
+
+    Accepts flat records with common column names as well as Trakt's own
+    history export (items wrapping a 'movie' or 'show' and 'episode').
+    type is 'movie' or 'episode'. Show rows without a season and episode
+    number are unreadable (None): sending them as a show would mark every
+    episode of it watched.
+    """
+    if not isinstance(raw, dict):
+        return None
+    row = {str(key).strip().lower(): value for key, value in raw.items()}
+
+    # Trakt-style nested items
+    for kind in ('movie', 'show'):
+        if isinstance(row.get(kind), dict):
+            content = row[kind]
+            row.setdefault('title', content.get('title'))
+            row.setdefault('year', content.get('year'))
+            for id_name, id_value in (content.get('ids') or {}).items():
+                row.setdefault(id_name, id_value)
+            if kind == 'movie':
+                row['type'] = 'movie'
+            elif isinstance(row.get('episode'), dict):
+                episode = row.pop('episode')
+                row['season'] = episode.get('season')
+                row['episode'] = episode.get('number')
+                row['type'] = 'episode'
+            else:
+                row['type'] = 'show'
+
+    ids = {}
+    for id_name in ('trakt', 'imdb', 'tmdb', 'tvdb'):
+        value = _first(row, id_name)
+        if value is not None:
+            ids[id_name] = str(value) if id_name == 'imdb' else _to_int(value)
+    ids = {key: value for key, value in ids.items() if value}
+
+    title = _first(row, 'title')
+    if not title and not ids:
+        return None
+
+    season = _to_int(_first(row, 'season'))
+    episode = _to_int(_first(row, 'episode'))
+    content_type = str(_first(row, 'type') or '').lower()
+    if content_type in ('movie', 'movies', 'film'):
+        content_type = 'movie'
+    elif season is not None and episode is not None:
+        content_type = 'episode'
+    elif content_type in ('show', 'shows', 'tv', 'series', 'episode', 'episodes'):
+        return None
+    else:
+        content_type = 'movie'
+
+    return {
+        'type': content_type,
+        'title': str(title).strip() if title else None,
+        'year': _to_int(_first(row, 'year')),
+        'season': season,
+        'episode': episode,
+        'watched_at': _parse_watched_at(_first(row, 'watched_at')),
+        'ids': ids
+    }
+
+def iter_rows(path: str, file_format: str) -> Iterator[Optional[Dict[str, Any]]]:
+    """Stream normalized rows from a spooled import file; unreadable rows yield None."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        records = csv.DictReader(f) if file_format == 'csv' else _iter_json(f)
+        for record in records:
+            yield normalize_row(record)
+
+# Import jobs
+
+def _progress_embed(job: Dict[str, Any]) -> discord.Embed:
+    status = job['status']
+    titles = {
+        'downloading': "📥 Importing History - Downloading",
+        'running': "📥 Importing History",
+        'paused': "⏸️ Import Paused",
+        'done': "✅ Import Complete"
+    }
+    embed = discord.Embed(
+        title=titles.get(status, "📥 Importing History"),
+        description=f"File: **{job['filename']}**",
+        color=0x00ff00 if status == 'done' else 0xffaa00 if status == 'paused' else 0x0099ff
+    )
+    embed.add_field(name="Rows Processed", value=f"{job['processed']:,}", inline=True)
+    embed.add_field(name="Movies Added", value=f"{job['added']['movies']:,}", inline=True)
+    embed.add_field(name="Episodes Added", value=f"{job['added']['episodes']:,}", inline=True)
+    if job['not_found'] or job['skipped']:
+        embed.add_field(name="Not Matched", value=f"{job['not_found']:,} not found, {job['skipped']:,} unreadable", inline=False)
+    if job['unmatched']:
+        embed.add_field(name="Examples Not Found", value="\n".join(f"• {title}" for title in job['unmatched'])[:1024], inline=False)
+    if status == 'paused':
+        embed.add_field(name="Resume", value="Trakt stopped accepting the import. Run `/import` without a file to continue where it left off.", inline=False)
+    return embed
+
+async def _edit_progress(job: Dict[str, Any], message=None):
+    """Edit the progress message, falling back to the channel once the interaction token expires."""
+    embed = _export_embed(job) if job['kind'] == 'export' else _progress_embed(job)
+    if message is not None:
+        try:
+            await message.edit(embed=embed)
+            return message
+        except Exception:
+            message = None
+
+    channel = bot.get_channel(job['channel_id']) if bot and job.get('channel_id') else None
+    if channel is not None and job.get('message_id'):
+        try:
+            await channel.get_partial_message(job['message_id']).edit(embed=embed)
+        except Exception as e:
+            print(f"Error updating {job['kind']} progress: {e}")
+    return message
+
+async def _download(url: str, path: str):
+    """Stream an attachment to disk so the import never holds the whole file in memory."""
+    session = await trakt_api.pool.get_session()
+    async with session.get(url) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            async for chunk in response.content.iter_chunked(65536):
+                await asyncio.to_thread(f.write, chunk)
+
+async def _resolve(row: Dict[str, Any], cache: Dict[Tuple, Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Get the Trakt IDs for a row's movie or show, searching by title only when no ID was given.
+
+    Returns None only when Trakt answered and nothing matched; a failed
+    search raises so the job pauses instead of skipping the row.
+    """
+    if row['ids']:
+        return row['ids']
+    kind = 'movie' if row['type'] == 'movie' else 'show'
+    key = (kind, row['title'].lower(), row['year'])
+    if key in cache:
+        return cache[key]
+
+    ids = None
+    results = await trakt_api.search_content(row['title'], kind, strict=True)
+    candidates = [result[kind] for result in results if result.get(kind)]
+    if row['year']:
+        candidates = [c for c in candidates if c.get('year') == row['year']] or candidates
+    if candidates:
+        ids = {'trakt': candidates[0]['ids']['trakt']}
+    cache[key] = ids
+    return ids
+
+def _build_payload(resolved: List[Tuple[Dict[str, Any], Dict[str, Any]]], default_watched_at: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Build one /sync/history payload, grouping episodes under their show and season."""
+    payload: Dict[str, List[Dict[str, Any]]] = {}
+    shows: Dict[str, Dict[str, Any]] = {}
+    for row, ids in resolved:
+        watched_at = row['watched_at'] or default_watched_at
+        if row['type'] == 'movie':
+            payload.setdefault('movies', []).append({'ids': ids, 'watched_at': watched_at})
+        else:
+            key = json.dumps(ids, sort_keys=True)
+            show = shows.get(key)
+            if show is None:
+                show = shows[key] = {'ids': ids, 'seasons': []}
+                payload.setdefault('shows', []).append(show)
+            season = next((s for s in show['seasons'] if s['number'] == row['season']), None)
+            if season is None:
+                season = {'number': row['season'], 'episodes': []}
+                show['seasons'].append(season)
+            season['episodes'].append({'number': row['episode'], 'watched_at': watched_at})
+    return payload
+
+async def run_import(job_id: str, message=None):
+    """Work through an import job from its saved position until it finishes or Trakt gives up."""
+    job = db.get_job(job_id)
+    if not job:
+        return
+    job['status'] = 'running'
+    db.set_job(job_id, job)
+
+    if token_manager:
+        access_token = await token_manager.get_access_token(job['discord_id'])
+    else:
+        access_token = (db.get_user(job['discord_id']) or {}).get('access_token')
+    if not access_token:
+        job['status'] = 'paused'
+        db.set_job(job_id, job)
+        await _edit_progress(job, message)
+        return
+
+    rows = iter_rows(job['path'], job['format'])
+    cache: Dict[Tuple, Optional[Dict[str, Any]]] = {}
+    semaphore = asyncio.Semaphore(config.IMPORT_LOOKUP_CONCURRENCY)
+    last_update = time.monotonic()
+
+    async def resolve(row):
+        async with semaphore:
+            return await _resolve(row, cache)
+
+    try:
+        # Skip what was already imported before a restart
+        await asyncio.to_thread(lambda: sum(1 for _ in islice(rows, job['processed'])))
+
+        while True:
+            chunk = await asyncio.to_thread(lambda: list(islice(rows, config.IMPORT_CHUNK_SIZE)))
+            if not chunk:
+                break
+
+            readable = [row for row in chunk if row]
+            job['skipped'] += len(chunk) - len(readable)
+            # Look up each distinct title in the chunk once, a few at a time
+            ids_list = await asyncio.gather(*(resolve(row) for row in readable), return_exceptions=True)
+            # A failed lookup pauses the job here, so the chunk is retried on resume
+            failure = next((ids for ids in ids_list if isinstance(ids, Exception)), None)
+            if failure is not None:
+                raise failure
+            resolved = []
+            for row, ids in zip(readable, ids_list):
+                if ids:
+                    resolved.append((row, ids))
+                else:
+                    job['not_found'] += 1
+                    if len(job['unmatched']) < 10 and row['title'] and row['title'] not in job['unmatched']:
+                        job['unmatched'].append(row['title'])
+
+            if resolved:
+                result = await trakt_api.add_history_items(access_token, _build_payload(resolved, job['started_at']))
+                if result is None:
+                    job['status'] = 'paused'
+                    db.set_job(job_id, job)
+                    await _edit_progress(job, message)
+                    return
+                added = result.get('added', {})
+                job['added']['movies'] += added.get('movies', 0)
+                job['added']['episodes'] += added.get('episodes', 0)
+                job['not_found'] += sum(len(items) for items in result.get('not_found', {}).values())
+
+            job['processed'] += len(chunk)
+            db.set_job(job_id, job)
+            if time.monotonic() - last_update >= config.TRANSFER_PROGRESS_INTERVAL:
+                message = await _edit_progress(job, message)
+                last_update = time.monotonic()
+    except Exception as e:
+        print(f"Import job {job_id} failed: {e}")
+        job['status'] = 'paused'
+        db.set_job(job_id, job)
+        await _edit_progress(job, message)
+        return
+    finally:
+        rows.close()
+
+    job['status'] = 'done'
+    await _edit_progress(job, message)
+    db.clear_job(job_id)
+    _remove(job['path'])
+    print(f"📥 Imported {job['processed']} rows for user {job['discord_id']}")
+
+# Export jobs
+
+def _export_row(item: Dict[str, Any]) -> List[Any]:
+    """Flatten one history item into EXPORT_COLUMNS."""
+    movie = item.get('movie')
+    content = movie or item.get('show') or {}
+    episode = item.get('episode') or {}
+    ids = content.get('ids', {})
+    return [
+        item.get('watched_at'), 'movie' if movie else 'episode', content.get('title'), content.get('year'),
+        episode.get('season'), episode.get('number'), episode.get('title'),
+        ids.get('trakt'), ids.get('imdb'), ids.get('tmdb'), item.get('id')
+    ]
+
+def _write_lines(f, file_format: str, items: List[Dict[str, Any]]):
+    if file_format == 'csv':
+        csv.writer(f).writerows(_export_row(item) for item in items)
+    else:
+        f.writelines(json.dumps(item, separators=(',', ':')) + '\n' for item in items)
+
+def _export_embed(job: Dict[str, Any]) -> discord.Embed:
+    finished = job['status'] == 'done'
+    embed = discord.Embed(
+        title="✅ Export Ready" if finished else "📤 Exporting History",
+        description=f"Writing your Trakt history as gzip'd {job['format'].upper()}.",
+        color=0x00ff00 if finished else 0x0099ff
+    )
+    embed.add_field(name="Entries Exported", value=f"{job['processed']:,}", inline=True)
+    return embed
+
+async def _post_file(job: Dict[str, Any], followup, make_file: Optional[Callable[[], discord.File]] = None,
+                     **kwargs) -> bool:
+    """Send a message through the interaction, or the channel once its token has expired.
+
+    discord.py closes an attached file once a send is done with it, even a
+    failed one, so the attachment comes from make_file, called per attempt.
+    """
+    try:
+        if make_file:
+            kwargs['file'] = make_file()
+        await followup.send(**kwargs)
+        return True
+    except Exception:
+        pass
+    channel = bot.get_channel(job['channel_id']) if bot and job.get('channel_id') else None
+    if channel is None:
+        return False
+    try:
+        if make_file:
+            kwargs['file'] = make_file()
+        await channel.send(**kwargs)
+        return True
+    except Exception as e:
+        print(f"Error posting export: {e}")
+    return False
+
+async def run_export(job: Dict[str, Any], message=None, followup=None):
+    """Stream a user's full history page by page into a gzip file, then post it.
+
+    Only one page of history is held in memory at a time, and the file is
+    written from a worker thread.
+    """
+    if token_manager:
+        access_token = await token_manager.get_access_token(job['discord_id'])
+    else:
+        access_token = (db.get_user(job['discord_id']) or {}).get('access_token')
+    if not access_token:
+        await _post_file(job, followup, content="❌ Your Trakt connection needs to be refreshed. Please use `/connect`.")
+        return
+
+    f = await asyncio.to_thread(gzip.open, job['path'], 'wt', encoding='utf-8', newline='')
+    last_update = time.monotonic()
+    try:
+        if job['format'] == 'csv':
+            await asyncio.to_thread(csv.writer(f).writerow, EXPORT_COLUMNS)
+
+        page = []
+        history = trakt_api.iter_user_history(access_token=access_token, per_page=config.EXPORT_PAGE_SIZE,
+                                              strict=True)
+        async for item in history:
+            page.append(item)
+            if len(page) >= config.EXPORT_PAGE_SIZE:
+                await asyncio.to_thread(_write_lines, f, job['format'], page)
+                job['processed'] += len(page)
+                page = []
+                if time.monotonic() - last_update >= config.TRANSFER_PROGRESS_INTERVAL:
+                    message = await _edit_progress(job, message)
+                    last_update = time.monotonic()
+        if page:
+            await asyncio.to_thread(_write_lines, f, job['format'], page)
+            job['processed'] += len(page)
+    except Exception as e:
+        print(f"Export for user {job['discord_id']} failed: {e}")
+        await asyncio.to_thread(f.close)
+        await _post_file(job, followup, content="❌ Your export failed partway through. Please try again later.")
+        _remove(job['path'])
+        return
+    await asyncio.to_thread(f.close)
+
+    job['status'] = 'done'
+    await _edit_progress(job, message)
+    size = os.path.getsize(job['path'])
+    if size > config.EXPORT_MAX_BYTES:
+        await _post_file(job, followup, content=f"❌ Your export is {size // (1024 * 1024)} MB, too large to upload to Discord.")
+    else:
+        filename = f"trakt-history-{datetime.now(timezone.utc):%Y%m%d}.{'csv' if job['format'] == 'csv' else 'ndjson'}.gz"
+        await _post_file(job, followup, content=f"📤 Here's your history: {job['processed']:,} entries.",
+                         make_file=lambda: discord.File(job['path'], filename=filename))
+    _remove(job['path'])
+    print(f"📤 Exported {job['processed']} history entries for user {job['discord_id']}")
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def start_job(job_id: str, job_coro):
+    """Run a job in the background, outside any interaction's deadline."""
+    if job_id in _running:
+        job_coro.close()
+        return
+    task = asyncio.get_running_loop().create_task(job_coro, context=contextvars.Context())
+    _running[job_id] = task
+    task.add_done_callback(lambda _: _running.pop(job_id, None))
+
+async def download_and_import(job_id: str, url: str, message=None, followup=None):
+    """Spool an uploaded file to disk, then import it, as one background job."""
+    job = db.get_job(job_id)
+    if not job:
+        return
+    try:
+        await _download(url, job['path'])
+    except Exception as e:
+        print(f"Error downloading import file: {e}")
+        db.clear_job(job_id)
+        _remove(job['path'])
+        await _post_file(job, followup, content="❌ Couldn't download your file from Discord. Please try again.")
+        return
+    await run_import(job_id, message)
+
+def resume_jobs():
+    """Restart imports that were running when the bot stopped.
+
+    on_ready fires again after every reconnect; jobs still running in this
+    process are left alone, and half-spooled uploads are only cleaned up
+    the first time, when they can't belong to a live download.
+    """
+    global _resumed
+    first_run = not _resumed
+    _resumed = True
+    for job in db.get_jobs('import'):
+        if job.get('status') in ('running', 'downloading') and job['job_id'] not in _running:
+            if job['status'] == 'downloading' and not first_run:
+                continue
+            if job['status'] == 'downloading' or not os.path.exists(job['path']):
+                # The upload never finished spooling; the user has to send it again
+                db.clear_job(job['job_id'])
+                continue
+            print(f"Resuming import {job['job_id']} at row {job['processed']}")
+            start_job(job['job_id'], run_import(job['job_id']))
+
+def _find_job(discord_id: str, kind: str) -> Optional[Dict[str, Any]]:
+    return next((job for job in db.get_jobs(kind) if job.get('discord_id') == discord_id), None)
+
+def register_transfer_commands():
+    """Register history import/export commands"""
+
+    @bot.tree.command(name="import", description="Import your watch history from a CSV or JSON file")
+    @app_commands.describe(file="CSV or JSON history from another tracker (leave empty to resume a paused import)")
+    async def import_history(interaction: discord.Interaction, file: Optional[discord.Attachment] = None):
+        await interaction.response.defer()
+        discord_id = str(interaction.user.id)
+
+        user = db.get_user(discord_id)
+        if not user:
+            await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
+            return
+
+        existing = _find_job(discord_id, 'import')
+        if existing and existing['job_id'] in _running:
+            await interaction.followup.send("⏳ Your import is still running. I'll keep updating its progress message.")
+            return
+
+        if file is None:
+            if not existing:
+                await interaction.followup.send("❌ Attach a CSV or JSON file with your watch history to import.")
+                return
+            message = await interaction.followup.send(embed=_progress_embed(existing))
+            existing['channel_id'] = interaction.channel_id
+            existing['message_id'] = message.id
+            db.set_job(existing['job_id'], existing)
+            start_job(existing['job_id'], run_import(existing['job_id'], message))
+            return
+
+        extension = os.path.splitext(file.filename)[1].lower()
+        if extension not in IMPORT_FORMATS:
+            await interaction.followup.send("❌ Unsupported file type. Upload a `.csv`, `.json` or `.ndjson` file.")
+            return
+        if file.size > config.IMPORT_MAX_BYTES:
+            await interaction.followup.send(f"❌ That file is too large. The limit is {config.IMPORT_MAX_BYTES // (1024 * 1024)} MB.")
+            return
+
+        if existing:
+            # A new upload replaces an import that was left paused
+            db.clear_job(existing['job_id'])
+            _remove(existing['path'])
+
+        job_id = uuid.uuid4().hex[:12]
+        os.makedirs(config.TRANSFER_DIR, exist_ok=True)
+        job = {
+            'job_id': job_id,
+            'kind': 'import',
+            'discord_id': discord_id,
+            'filename': file.filename,
+            'path': os.path.join(config.TRANSFER_DIR, f"import-{job_id}{extension}"),
+            'format': IMPORT_FORMATS[extension],
+            'status': 'downloading',
+            'processed': 0,
+            'skipped': 0,
+            'not_found': 0,
+            'added': {'movies': 0, 'episodes': 0},
+            'unmatched': [],
+            # Rows without a date get this one, so a resumed chunk resends identical plays
+            'started_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'channel_id': interaction.channel_id,
+            'message_id': None
+        }
+        message = await interaction.followup.send(embed=_progress_embed(job))
+        job['message_id'] = message.id
+        db.set_job(job_id, job)
+        # Downloading inside the job keeps it in _running, so a reconnect can't treat it as abandoned
+        start_job(job_id, download_and_import(job_id, file.url, message, interaction.followup))
+
+    @bot.tree.command(name="export", description="Download your complete watch history as a file")
+    @app_commands.describe(file_format="File format for the export")
+    @app_commands.choices(file_format=[
+        app_commands.Choice(name="CSV (gzip)", value="csv"),
+        app_commands.Choice(name="NDJSON (gzip)", value="ndjson")
+    ])
+    async def export_history(interaction: discord.Interaction, file_format: str = "csv"):
+        await interaction.response.defer()
+        discord_id = str(interaction.user.id)
+
+        if not db.get_user(discord_id):
+            await interaction.followup.send("❌ You need to connect your Trakt.tv account first. Use `/connect`")
+            return
+
+        job_id = f"export-{discord_id}"
+        if job_id in _running:
+            await interaction.followup.send("⏳ Your export is already running. I'll post the file here when it's done.")
+            return
+
+        os.makedirs(config.TRANSFER_DIR, exist_ok=True)
+        job = {
+            'job_id': job_id,
+            'kind': 'export',
+            'discord_id': discord_id,
+            'format': file_format,
+            'path': os.path.join(config.TRANSFER_DIR, f"{job_id}-{uuid.uuid4().hex[:8]}.gz"),
+            'status': 'running',
+            'processed': 0,
+            'channel_id': interaction.channel_id,
+            'message_id': None
+        }
+        message = await interaction.followup.send(embed=_export_embed(job))
+        job['message_id'] = message.id
+
+        start_job(job_id, run_export(job, message, interaction.followup))
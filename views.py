@@ -1,6 +1,7 @@
 import discord
 from discord import app_commands
 from datetime import datetime
+from images import poster_url, item_poster_url
 
 # Initialize these as None and set them later
 trakt_api = None
@@ -55,9 +56,9 @@ class SearchView(discord.ui.View):
         # Add poster from first result
         if page_results:
             first_content = page_results[0].get('show') or page_results[0].get('movie')
-            tmdb_id = first_content.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w300/{tmdb_id}.jpg")
+            poster = item_poster_url(page_results[0])
+            if poster:
+                embed.set_thumbnail(url=poster)
         
         return embed
     
@@ -133,9 +134,9 @@ class InfoSelectView(discord.ui.View):
         
         # Get detailed info
         if content_type == 'show':
-            detailed_info = trakt_api.get_show_info(str(content_id))
+            detailed_info = await trakt_api.get_show_info(str(content_id))
         else:
-            detailed_info = trakt_api.get_movie_info(str(content_id))
+            detailed_info = await trakt_api.get_movie_info(str(content_id))
         
         if detailed_info:
             embed = discord.Embed(
@@ -153,9 +154,9 @@ class InfoSelectView(discord.ui.View):
             embed.add_field(name="Runtime", value=f"⏱️ {runtime} min" if runtime else "N/A", inline=True)
             
             # Add poster
-            tmdb_id = detailed_info.get('ids', {}).get('tmdb')
-            if tmdb_id:
-                embed.set_image(url=f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg")
+            poster = poster_url(detailed_info, content_type, 'w500')
+            if poster:
+                embed.set_image(url=poster)
             
             view = ContentActionView(result, self.user_id)
             await interaction.response.edit_message(embed=embed, view=view)
@@ -182,7 +183,8 @@ class ContentActionView(discord.ui.View):
             await interaction.response.send_message("❌ Connect your Trakt.tv account first with `/connect`", ephemeral=True)
             return
         
-        success = trakt_api.mark_as_watched(user['access_token'], self.content_type, self.content_id)
+        await interaction.response.defer(ephemeral=True)
+        success = await trakt_api.mark_as_watched(user['access_token'], self.content_type, self.content_id)
         
         if success:
             embed = discord.Embed(
@@ -193,7 +195,7 @@ class ContentActionView(discord.ui.View):
         else:
             embed = discord.Embed(title="❌ Failed", description="Could not mark as watched", color=0xff0000)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
     
     @discord.ui.button(label='📋 Add to Watchlist', style=discord.ButtonStyle.primary)
     async def add_watchlist(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -206,7 +208,8 @@ class ContentActionView(discord.ui.View):
             await interaction.response.send_message("❌ Connect your Trakt.tv account first with `/connect`", ephemeral=True)
             return
         
-        success = trakt_api.add_to_watchlist(user['access_token'], self.content_type, self.content_id)
+        await interaction.response.defer(ephemeral=True)
+        success = await trakt_api.add_to_watchlist(user['access_token'], self.content_type, self.content_id)
         
         if success:
             embed = discord.Embed(
@@ -217,7 +220,7 @@ class ContentActionView(discord.ui.View):
         else:
             embed = discord.Embed(title="❌ Failed", description="Could not add to watchlist", color=0xff0000)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
 class ReminderModal(discord.ui.Modal):
     def __init__(self, show_id: str, show_title: str):
@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+import json
+import time
+from typing import Dict, List, Any, Tuple
+import config
+
+# Status Trakt answers a successful write with, per endpoint
+SUCCESS_STATUS = {
+    '/sync/history': 201,
+    '/sync/history/remove': 200,
+    '/sync/watchlist': 201,
+    '/sync/watchlist/remove': 200
+}
+
+class PendingWrite:
+    """One caller's mutation waiting to be merged into a /sync call."""
+
+    def __init__(self, path: str, kind: str, item: Dict[str, Any], future: asyncio.Future):
+        self.path = path
+        self.kind = kind
+        self.item = item
+        self.future = future
+
+def merge_items(writes: List[PendingWrite]) -> Dict[str, List[Dict[str, Any]]]:
+    """Combine writes to the same endpoint into one /sync payload.
+
+    Movies are deduplicated; items for the same show are folded into one
+    entry whose seasons and episodes are merged, and a whole-show or
+    whole-season item absorbs narrower ones.
+    """
+    payload: Dict[str, List[Dict[str, Any]]] = {}
+    seen_movies = set()
+    shows: Dict[Any, Dict[str, Any]] = {}
+
+    for write in writes:
+        if write.kind != 'shows':
+            key = json.dumps(write.item, sort_keys=True)
+            if key not in seen_movies:
+                seen_movies.add(key)
+                payload.setdefault(write.kind, []).append(write.item)
+            continue
+
+        show_id = write.item.get('ids', {}).get('trakt')
+        entry = shows.get(show_id)
+        if entry is None:
+            entry = shows[show_id] = {key: value for key, value in write.item.items() if key != 'seasons'}
+            if write.item.get('seasons'):
+                entry['seasons'] = []
+            payload.setdefault('shows', []).append(entry)
+        elif 'seasons' in entry and not write.item.get('seasons'):
+            # The whole show covers any seasons already queued
+            del entry['seasons']
+
+        if 'seasons' not in entry:
+            continue
+        for season in write.item.get('seasons', []):
+            existing = next((s for s in entry['seasons'] if s.get('number') == season.get('number')), None)
+            if existing is None:
+                entry['seasons'].append({key: (list(value) if key == 'episodes' else value)
+                                         for key, value in season.items()})
+            elif 'episodes' in existing:
+                if not season.get('episodes'):
+                    del existing['episodes']
+                else:
+                    numbers = {e.get('number') for e in existing['episodes']}
+                    existing['episodes'].extend(e for e in season['episodes'] if e.get('number') not in numbers)
+    return payload
+
+class WriteQueue:
+    """Per-user queue that debounces watch and watchlist writes into single /sync calls.
+
+    Writes for one user are held until no new one has arrived for `delay`
+    seconds (but no longer than `max_wait`), then consecutive writes to the
+    same endpoint are merged into one request. Each user's batches are sent
+    one at a time, in order, through the API's POST rate limiter. Every
+    caller gets its own result: False if the request failed or Trakt
+    reported its item as not found.
+    """
+
+    def __init__(self, api, delay: float = None, max_wait: float = None, max_items: int = None):
+        self.api = api
+        self.delay = delay if delay is not None else config.WRITE_QUEUE_DELAY
+        self.max_wait = max_wait if max_wait is not None else config.WRITE_QUEUE_MAX_WAIT
+        self.max_items = max_items or config.WRITE_QUEUE_MAX_ITEMS
+        self._pending: Dict[str, List[PendingWrite]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._stats = {'writes': 0, 'requests': 0, 'failed': 0, 'not_found': 0}
+
+    async def submit(self, access_token: str, path: str, kind: str, item: Dict[str, Any]) -> bool:
+        """Queue one movie or show item for a /sync endpoint and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(access_token, []).append(PendingWrite(path, kind, item, future))
+        self._stats['writes'] += 1
+
+        if access_token not in self._workers:
+            # Run batches outside the caller's context so one interaction's
+            # deadline doesn't cut short writes queued by others
+            self._workers[access_token] = asyncio.get_running_loop().create_task(
+                self._drain(access_token), context=contextvars.Context()
+            )
+        return await future
+
+    async def _drain(self, access_token: str):
+        """Send this user's queued writes until none are left."""
+        try:
+            while self._pending.get(access_token):
+                pending = self._pending[access_token]
+                started = time.monotonic()
+                while len(pending) < self.max_items:
+                    count = len(pending)
+                    await asyncio.sleep(self.delay)
+                    if len(pending) == count or time.monotonic() - started >= self.max_wait:
+                        break
+
+                batch = pending[:self.max_items]
+                del pending[:self.max_items]
+                try:
+                    await self._flush(access_token, batch)
+                finally:
+                    self._resolve_unfinished(batch)
+        finally:
+            del self._workers[access_token]
+            self._resolve_unfinished(self._pending.pop(access_token, []))
+
+    def _resolve_unfinished(self, writes: List[PendingWrite]):
+        """Fail any writes that never got a result, e.g. after the worker was cancelled."""
+        for write in writes:
+            if not write.future.done():
+                write.future.set_result(False)
+
+    def _runs(self, batch: List[PendingWrite]) -> List[Tuple[str, List[PendingWrite]]]:
+        """Split a batch into runs of consecutive writes to the same endpoint, keeping order."""
+        runs = []
+        for write in batch:
+            if runs and runs[-1][0] == write.path:
+                runs[-1][1].append(write)
+            else:
+                runs.append((write.path, [write]))
+        return runs
+
+    async def _flush(self, access_token: str, batch: List[PendingWrite]):
+        for path, writes in self._runs(batch):
+            self._stats['requests'] += 1
+            try:
+                response = await self.api._request(
+                    'POST',
+                    f"{self.api.base_url}{path}",
+                    json=merge_items(writes),
+                    headers=self.api.get_headers(access_token)
+                )
+                succeeded = response.status_code == SUCCESS_STATUS.get(path, 201)
+                not_found = response.json().get('not_found', {}) if succeeded else {}
+            except Exception as e:
+                print(f"Error sending queued Trakt write to {path}: {e}")
+                succeeded, not_found = False, {}
+
+            if not succeeded:
+                self._stats['failed'] += len(writes)
+            for write in writes:
+                result = succeeded and not self._is_not_found(write, not_found)
+                if succeeded and not result:
+                    self._stats['not_found'] += 1
+                if not write.future.done():
+                    write.future.set_result(result)
+
+    def _is_not_found(self, write: PendingWrite, not_found: Dict[str, Any]) -> bool:
+        trakt_id = write.item.get('ids', {}).get('trakt')
+        return any(entry.get('ids', {}).get('trakt') == trakt_id for entry in not_found.get(write.kind, []))
+
+    async def close(self):
+        """Wait for queued writes to be sent."""
+        if self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get how many writes were queued and how many requests they took."""
+        stats = dict(self._stats)
+        stats['pending'] = sum(len(writes) for writes in self._pending.values())
+        stats['requests_saved'] = max(0, stats['writes'] - stats['pending'] - stats['requests'])
+        return stats